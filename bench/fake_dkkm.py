@@ -0,0 +1,176 @@
+# bench/fake_dkkm.py
+"""
+Fake API DKKM untuk benchmark: dataset gedung/unit sintetis di sekitar satu titik,
+latency + error rate bisa diatur. Endpoint sama dengan API asli (prefix /api).
+"""
+import asyncio
+import math
+import random
+import uuid as uuid_module
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import web
+
+EARTH_RADIUS_M = 6371000
+
+# Jakarta pusat
+CENTER = (-6.2, 106.816666)
+
+# updated_at sintetis: berurutan per row, semua sebelum bot jalan (delta sync berikutnya ~kosong)
+UPDATED_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _stamp(index: int) -> str:
+    return (UPDATED_AT + timedelta(seconds=index)).isoformat()
+
+
+def _haversine(lat1, lon1, lat2, lon2) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def random_point(center=CENTER, spread_m: float = 2000, rng=random):
+    """Titik acak (uniform di lingkaran) dalam spread_m meter dari center"""
+    r = spread_m * math.sqrt(rng.random())
+    theta = rng.random() * 2 * math.pi
+    dlat = (r * math.cos(theta)) / 111320
+    dlon = (r * math.sin(theta)) / (111320 * math.cos(math.radians(center[0])))
+    return center[0] + dlat, center[1] + dlon
+
+
+class Dataset:
+    """Gedung + unit sintetis (deterministik per seed)"""
+
+    def __init__(self, gedung_count: int = 2000, max_units: int = 30, spread_m: float = 2000,
+                 seed: int = 1, image_base: str = 'https://img.example.com'):
+        rng = random.Random(seed)
+        self.gedung = {}
+        self.units = {}
+
+        for g in range(gedung_count):
+            gedung_uuid = str(uuid_module.UUID(int=rng.getrandbits(128)))
+            lat, lon = random_point(spread_m=spread_m, rng=rng)
+            units = []
+            for u in range(rng.randint(0, max_units)):
+                unit_uuid = str(uuid_module.UUID(int=rng.getrandbits(128)))
+                lantai = rng.randint(1, 40)
+                unit = {
+                    'uuid': unit_uuid,
+                    'gedung_uuid': gedung_uuid,
+                    'gedung_nama': f"Gedung {g}",
+                    'lantai': lantai,
+                    'unit_number': f"{lantai:02d}{u:02d}",
+                    'deskripsi': f"Unit {u} tipe {rng.choice(['studio', '1BR', '2BR', '3BR'])}",
+                    'listing_type': rng.choice(['available', 'available', 'blacklist']),
+                    'pemilik': f"Pemilik {rng.randint(1, 500)}",
+                    'agen': f"Agen {rng.randint(1, 50)}",
+                    'alasan_blacklist': '',
+                    'updated_at': _stamp(len(self.units)),
+                    'images': [f"{image_base}/unit/{unit_uuid}.jpg"] if rng.random() < 0.7 else [],
+                }
+                if unit['listing_type'] == 'blacklist':
+                    unit['alasan_blacklist'] = 'Tunggakan IPL'
+                self.units[unit_uuid] = unit
+                units.append(unit)
+
+            self.gedung[gedung_uuid] = {
+                'uuid': gedung_uuid,
+                'nama_gedung': f"Gedung {g}",
+                'alamat': f"Jl. Benchmark No. {g}",
+                'lat': lat,
+                'long': lon,
+                'total_units': len(units),
+                'primary_image': f"{image_base}/gedung/{gedung_uuid}.jpg" if rng.random() < 0.8 else None,
+                'updated_at': _stamp(g),
+                'units': [{k: unit[k] for k in ('uuid', 'lantai', 'unit_number', 'deskripsi',
+                                                'alasan_blacklist')} for unit in units],
+            }
+
+    def summary(self, gedung: dict) -> dict:
+        return {k: gedung[k] for k in ('uuid', 'nama_gedung', 'alamat', 'lat', 'long', 'total_units')}
+
+    def nearby(self, lat: float, lon: float, radius: float) -> list:
+        results = []
+        for gedung in self.gedung.values():
+            distance = _haversine(lat, lon, gedung['lat'], gedung['long'])
+            if distance <= radius:
+                results.append(dict(self.summary(gedung), distance=distance))
+        results.sort(key=lambda row: row['distance'])
+        return results
+
+
+class FakeDkkm:
+    """aiohttp app - latency_ms ± jitter_ms per request, error_rate -> 503"""
+
+    def __init__(self, dataset: Dataset, latency_ms: float = 50, jitter_ms: float = 20,
+                 error_rate: float = 0.0, page_size: int = 500):
+        self.dataset = dataset
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.requests = Counter()
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.router.add_post('/api/gedung/nearby', self.nearby)
+        self.app.router.add_get('/api/gedung', self.list_gedung)
+        self.app.router.add_get('/api/gedung/{uuid}', self.get_gedung)
+        self.app.router.add_get('/api/unit', self.list_unit)
+        self.app.router.add_get('/api/unit/{uuid}', self.get_unit)
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else 'unknown'
+        self.requests[f"{request.method} {route}"] += 1
+
+        delay = max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+
+        if self.error_rate and random.random() < self.error_rate:
+            self.requests['error'] += 1
+            return web.json_response({'detail': 'injected error'}, status=503)
+        return await handler(request)
+
+    async def nearby(self, request: web.Request):
+        payload = await request.json()
+        results = self.dataset.nearby(float(payload['lat']), float(payload['long']), float(payload['radius']))
+        return web.json_response({
+            'success': True,
+            'results': results,
+            'count': len(results),
+            'radius': payload['radius'],
+        })
+
+    def _list(self, request: web.Request, rows: list, summary=None):
+        """List berhalaman - detail=1 -> objek detail, updated_since -> hanya yang berubah"""
+        since = request.query.get('updated_since')
+        if since:
+            rows = [row for row in rows if row['updated_at'] >= since]
+        if summary and not request.query.get('detail'):
+            rows = [summary(row) for row in rows]
+
+        page = int(request.query.get('page', 1))
+        start = (page - 1) * self.page_size
+        return web.json_response({'results': rows[start:start + self.page_size],
+                                  'next': start + self.page_size < len(rows)})
+
+    async def list_gedung(self, request: web.Request):
+        return self._list(request, list(self.dataset.gedung.values()), self.dataset.summary)
+
+    async def list_unit(self, request: web.Request):
+        return self._list(request, list(self.dataset.units.values()))
+
+    async def get_gedung(self, request: web.Request):
+        gedung = self.dataset.gedung.get(request.match_info['uuid'])
+        if not gedung:
+            return web.json_response({'detail': 'not found'}, status=404)
+        return web.json_response(gedung)
+
+    async def get_unit(self, request: web.Request):
+        unit = self.dataset.units.get(request.match_info['uuid'])
+        if not unit:
+            return web.json_response({'detail': 'not found'}, status=404)
+        return web.json_response(unit)
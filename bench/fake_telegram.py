@@ -0,0 +1,216 @@
+# bench/fake_telegram.py
+"""
+Fake Telegram Bot API untuk benchmark (subset method yang dipakai bot).
+
+- Update dari load generator dikirim lewat getUpdates (polling) atau di-POST ke URL
+  dari setWebhook (mode webhook).
+- Output bot (send/edit) dicatat per chat; load generator menunggu output pertama
+  setelah update-nya untuk mengukur latency per aksi.
+"""
+import asyncio
+import json
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Optional
+
+import aiohttp
+from aiohttp import web
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'DKKM Bench', 'username': 'dkkm_bench_bot'}
+
+# Method yang menghasilkan message baru / mengubah message (output yang ditunggu user)
+VISIBLE_METHODS = {'sendMessage', 'sendPhoto', 'editMessageText', 'editMessageMedia',
+                   'editMessageCaption', 'editMessageReplyMarkup'}
+
+
+class FakeTelegram:
+    def __init__(self, latency_ms: float = 0):
+        self.latency_ms = latency_ms
+        self.calls = Counter()
+        self.call_time = defaultdict(float)
+        self.ready = asyncio.Event()
+        self.webhook_url: Optional[str] = None
+        self.webhook_secret: Optional[str] = None
+
+        self._updates: asyncio.Queue = asyncio.Queue()
+        self._update_id = 0
+        self._message_id = 0
+        self._messages: Dict[int, Dict[int, dict]] = defaultdict(dict)  # chat -> message_id -> message
+        self._waiters: Dict[int, asyncio.Future] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.app = web.Application()
+        self.app.router.add_post('/bot{token}/{method}', self.handle)
+        self.app.router.add_get('/bot{token}/{method}', self.handle)
+        self.app.on_cleanup.append(self._cleanup)
+
+    async def _cleanup(self, app):
+        if self._session:
+            await self._session.close()
+
+    # === API LOAD GENERATOR ===
+
+    def next_update_id(self) -> int:
+        self._update_id += 1
+        return self._update_id
+
+    def message(self, chat_id: int, message_id: int) -> Optional[dict]:
+        return self._messages[chat_id].get(message_id)
+
+    async def deliver(self, chat_id: int, update: dict, timeout: float) -> dict:
+        """Kirim update ke bot, tunggu output pertama untuk chat ini (raise TimeoutError)"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[chat_id] = future
+
+        if self.webhook_url:
+            if not self._session:
+                self._session = aiohttp.ClientSession()
+            headers = {'X-Telegram-Bot-Api-Secret-Token': self.webhook_secret} if self.webhook_secret else {}
+            async with self._session.post(self.webhook_url, json=update, headers=headers) as resp:
+                if resp.status >= 300:
+                    self._waiters.pop(chat_id, None)
+                    raise RuntimeError(f"webhook {resp.status}")
+        else:
+            self._updates.put_nowait(update)
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            if self._waiters.get(chat_id) is future:
+                del self._waiters[chat_id]
+
+    # === BOT API ===
+
+    @staticmethod
+    async def _params(request: web.Request) -> dict:
+        params = dict(request.query)
+        if request.content_type == 'application/json':
+            params.update(await request.json())
+        elif request.can_read_body:
+            form = await request.post()
+            params.update({k: v for k, v in form.items() if isinstance(v, str)})
+
+        # PTB kirim object (reply_markup, media, ...) sebagai JSON string di form
+        for key in ('reply_markup', 'media', 'allowed_updates'):
+            if isinstance(params.get(key), str):
+                try:
+                    params[key] = json.loads(params[key])
+                except ValueError:
+                    pass
+        for key in ('chat_id', 'message_id', 'offset', 'timeout', 'limit'):
+            if isinstance(params.get(key), str) and params[key].lstrip('-').isdigit():
+                params[key] = int(params[key])
+        return params
+
+    async def handle(self, request: web.Request):
+        method = request.match_info['method']
+        params = await self._params(request)
+        start = time.perf_counter()
+
+        if self.latency_ms and method != 'getUpdates':
+            await asyncio.sleep(self.latency_ms / 1000)
+
+        handler = getattr(self, f"_m_{method}", None)
+        if handler is None:
+            result = True
+        else:
+            result = await handler(params)
+
+        self.calls[method] += 1
+        self.call_time[method] += time.perf_counter() - start
+
+        if isinstance(result, web.Response):
+            return result
+        if method in VISIBLE_METHODS and isinstance(result, dict):
+            self._notify(result['chat']['id'], result)
+        return web.json_response({'ok': True, 'result': result})
+
+    def _notify(self, chat_id: int, message: dict):
+        future = self._waiters.pop(chat_id, None)
+        if future and not future.done():
+            future.set_result(message)
+
+    def _new_message(self, chat_id: int, **fields) -> dict:
+        self._message_id += 1
+        message = {
+            'message_id': self._message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+            **fields,
+        }
+        self._messages[chat_id][self._message_id] = message
+        return message
+
+    @staticmethod
+    def _photo(ref: str) -> list:
+        # file_id yang sudah "di-upload" dipakai ulang apa adanya
+        file_id = ref if ref.startswith('bench-file-') else f"bench-file-{abs(hash(ref))}"
+        return [{'file_id': file_id, 'file_unique_id': file_id[-16:], 'width': 1280, 'height': 960}]
+
+    def _edit(self, params: dict, **fields):
+        message = self.message(params.get('chat_id'), params.get('message_id'))
+        if message is None:
+            return web.json_response({'ok': False, 'error_code': 400,
+                                      'description': 'Bad Request: message to edit not found'}, status=400)
+        message.update(fields)
+        if params.get('reply_markup'):
+            message['reply_markup'] = params['reply_markup']
+        else:
+            message.pop('reply_markup', None)
+        message['edit_date'] = int(time.time())
+        return message
+
+    async def _m_getMe(self, params):
+        return BOT_USER
+
+    async def _m_deleteWebhook(self, params):
+        self.webhook_url = None
+        return True
+
+    async def _m_setWebhook(self, params):
+        self.webhook_url = params.get('url')
+        self.webhook_secret = params.get('secret_token')
+        self.ready.set()
+        return True
+
+    async def _m_getUpdates(self, params):
+        self.ready.set()
+        timeout = float(params.get('timeout') or 0)
+        updates = []
+        try:
+            updates.append(await asyncio.wait_for(self._updates.get(), timeout or 0.001))
+        except asyncio.TimeoutError:
+            return []
+        while not self._updates.empty() and len(updates) < int(params.get('limit') or 100):
+            updates.append(self._updates.get_nowait())
+        return updates
+
+    async def _m_sendMessage(self, params):
+        return self._new_message(params['chat_id'], text=params.get('text', ''),
+                                 **({'reply_markup': params['reply_markup']} if params.get('reply_markup') else {}))
+
+    async def _m_sendPhoto(self, params):
+        return self._new_message(params['chat_id'], photo=self._photo(params.get('photo', '')),
+                                 caption=params.get('caption', ''),
+                                 **({'reply_markup': params['reply_markup']} if params.get('reply_markup') else {}))
+
+    async def _m_editMessageText(self, params):
+        message = self.message(params.get('chat_id'), params.get('message_id'))
+        if message and message.get('text') == params.get('text') and message.get('reply_markup') == params.get('reply_markup'):
+            # Tampilan user sudah sesuai - aksi dianggap selesai
+            self._notify(message['chat']['id'], message)
+            return web.json_response({'ok': False, 'error_code': 400,
+                                      'description': 'Bad Request: message is not modified'}, status=400)
+        return self._edit(params, text=params.get('text', ''))
+
+    async def _m_editMessageCaption(self, params):
+        return self._edit(params, caption=params.get('caption', ''))
+
+    async def _m_editMessageMedia(self, params):
+        media = params.get('media') or {}
+        return self._edit(params, photo=self._photo(media.get('media', '')), caption=media.get('caption', ''))
+
+    async def _m_deleteMessage(self, params):
+        self._messages[params.get('chat_id')].pop(params.get('message_id'), None)
+        return True
@@ -0,0 +1,161 @@
+# bench/loadgen.py
+"""
+Load generator: N user simulasi menjalankan alur
+lokasi -> radius -> gedung -> unit -> back gedung -> back hasil -> pencarian baru (ulang).
+Latency satu aksi = dari update dikirim sampai output pertama bot di chat tersebut.
+"""
+import asyncio
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from bench.fake_dkkm import random_point
+from bench.fake_telegram import FakeTelegram
+
+
+class Stats:
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.started = None
+        self.finished = None
+
+    def record(self, action: str, seconds: float):
+        self.latency[action].append(seconds)
+
+    @staticmethod
+    def percentile(values: List[float], p: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        duration = (self.finished or time.perf_counter()) - (self.started or 0)
+        actions = {}
+        everything = []
+        for action, values in sorted(self.latency.items()):
+            everything.extend(values)
+            actions[action] = self._row(values, self.errors.get(action, 0))
+        return {
+            'duration_s': round(duration, 2),
+            'actions': actions,
+            'total': self._row(everything, sum(self.errors.values())),
+            'throughput_rps': round(len(everything) / duration, 2) if duration > 0 else 0,
+        }
+
+    def _row(self, values: List[float], errors: int) -> dict:
+        return {
+            'count': len(values),
+            'errors': errors,
+            'p50_ms': round(self.percentile(values, 50) * 1000, 1),
+            'p95_ms': round(self.percentile(values, 95) * 1000, 1),
+            'p99_ms': round(self.percentile(values, 99) * 1000, 1),
+            'max_ms': round(max(values) * 1000, 1) if values else 0.0,
+        }
+
+
+def _buttons(message: dict, prefix: str) -> List[str]:
+    markup = message.get('reply_markup') or {}
+    return [button['callback_data']
+            for row in markup.get('inline_keyboard', [])
+            for button in row
+            if button.get('callback_data', '').startswith(prefix)]
+
+
+class SimulatedUser:
+    def __init__(self, telegram: FakeTelegram, stats: Stats, user_id: int, rng: random.Random,
+                 think_ms: float, timeout: float, spread_m: float, radii: Optional[List[str]] = None):
+        self.telegram = telegram
+        self.stats = stats
+        self.user_id = user_id
+        self.rng = rng
+        self.think_ms = think_ms
+        self.timeout = timeout
+        self.spread_m = spread_m
+        self.radii = [str(r) for r in radii] if radii else None  # '100', 'auto', ...
+        self.user = {'id': user_id, 'is_bot': False, 'first_name': f"Bench {user_id}"}
+        self.chat = {'id': user_id, 'type': 'private'}
+        self.current: Optional[dict] = None  # message bot terakhir (target callback)
+
+    async def _act(self, action: str, update: dict) -> Optional[dict]:
+        update['update_id'] = self.telegram.next_update_id()
+        start = time.perf_counter()
+        try:
+            message = await self.telegram.deliver(self.user_id, update, self.timeout)
+        except Exception:
+            self.stats.errors[action] += 1
+            return None
+        self.stats.record(action, time.perf_counter() - start)
+        self.current = message
+
+        if self.think_ms:
+            await asyncio.sleep(self.rng.uniform(0, 2 * self.think_ms) / 1000)
+        return message
+
+    async def location(self) -> Optional[dict]:
+        lat, lon = random_point(spread_m=self.spread_m, rng=self.rng)
+        return await self._act('location', {'message': {
+            'message_id': self.rng.randint(1, 2 ** 31),
+            'date': int(time.time()),
+            'chat': self.chat,
+            'from': self.user,
+            'location': {'latitude': lat, 'longitude': lon},
+        }})
+
+    async def tap(self, action: str, data: str) -> Optional[dict]:
+        if not self.current:
+            return None
+        return await self._act(action, {'callback_query': {
+            'id': str(self.rng.getrandbits(63)),
+            'from': self.user,
+            'chat_instance': str(self.user_id),
+            'message': self.current,
+            'data': data,
+        }})
+
+    def _choice(self, prefix: str) -> Optional[str]:
+        options = _buttons(self.current or {}, prefix)
+        if prefix == 'radius_' and self.radii:
+            options = [o for o in options if o.split('_')[1] in self.radii] or options
+        return self.rng.choice(options) if options else None
+
+    async def run(self, iterations: int):
+        if not await self.location():
+            return
+
+        for _ in range(iterations):
+            radius = self._choice('radius_')
+            if not radius or not await self.tap('radius', radius):
+                return
+
+            gedung = self._choice('gedung_')
+            if gedung and await self.tap('gedung', gedung):
+                unit = self._choice('unit_')
+                if unit and await self.tap('unit', unit):
+                    await self.tap('back_gedung', 'back_gedung')
+                await self.tap('back_results', 'back_results')
+
+            if not await self.tap('search_again', 'search_again'):
+                return
+
+
+async def run_load(telegram: FakeTelegram, users: int, iterations: int, ramp_s: float = 1.0,
+                   think_ms: float = 0, timeout: float = 30, spread_m: float = 1500,
+                   radii: Optional[List[str]] = None, seed: int = 7) -> Stats:
+    """Jalankan semua user simulasi (start disebar selama ramp_s)"""
+    stats = Stats()
+    rng = random.Random(seed)
+
+    async def _user(index: int):
+        await asyncio.sleep(ramp_s * index / max(1, users))
+        user = SimulatedUser(telegram, stats, 100000 + index, random.Random(rng.getrandbits(32)),
+                             think_ms, timeout, spread_m, radii)
+        await user.run(iterations)
+
+    stats.started = time.perf_counter()
+    await asyncio.gather(*(_user(i) for i in range(users)))
+    stats.finished = time.perf_counter()
+    return stats
@@ -0,0 +1,247 @@
+# bench/run.py
+"""
+Benchmark offline: fake Telegram + fake API DKKM + Redis (fakeredis / lokal / tanpa Redis),
+bot dijalankan sebagai subprocess (python main.py) dengan env yang diarahkan ke fake server.
+
+    python -m bench.run --users 50 --iterations 5
+    python -m bench.run --redis fake --api-latency-ms 80 --json out.json
+    python -m bench.run --bot-env BOT_MODE=webhook --bot-env WEBHOOK_WORKERS=4 --bot-env WEBHOOK_URL=http://127.0.0.1:8443
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Optional
+
+from aiohttp import web
+
+from bench.fake_dkkm import Dataset, FakeDkkm
+from bench.fake_telegram import FakeTelegram
+from bench.loadgen import run_load
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _start_fakeredis() -> str:
+    """fakeredis TCP server di thread (pip install fakeredis) - return REDIS_URL"""
+    try:
+        from fakeredis import TcpFakeServer
+    except ImportError:
+        sys.exit("❌ --redis fake butuh fakeredis>=2.26 (pip install fakeredis)")
+
+    port = _free_port()
+    server = TcpFakeServer(('127.0.0.1', port), server_type='redis')
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}/0"
+
+
+# === MEMORY (RSS bot + child process, Linux /proc atau psutil) ===
+
+def _children(pid: int) -> List[int]:
+    result = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                result.extend(int(c) for c in f.read().split())
+    except OSError:
+        pass
+    return result
+
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        import psutil
+        proc = psutil.Process(pid)
+        return sum(p.memory_info().rss for p in [proc] + proc.children(recursive=True))
+    except ImportError:
+        pass
+    except Exception:
+        return 0
+
+    total = 0
+    for p in [pid] + _children(pid):
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return total
+
+
+class MemorySampler:
+    def __init__(self, pid: int, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[int] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _loop(self):
+        while True:
+            self.samples.append(_rss_bytes(self.pid))
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> dict:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        mb = [s / 1024 / 1024 for s in self.samples if s]
+        return {
+            'rss_start_mb': round(mb[0], 1) if mb else None,
+            'rss_peak_mb': round(max(mb), 1) if mb else None,
+            'rss_end_mb': round(mb[-1], 1) if mb else None,
+        }
+
+
+# === REPORT ===
+
+def _print_report(result: dict):
+    load = result['load']
+    print(f"\n📊 {result['config']['users']} user x {result['config']['iterations']} iterasi "
+          f"dalam {load['duration_s']}s — throughput {load['throughput_rps']} aksi/s")
+    print(f"{'aksi':<14}{'count':>8}{'err':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for name, row in list(load['actions'].items()) + [('TOTAL', load['total'])]:
+        print(f"{name:<14}{row['count']:>8}{row['errors']:>6}{row['p50_ms']:>9.1f}m"
+              f"{row['p95_ms']:>9.1f}m{row['p99_ms']:>9.1f}m{row['max_ms']:>9.1f}m")
+
+    memory = result['memory']
+    print(f"\n🧠 RSS bot: start {memory['rss_start_mb']} MB, peak {memory['rss_peak_mb']} MB, "
+          f"end {memory['rss_end_mb']} MB")
+    print(f"🌐 Upstream API: {dict(result['upstream'])}")
+    print(f"✉️  Telegram API: {dict(result['telegram'])}")
+
+
+# === MAIN ===
+
+async def _run(args) -> dict:
+    dataset = Dataset(args.gedung, args.max_units, args.spread_m, seed=args.seed)
+    dkkm = FakeDkkm(dataset, args.api_latency_ms, args.api_jitter_ms, args.api_error_rate)
+    telegram = FakeTelegram(args.tg_latency_ms)
+
+    runners = []
+    ports = {}
+    for name, app in (('dkkm', dkkm.app), ('telegram', telegram.app)):
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        ports[name] = _free_port()
+        await web.TCPSite(runner, '127.0.0.1', ports[name]).start()
+        runners.append(runner)
+
+    if args.redis == 'fake':
+        redis_url = _start_fakeredis()
+    elif args.redis == 'none':
+        redis_url = 'redis://127.0.0.1:1/0'  # connection refused -> bot jalan tanpa cache Redis
+    else:
+        redis_url = args.redis
+
+    env = dict(
+        os.environ,
+        TELEGRAM_TOKEN='123456:BENCH',
+        TELEGRAM_BASE_URL=f"http://127.0.0.1:{ports['telegram']}",
+        API_BASE_URL=f"127.0.0.1:{ports['dkkm']}",
+        API_SCHEME='http',
+        REDIS_URL=redis_url,
+        METRICS_PORT='0',
+        PYTHONUNBUFFERED='1',
+    )
+    for item in args.bot_env:
+        key, _, value = item.partition('=')
+        env[key] = value
+
+    log = open(args.bot_log, 'w') if args.bot_log else subprocess.DEVNULL
+    bot = subprocess.Popen([sys.executable, 'main.py'], cwd=ROOT, env=env, stdout=log, stderr=log)
+    sampler = MemorySampler(bot.pid)
+
+    try:
+        await asyncio.wait_for(telegram.ready.wait(), args.startup_timeout)
+        # Beri waktu post_init (Redis, spatial index, ...) selesai di mode webhook cluster
+        await asyncio.sleep(args.warmup_s)
+
+        sampler.start()
+        stats = await run_load(telegram, args.users, args.iterations, args.ramp_s, args.think_ms,
+                               args.timeout, min(args.spread_m, args.user_spread_m),
+                               args.radii, args.seed)
+        memory = await sampler.stop()
+    finally:
+        bot.send_signal(signal.SIGINT)
+        try:
+            bot.wait(15)
+        except subprocess.TimeoutExpired:
+            bot.kill()
+        for runner in runners:
+            await runner.cleanup()
+        if log is not subprocess.DEVNULL:
+            log.close()
+
+    return {
+        'config': {k: v for k, v in vars(args).items() if k != 'json'},
+        'load': stats.summary(),
+        'memory': memory,
+        'upstream': dict(dkkm.requests),
+        'telegram': dict(telegram.calls),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark offline DKKM bot')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=3, help='putaran radius->gedung->unit per user')
+    parser.add_argument('--ramp-s', type=float, default=2.0)
+    parser.add_argument('--think-ms', type=float, default=0)
+    parser.add_argument('--timeout', type=float, default=30, help='timeout per aksi (detik)')
+    parser.add_argument('--radii', nargs='*', help='batasi pilihan radius, misal --radii 100 200 auto')
+
+    parser.add_argument('--gedung', type=int, default=2000, help='jumlah gedung dataset')
+    parser.add_argument('--max-units', type=int, default=30)
+    parser.add_argument('--spread-m', type=float, default=2000, help='sebaran gedung dari titik pusat')
+    parser.add_argument('--user-spread-m', type=float, default=1500, help='sebaran lokasi user')
+    parser.add_argument('--seed', type=int, default=1)
+
+    parser.add_argument('--api-latency-ms', type=float, default=50)
+    parser.add_argument('--api-jitter-ms', type=float, default=20)
+    parser.add_argument('--api-error-rate', type=float, default=0.0)
+    parser.add_argument('--tg-latency-ms', type=float, default=5)
+
+    parser.add_argument('--redis', default='fake', help="fake | none | redis://... (Redis lokal)")
+    parser.add_argument('--bot-env', action='append', default=[], metavar='KEY=VALUE',
+                        help='override env bot (boleh berulang)')
+    parser.add_argument('--bot-log', help='simpan stdout/stderr bot ke file')
+    parser.add_argument('--startup-timeout', type=float, default=30)
+    parser.add_argument('--warmup-s', type=float, default=1.0)
+    parser.add_argument('--json', help='simpan hasil ke file JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.time()
+    result = asyncio.run(_run(args))
+    result['started_at'] = started
+
+    _print_report(result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 {args.json}")
+
+
+if __name__ == '__main__':
+    main()
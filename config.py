@@ -6,18 +6,165 @@ load_dotenv()
 
 # Telegram Bot
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
+# Server Bot API lain (misal fake server bench/ atau local Bot API server), kosong = api.telegram.org
+TELEGRAM_BASE_URL = os.getenv('TELEGRAM_BASE_URL', '').rstrip('/')
 API_BASE = os.getenv('API_BASE_URL')
+API_SCHEME = os.getenv('API_SCHEME', 'https')
+
+# Mode bot: polling | webhook
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '').rstrip('/')  # URL publik, misal https://bot.domain.com
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8443))
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_WORKERS = int(os.getenv('WEBHOOK_WORKERS', 1))
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', 1000))
+
+# Update diproses concurrent (per chat tetap berurutan)
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', 32))
+
+# Rate limit outbound Telegram (request per detik) - global total semua worker webhook
+TG_GLOBAL_RATE = float(os.getenv('TG_GLOBAL_RATE', 30))
+TG_CHAT_RATE = float(os.getenv('TG_CHAT_RATE', 1))
+TG_CHAT_BURST = float(os.getenv('TG_CHAT_BURST', 3))
+TG_MAX_RETRIES = int(os.getenv('TG_MAX_RETRIES', 2))
 
 # API Configuration
-API_BASE_URL = f'https://{API_BASE}/api'
+API_BASE_URL = f'{API_SCHEME}://{API_BASE}/api'
 API_KEY = os.getenv('APIKEY_IMARAH_BLACKLIST')
 
+# API client (connection pool + timeout per endpoint, dalam detik)
+API_POOL_SIZE = int(os.getenv('API_POOL_SIZE', 20))
+API_DNS_TTL = int(os.getenv('API_DNS_TTL', 300))
+API_KEEPALIVE = int(os.getenv('API_KEEPALIVE', 30))
+API_TIMEOUT_NEARBY = float(os.getenv('API_TIMEOUT_NEARBY', 10))
+API_TIMEOUT_DETAIL = float(os.getenv('API_TIMEOUT_DETAIL', 5))
+API_TIMEOUT_BULK = float(os.getenv('API_TIMEOUT_BULK', 60))
+
+# Resilience API: timeout di atas = deadline total per call (termasuk retry)
+API_RETRIES = int(os.getenv('API_RETRIES', 2))  # hanya GET
+API_RETRY_BASE = float(os.getenv('API_RETRY_BASE', 0.1))
+API_RETRY_CAP = float(os.getenv('API_RETRY_CAP', 1.0))
+API_HEDGE_DELAY = float(os.getenv('API_HEDGE_DELAY', 0))  # detik, 0 = tanpa hedging (GET gedung/unit)
+API_BREAKER_THRESHOLD = int(os.getenv('API_BREAKER_THRESHOLD', 5))  # gagal beruntun -> open
+API_BREAKER_TIMEOUT = float(os.getenv('API_BREAKER_TIMEOUT', 30))  # detik open sebelum half-open
+
 # Radius presets
 RADIUS_OPTIONS = [5, 25, 50, 100, 200, 500, 1000]
 DEFAULT_RADIUS = 500
 
+# Pagination (deskripsi / alasan unit dipotong kalau caption foto satu halaman > 1024 karakter)
+RESULTS_PAGE_SIZE = int(os.getenv('RESULTS_PAGE_SIZE', 10))
+UNITS_PAGE_SIZE = int(os.getenv('UNITS_PAGE_SIZE', 8))
+
 # Redis config
 REDIS_URL = os.getenv('REDIS_URL') 
 REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
-CACHE_TTL = int(os.getenv('CACHE_TTL', 3600))  # 1 jam
\ No newline at end of file
+# Failover: URL cadangan (dipisah koma, dicoba berurutan) atau Sentinel (host:port,host:port)
+REDIS_FALLBACK_URLS = [u.strip() for u in os.getenv('REDIS_FALLBACK_URLS', '').split(',') if u.strip()]
+REDIS_SENTINELS = [
+    (h.strip(), int(p)) for h, _, p in
+    (item.rpartition(':') for item in os.getenv('REDIS_SENTINELS', '').split(',') if item.strip())
+]
+REDIS_SENTINEL_MASTER = os.getenv('REDIS_SENTINEL_MASTER', 'mymaster')
+# Pool + timeout (detik) + health check / reconnect backoff
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 1.0))
+REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', 1.0))
+REDIS_HEALTH_INTERVAL = float(os.getenv('REDIS_HEALTH_INTERVAL', 5))
+REDIS_RECONNECT_MAX = float(os.getenv('REDIS_RECONNECT_MAX', 60))
+CACHE_TTL = int(os.getenv('CACHE_TTL', 3600))  # 1 jam
+# Lewat soft TTL: data lama tetap dikirim, refresh jalan di background (hard TTL = CACHE_TTL)
+CACHE_SOFT_TTL = int(os.getenv('CACHE_SOFT_TTL', 2700))
+# Lewat hard TTL: entry tetap disimpan sekian detik lagi, hanya dilayani kalau API gagal / circuit open
+CACHE_STALE_IF_ERROR = int(os.getenv('CACHE_STALE_IF_ERROR', 86400))
+
+# Cache nearby per geo-cell (geohash precision 7 ≈ 153m)
+NEARBY_CACHE_TTL = int(os.getenv('NEARBY_CACHE_TTL', 600))
+NEARBY_GEOHASH_PRECISION = int(os.getenv('NEARBY_GEOHASH_PRECISION', 7))
+
+# Spatial index lokal (opsional) - nearby dijawab in-process
+SPATIAL_INDEX_ENABLED = os.getenv('SPATIAL_INDEX_ENABLED', 'false').lower() == 'true'
+SPATIAL_INDEX_REFRESH = int(os.getenv('SPATIAL_INDEX_REFRESH', 900))
+SPATIAL_INDEX_MAX_AGE = int(os.getenv('SPATIAL_INDEX_MAX_AGE', 3600))
+
+# Single-flight: lock Redis supaya beberapa proses bot coalesce fetch yang sama
+SINGLEFLIGHT_DISTRIBUTED = os.getenv('SINGLEFLIGHT_DISTRIBUTED', 'false').lower() == 'true'
+SINGLEFLIGHT_LOCK_TTL_MS = int(os.getenv('SINGLEFLIGHT_LOCK_TTL_MS', 5000))
+
+# L1 cache in-process (gedung/unit) - batas total ukuran JSON, bukan RSS
+L1_MAX_BYTES = int(os.getenv('L1_MAX_BYTES', 4 * 1024 * 1024))
+L1_TTL = int(os.getenv('L1_TTL', 300))
+
+# Encoding value cache: json | orjson | msgpack, kompresi: none | zlib | zstd
+CACHE_CODEC = os.getenv('CACHE_CODEC', 'json')
+CACHE_COMPRESSION = os.getenv('CACHE_COMPRESSION', 'zlib')
+CACHE_COMPRESS_MIN = int(os.getenv('CACHE_COMPRESS_MIN', 1024))
+
+# Cache file_id Telegram untuk foto gedung/unit (default 30 hari)
+FILE_ID_TTL = int(os.getenv('FILE_ID_TTL', 30 * 86400))
+
+# Session user di Redis (TTL detik) + LRU lokal write-behind
+SESSION_TTL = int(os.getenv('SESSION_TTL', 7 * 86400))
+SESSION_MAX_LOCAL = int(os.getenv('SESSION_MAX_LOCAL', 1000))
+SESSION_FLUSH_INTERVAL = float(os.getenv('SESSION_FLUSH_INTERVAL', 2))
+
+# Cache hasil render view (caption + keyboard) per content hash
+VIEW_CACHE_TTL = int(os.getenv('VIEW_CACHE_TTL', 3600))
+
+# Endpoint Prometheus /metrics (0 = nonaktif). Cluster webhook: port + index worker
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_ADDR = os.getenv('METRICS_ADDR', '127.0.0.1')
+
+# Tracing per update (0 = nonaktif). TRACE_SLOW_MS > 0: trace lebih lambat dari ambang selalu di-export
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0))
+TRACE_SLOW_MS = float(os.getenv('TRACE_SLOW_MS', 0))
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'file')  # file | otlp
+TRACE_FILE = os.getenv('TRACE_FILE', 'traces.jsonl')
+TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+TRACE_SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'dkkm-bot')
+TRACE_FLUSH_INTERVAL = float(os.getenv('TRACE_FLUSH_INTERVAL', 5))
+
+# Prefetch prediktif detail gedung (setelah hasil nearby) / unit (setelah detail gedung)
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'false').lower() == 'true'
+PREFETCH_TOP_GEDUNG = int(os.getenv('PREFETCH_TOP_GEDUNG', 3))
+PREFETCH_TOP_UNITS = int(os.getenv('PREFETCH_TOP_UNITS', 6))
+PREFETCH_CONCURRENCY = int(os.getenv('PREFETCH_CONCURRENCY', 4))  # budget global per proses
+
+# Invalidasi cache dari backend: Redis stream (kosong = nonaktif) + endpoint POST /invalidate
+# (INVALIDATION_PORT 0 = nonaktif, wajib INVALIDATION_TOKEN). Cluster webhook: endpoint di worker 0
+INVALIDATION_STREAM = os.getenv('INVALIDATION_STREAM', '')
+INVALIDATION_GROUP = os.getenv('INVALIDATION_GROUP', 'dkkm-bot')
+INVALIDATION_PORT = int(os.getenv('INVALIDATION_PORT', 0))
+INVALIDATION_ADDR = os.getenv('INVALIDATION_ADDR', '0.0.0.0')
+INVALIDATION_TOKEN = os.getenv('INVALIDATION_TOKEN')
+
+# Snapshot dataset lokal (SQLite) + sync delta updated_since - read gedung/unit/nearby tanpa API
+SNAPSHOT_ENABLED = os.getenv('SNAPSHOT_ENABLED', 'false').lower() == 'true'
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', 'snapshot.db')
+SNAPSHOT_SYNC_INTERVAL = int(os.getenv('SNAPSHOT_SYNC_INTERVAL', 60))
+SNAPSHOT_MAX_AGE = int(os.getenv('SNAPSHOT_MAX_AGE', 3600))  # lewat ini snapshot hanya fallback saat API gagal
+
+# Warm-up startup: N gedung/unit paling sering diakses (ZSET hot:* di Redis) di-load ke cache
+WARMUP_TOP_GEDUNG = int(os.getenv('WARMUP_TOP_GEDUNG', 200))
+WARMUP_TOP_UNITS = int(os.getenv('WARMUP_TOP_UNITS', 500))
+HOTKEYS_FLUSH_INTERVAL = float(os.getenv('HOTKEYS_FLUSH_INTERVAL', 10))
+HOTKEYS_MAX_KEYS = int(os.getenv('HOTKEYS_MAX_KEYS', 10000))
+
+# Hot key: skor akses meluruh (half-life detik), skor < MIN_SCORE keluar dari ranking
+HOTKEYS_HALF_LIFE = float(os.getenv('HOTKEYS_HALF_LIFE', 86400))
+HOTKEYS_MIN_SCORE = float(os.getenv('HOTKEYS_MIN_SCORE', 0.5))
+# TTL adaptif: top-K global = CACHE_TTL x HOT factor, belum pernah di-tap = CACHE_TTL x COLD factor
+HOTKEYS_TOP_K = int(os.getenv('HOTKEYS_TOP_K', 200))
+HOTKEYS_HOT_TTL_FACTOR = float(os.getenv('HOTKEYS_HOT_TTL_FACTOR', 4))
+HOTKEYS_COLD_TTL_FACTOR = float(os.getenv('HOTKEYS_COLD_TTL_FACTOR', 0.5))
+# Decay + refresh proaktif hot key + update top-K tiap N detik (0 = nonaktif)
+HOTKEYS_REFRESH_INTERVAL = float(os.getenv('HOTKEYS_REFRESH_INTERVAL', 60))
+# Jumlah hot key per jenis di metrics dkkm_hot_key_score
+HOTKEYS_REPORT_TOP = int(os.getenv('HOTKEYS_REPORT_TOP', 10))
+
+# Snapshot disk L1 + session saat shutdown, dimuat lagi saat start (kosong = nonaktif)
+WARM_SNAPSHOT_PATH = os.getenv('WARM_SNAPSHOT_PATH', '')
+WARM_SNAPSHOT_MAX_AGE = int(os.getenv('WARM_SNAPSHOT_MAX_AGE', 3600))
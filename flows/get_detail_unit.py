@@ -1,8 +1,10 @@
 """Get unit details"""
-import aiohttp
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from config import API_BASE_URL, API_KEY
-from utils.redis_manager import cache
+from utils.api_client import ApiError
+from utils.hotkeys import hotkeys
+from utils.loader import load_gedung, load_unit
+from utils.session_store import sessions
+from utils.transitions import transition
 # Import logger
 import logging
 logger = logging.getLogger(__name__)
@@ -10,38 +12,17 @@ logger = logging.getLogger(__name__)
 async def get_unit_detail(query, uuid: str, context):
     """Get unit detail by UUID"""
     await query.answer("📥 Memuat detail unit...")
-
-    cached_data = await cache.get_unit(uuid)
-    if cached_data:
-        await show_unit_detail(query, cached_data, context)
-        return
+    hotkeys.record('unit', uuid)
 
     try:
-        async with aiohttp.ClientSession() as session:
-            url = f"{API_BASE_URL}/unit/{uuid}"
-            headers = {
-                'accept': 'application/json',
-                'X-API-Key': API_KEY
-            }
-            
-            async with session.get(url, headers=headers) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    # Save to redis
-                    await cache.save_unit(uuid, data)
+        data = await load_unit(uuid)
+        await show_unit_detail(query, data, context)
 
-                    await show_unit_detail(query, data, context)
-                else:
-                    await query.edit_message_text(
-                        f"❌ *Error {resp.status}*\n\nGagal memuat data unit.",
-                        parse_mode='Markdown'
-                    )
+    except ApiError as e:
+        await transition(query, f"❌ *Error {e.status}*\n\nGagal memuat data unit.")
     
     except Exception as e:
-        await query.edit_message_text(
-            f"❌ *Error*\n\n`{str(e)}`",
-            parse_mode='Markdown'
-        )
+        await transition(query, f"❌ *Error*\n\n`{str(e)}`")
 
 
 async def show_unit_detail(query, unit, context):
@@ -104,96 +85,40 @@ async def show_unit_detail(query, unit, context):
     # Gabungkan text
     caption = "\n".join(text_lines)
     
-    # Kirim dengan gambar jika ada
-    if images and len(images) > 0:
-        primary_image = images[0]
-        
-        try:
-            await query.delete_message()
-            await query.message.reply_photo(
-                photo=primary_image,
-                caption=caption,
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
-        except:
-            # Fallback
-            try:
-                await query.edit_message_text(
-                    caption,
-                    reply_markup=reply_markup,
-                    parse_mode='Markdown'
-                )
-            except:
-                await query.delete_message()
-                await query.message.reply_text(
-                    caption,
-                    reply_markup=reply_markup,
-                    parse_mode='Markdown'
-                )
-    else:
-        try:
-            await query.edit_message_text(
-                caption,
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
-        except:
-            await query.delete_message()
-            await query.message.reply_text(
-                caption,
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
+    # Kirim dengan gambar jika ada (edit in-place kalau bisa)
+    primary_image = images[0] if images else None
+    await transition(query, caption, reply_markup, photo=primary_image)
 
 
 async def back_to_gedung(query, context):
     """Back to gedung detail - FIXED"""
     await query.answer()
     
-    gedung = context.user_data.get('current_gedung')
+    session = await sessions.get(query.from_user.id)
+    gedung_uuid = session.get('gedung')
     
-    if not gedung:
+    gedung = None
+    if gedung_uuid:
         try:
-            await query.edit_message_text(
-                "❌ Data tidak ditemukan.\n\n"
-                "Silakan lakukan pencarian baru."
-            )
-        except:
-            # Jika gagal edit (pesan adalah foto), kirim message baru
-            await query.message.reply_text(
-                "Sesi telah berakhir.\n"
-                "Silakan share lokasi Anda kembali untuk memulai pencarian.",
-            )
+            gedung = await load_gedung(gedung_uuid)
+        except Exception as e:
+            logger.error(f"Error rehydrate gedung {gedung_uuid}: {e}")
+    
+    if not gedung:
+        await transition(
+            query,
+            "Sesi telah berakhir.\n"
+            "Silakan share lokasi Anda kembali untuk memulai pencarian.",
+            parse_mode=None
+        )
         return
     
     # Import di dalam function untuk avoid circular import
     from flows.get_gedung import show_gedung_detail
     
     try:
-        # Delete message dengan gambar, lalu buat ulang
-        await query.delete_message()
-        
-        # Buat dummy query object untuk show_gedung_detail
-        # Karena show_gedung_detail perlu query object
-        class DummyQuery:
-            def __init__(self, message):
-                self.message = message
-                
-            async def answer(self):
-                pass
-                
-            async def edit_message_text(self, text, **kwargs):
-                await self.message.reply_text(text, **kwargs)
-                
-            async def edit_message_caption(self, caption, **kwargs):
-                await self.message.reply_text(caption, **kwargs)
-                
-            async def delete_message(self):
-                pass
-        
-        dummy_query = DummyQuery(query.message)
-        await show_gedung_detail(dummy_query, gedung, context)
+        # Kembali ke halaman unit terakhir yang dilihat
+        await show_gedung_detail(query, gedung, context, session.get('gedung_page', 0))
         
     except Exception as e:
         logger.error(f"Error back_to_gedung: {str(e)}", exc_info=True)
@@ -202,4 +127,3 @@ async def back_to_gedung(query, context):
             "❌ Terjadi kesalahan.\n\n"
             "Silakan coba lagi atau lakukan pencarian baru."
         )
-
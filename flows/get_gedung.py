@@ -1,256 +1,116 @@
 """Get building details"""
-import aiohttp
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from config import API_BASE_URL, API_KEY
-from utils.redis_manager import cache
+from utils.api_client import ApiError
+from utils.hotkeys import hotkeys
+from utils.loader import load_gedung, load_nearby
+from utils.prefetch import prefetcher
+from utils.session_store import sessions
+from utils.transitions import transition
+from utils.views import gedung_view, results_page, results_view, units_page
+# Import logger
+import logging
+logger = logging.getLogger(__name__)
 
 
 async def get_gedung_detail(query, uuid: str, context):
     """Get building detail by UUID"""
     await query.answer("📥 Memuat detail gedung...")
+    hotkeys.record('gedung', uuid)
 
-    cached_data = await cache.get_gedung(uuid)
-    if cached_data:
-        await show_gedung_detail(query, cached_data, context)
-        return
-    
     try:
-        async with aiohttp.ClientSession() as session:
-            url = f"{API_BASE_URL}/gedung/{uuid}"
-            headers = {
-                'accept': 'application/json',
-                'X-API-Key': API_KEY
-            }
-            
-            async with session.get(url, headers=headers) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    # save to cache redis
-                    await cache.save_gedung(uuid, data)
+        data = await load_gedung(uuid)
+        # Simpan uuid gedung aktif (detail di-rehydrate dari cache saat back_gedung)
+        await sessions.update(query.from_user.id, gedung=uuid, gedung_page=0)
 
-                    await show_gedung_detail(query, data, context)
-                else:
-                    await query.edit_message_text(
-                        f"❌ *Error {resp.status}*\n\nGagal memuat data gedung.",
-                        parse_mode='Markdown'
-                    )
+        await show_gedung_detail(query, data, context)
+
+    except ApiError as e:
+        await transition(query, f"❌ *Error {e.status}*\n\nGagal memuat data gedung.")
     
     except Exception as e:
-        await query.edit_message_text(
-            f"❌ *Error*\n\n`{str(e)}`",
-            parse_mode='Markdown'
-        )
+        await transition(query, f"❌ *Error*\n\n`{str(e)}`")
 
 
-async def show_gedung_detail(query, gedung, context, is_new_message=False):
+async def show_gedung_detail(query, gedung, context, page: int = 0):
     """Display building details with beautiful format"""
     
-    # Simpan gedung data
-    context.user_data['current_gedung'] = gedung
-    
-    nama = gedung['nama_gedung']
-    alamat = gedung['alamat']
-    lat = gedung['lat']
-    lon = gedung['long']
-    total_units = gedung['total_units']
-    units = gedung.get('units', [])
     primary_image = gedung.get('primary_image')
     
-    # Format text seperti WhatsApp tapi lebih rapi
-    text_lines = [
-        f"🏢 *{nama}*\n",
-        f"📍 *{total_units}* Unit",
-        f"📌 *{alamat}*",
-        f"[📍 Lihat di Maps](https://www.google.com/maps?q={lat},{lon})\n",
-        "━━━━━━━━━━━━━━━━",
-        "🏠 *DAFTAR UNIT*",
-        "━━━━━━━━━━━━━━━━\n"
-    ]
-    
-    # Keyboard untuk units
-    keyboard = []
-    
-    if units:
-        row = []  # Temporary row untuk menampung 3 button
-        
-        for idx, unit in enumerate(units, 1):
-            lantai = unit['lantai']
-            unit_num = unit['unit_number']
-            deskripsi = unit.get('deskripsi', 'N/A')
-            alasan = unit.get('alasan_blacklist', '')
-            
-            # Format unit info
-            text_lines.append(
-                f"{idx}. *Lt {lantai} ({unit_num})*\n"
-                f"   📝 {deskripsi}"
-            )
-            
-            if alasan:
-                text_lines.append(f"   🚫 {alasan}")
-            
-            text_lines.append("")  # Empty line
-            
-            # Button untuk unit
-            button_text = f"{idx}. Lt {lantai} ({unit_num})"
-            button = InlineKeyboardButton(
-                button_text,
-                callback_data=f"unit_{unit['uuid']}"
-            )
-            
-            row.append(button)
-            
-            # Jika row sudah 3 atau ini adalah unit terakhir, append ke keyboard
-            if len(row) == 3 or idx == len(units):
-                keyboard.append(row)
-                row = []  # Reset row untuk baris berikutnya
-        
-        text_lines.append("━━━━━━━━━━━━━━━━")
-    else:
-        text_lines.append("_Tidak ada unit tersedia_\n")
-        text_lines.append("━━━━━━━━━━━━━━━━")
+    # Caption + keyboard (memoized per versi data gedung)
+    caption, reply_markup = await gedung_view(gedung, page)
     
+    # Kirim dengan gambar jika ada (edit in-place kalau bisa)
+    await transition(
+        query,
+        caption,
+        reply_markup,
+        photo=primary_image,
+        disable_web_page_preview=False
+    )
     
-    # Navigation buttons
-    keyboard.append([
-        InlineKeyboardButton("« Back ke Awal", callback_data="back_results"),
-        InlineKeyboardButton("🔄 Pencarian Baru", callback_data="search_again")
-    ])
+    # Unit di halaman ini yang kemungkinan di-tap berikutnya
+    prefetcher.schedule(query.from_user.id, 'unit', [u['uuid'] for u in units_page(gedung, page)])
 
+
+async def gedung_page(query, page: int, context):
+    """Pindah halaman daftar unit gedung aktif"""
+    await query.answer()
     
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    session = await sessions.get(query.from_user.id)
+    uuid = session.get('gedung')
     
-    # Gabungkan text
-    caption = "\n".join(text_lines)
+    try:
+        gedung = await load_gedung(uuid) if uuid else None
+    except Exception as e:
+        logger.error(f"Error rehydrate gedung {uuid}: {e}")
+        gedung = None
+    
+    if not gedung:
+        await transition(
+            query,
+            "Sesi telah berakhir.\n"
+            "Silakan share lokasi Anda kembali untuk memulai pencarian.",
+            parse_mode=None
+        )
+        return
     
-    # Kirim dengan gambar jika ada
-    if primary_image:
-        try:
-            if is_new_message:
-                # Kirim sebagai message baru (dari back_to_gedung)
-                await query.message.reply_photo(
-                    photo=primary_image,
-                    caption=caption,
-                    reply_markup=reply_markup,
-                    parse_mode='Markdown'
-                )
-            else:
-                # Delete message lama dan kirim dengan photo (normal flow)
-                await query.delete_message()
-                await query.message.reply_photo(
-                    photo=primary_image,
-                    caption=caption,
-                    reply_markup=reply_markup,
-                    parse_mode='Markdown'
-                )
-        except Exception as e:
-            # Fallback ke text
-            if is_new_message:
-                await query.message.reply_text(
-                    caption,
-                    reply_markup=reply_markup,
-                    parse_mode='Markdown',
-                    disable_web_page_preview=False
-                )
-            else:
-                try:
-                    await query.edit_message_text(
-                        caption,
-                        reply_markup=reply_markup,
-                        parse_mode='Markdown',
-                        disable_web_page_preview=False
-                    )
-                except:
-                    await query.message.reply_text(
-                        caption,
-                        reply_markup=reply_markup,
-                        parse_mode='Markdown',
-                        disable_web_page_preview=False
-                    )
-    else:
-        if is_new_message:
-            await query.message.reply_text(
-                caption,
-                reply_markup=reply_markup,
-                parse_mode='Markdown',
-                disable_web_page_preview=False
-            )
-        else:
-            await query.edit_message_text(
-                caption,
-                reply_markup=reply_markup,
-                parse_mode='Markdown',
-                disable_web_page_preview=False
-            )
+    await sessions.update(query.from_user.id, gedung_page=page)
+    await show_gedung_detail(query, gedung, context, page)
 
 
-async def back_to_results(query, context):
-    """Back to search results"""
+async def back_to_results(query, context, page: int = None):
+    """Back to search results (page None = halaman terakhir yang dilihat)"""
     await query.answer()
     
-    results = context.user_data.get('search_results', [])
-    radius = context.user_data.get('search_radius', 0)
-    count = len(results)
+    session = await sessions.get(query.from_user.id)
+    search = session.get('search')
+    if page is None:
+        page = session.get('results_page', 0)
+    else:
+        await sessions.update(query.from_user.id, results_page=page)
     
-    if not results:
+    results = []
+    radius = 0
+    count = 0
+    if search:
         try:
-            await query.edit_message_text(
-                "❌ Data tidak ditemukan.\n\n"
-                "Silakan share lokasi untuk pencarian baru."
-            )
-        except:
-            # Jika gagal edit (misal message adalah foto), kirim message baru
-            await query.message.reply_text(
-                "❌ Data tidak ditemukan.\n\n"
-                "Silakan share lokasi kembali untuk pencarian baru."
-            )
-        return
-    
-    # Format text hasil
-    text_lines = [
-        f"🏢 Ditemukan *{count}* gedung dalam radius {radius}m\n"
-    ]
-    
-    # Buat button untuk setiap gedung
-    keyboard = []
+            data = await load_nearby(*search)
+            results = data.get('results', [])
+            radius = data.get('radius', 0)
+            count = data.get('count', len(results))
+        except Exception as e:
+            logger.error(f"Error rehydrate search results: {e}")
     
-    for idx, gedung in enumerate(results[:10], 1):
-        nama = gedung['nama_gedung']
-        alamat = gedung.get('alamat', 'N/A')
-        distance = gedung['distance']
-        total_units = gedung['total_units']
-        
-        text_lines.append(
-            f"{idx}. *{nama}*\n"
-            f"   📍 {alamat}\n"
-            f"   📏 Jarak: *{distance:.0f}m* | {total_units} unit"
+    if not results:
+        await transition(
+            query,
+            "❌ Data tidak ditemukan.\n\n"
+            "Silakan share lokasi kembali untuk pencarian baru.",
+            parse_mode=None
         )
-        
-        if idx < len(results[:10]):
-            text_lines.append("━━━━━━━━━━━━━━━━")
-        
-        button_text = f"{idx}. {nama} ({distance:.0f}m)"
-        keyboard.append([InlineKeyboardButton(
-            button_text,
-            callback_data=f"gedung_{gedung['uuid']}"
-        )])
-    
-    keyboard.append([InlineKeyboardButton("🔄 Pencarian Baru", callback_data="search_again")])
+        return
     
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    caption = "\n".join(text_lines)
+    # Render sama dengan show_nearby_results (memoized per result set)
+    caption, reply_markup = await results_view(results, radius, count, page)
     
-    try:
-        # Jika message adalah photo, delete dulu
-        await query.delete_message()
-        await query.message.reply_text(
-            caption,
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
-        )
-    except:
-        # Fallback
-        await query.edit_message_text(
-            caption,
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
-        )
+    await transition(query, caption, reply_markup)
+    prefetcher.schedule(query.from_user.id, 'gedung', [g['uuid'] for g in results_page(results, page)])
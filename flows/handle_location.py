@@ -1,9 +1,15 @@
 """Handle location sharing and nearby search"""
-import aiohttp
+from typing import Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 # config
-from config import API_BASE_URL, API_KEY, RADIUS_OPTIONS
+from config import RADIUS_OPTIONS
+from utils.api_client import ApiError
+from utils.loader import load_nearby, load_nearby_auto
+from utils.prefetch import prefetcher
+from utils.session_store import sessions
+from utils.transitions import transition
+from utils.views import results_page, results_view
 # Import logger
 import logging
 logger = logging.getLogger(__name__)
@@ -25,9 +31,9 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     
-    # Simpan location di context
-    context.user_data['lat'] = location.latitude
-    context.user_data['long'] = location.longitude
+    # Simpan location di session
+    await sessions.update(update.effective_user.id, lat=location.latitude, long=location.longitude)
+    prefetcher.cancel(update.effective_user.id)
     
     # Tampilkan pilihan radius dengan layout yang lebih baik
     keyboard = []
@@ -50,6 +56,11 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
         InlineKeyboardButton("📏 1000m", callback_data='radius_1000'),
     ])
     
+    # Radius terkecil yang ada hasilnya, dalam satu round-trip
+    keyboard.append([
+        InlineKeyboardButton("🎯 Otomatis (terdekat)", callback_data='radius_auto'),
+    ])
+    
     reply_markup = InlineKeyboardMarkup(keyboard)
     
     # Kirim pesan dengan format yang lebih menarik
@@ -64,50 +75,37 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-async def search_nearby(update: Update, context: ContextTypes.DEFAULT_TYPE, radius: int):
-    """Search nearby buildings"""
+async def search_nearby(update: Update, context: ContextTypes.DEFAULT_TYPE, radius: Optional[int]):
+    """Search nearby buildings (radius None = otomatis)"""
     query = update.callback_query
     await query.answer("🔍 Mencari gedung terdekat...")
     
-    lat = context.user_data.get('lat')
-    long = context.user_data.get('long')
+    session = await sessions.get(query.from_user.id)
+    lat = session.get('lat')
+    long = session.get('long')
     
     if not lat or not long:
         await query.edit_message_text("❌ Lokasi tidak ditemukan. Silakan share lokasi lagi.")
         return
     
-    # Call API
     try:
-        async with aiohttp.ClientSession() as session:
-            url = f"{API_BASE_URL}/gedung/nearby"
-            headers = {
-                'accept': 'application/json',
-                'X-API-Key': API_KEY,
-                'Content-Type': 'application/json'
-            }
-            payload = {
-                'lat': lat,
-                'long': long,
-                'radius': radius
-            }
-            
-            async with session.post(url, json=payload, headers=headers) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    await show_nearby_results(query, data, context)
-                else:
-                    error_text = await resp.text()
+        if radius is None:
+            data = await load_nearby_auto(lat, long, RADIUS_OPTIONS)
+        else:
+            data = await load_nearby(lat, long, radius)
+        if data.get('success') and data.get('count'):
+            # Cukup parameter pencarian - hasil di-rehydrate dari cache saat back_results
+            await sessions.update(query.from_user.id, search=[lat, long, data.get('radius', radius)], results_page=0)
 
-                    # Log detail error
-                    logger.error(f"API Error {resp.status} - {url}")
-                    logger.error(f"Response: {error_text}")
+        await show_nearby_results(query, data, context)
+
+    except ApiError as e:
+        # Pesan umum ke user
+        await query.edit_message_text(
+            f"❌ Pencarian gagal. Silakan coba lagi.\n"
+            f"(Kode error: {e.status})"
+        )
 
-                    # Pesan umum ke user
-                    await query.edit_message_text(
-                        f"❌ Pencarian gagal. Silakan coba lagi.\n"
-                        f"(Kode error: {resp.status})"
-                    )
-    
     except Exception as e:
         logger.error(f"Exception in search_nearby: {str(e)}", exc_info=True)
 
@@ -116,7 +114,7 @@ async def search_nearby(update: Update, context: ContextTypes.DEFAULT_TYPE, radi
     )
 
 
-async def show_nearby_results(query, data, context):
+async def show_nearby_results(query, data, context, page: int = 0):
     """Display nearby buildings results with beautiful format"""
     
     if not data.get('success'):
@@ -142,81 +140,36 @@ async def show_nearby_results(query, data, context):
         )
         return
     
-    # Simpan results di context
-    context.user_data['search_results'] = results
-    context.user_data['search_radius'] = radius
-    
-    # Format text hasil (seperti WhatsApp tapi lebih rapi)
-    text_lines = [
-        f"🏢 Ditemukan *{count}* gedung dalam radius {radius}m\n"
-    ]
-    
-    # Buat button untuk setiap gedung
-    keyboard = []
-    
-    for idx, gedung in enumerate(results[:10], 1):
-        nama = gedung['nama_gedung']
-        alamat = gedung.get('alamat', 'N/A')
-        distance = gedung['distance']
-        total_units = gedung['total_units']
-        
-        # Format text list
-        text_lines.append(
-            f"{idx}. *{nama}*\n"
-            f"   📍 {alamat}\n"
-            f"   📏 Jarak: *{distance:.0f}m* | {total_units} unit"
-        )
-        
-        # Tambahkan separator kecuali item terakhir
-        if idx < len(results[:10]):
-            text_lines.append("━━━━━━━━━━━━━━━━")
-        
-        # Button untuk gedung
-        button_text = f"{idx}. {nama} ({distance:.0f}m)"
-        keyboard.append([InlineKeyboardButton(
-            button_text,
-            callback_data=f"gedung_{gedung['uuid']}"
-        )])
-    
-    # Navigation buttons
-    keyboard.append([InlineKeyboardButton("🔄 Pencarian Baru", callback_data="search_again")])
-    
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    # Gabungkan text
-    caption = "\n".join(text_lines)
+    # Caption + keyboard (memoized per result set, dipakai juga oleh back_to_results)
+    caption, reply_markup = await results_view(results, radius, count, page)
     
     await query.edit_message_text(
         caption,
         reply_markup=reply_markup,
         parse_mode='Markdown'
     )
+    
+    # Gedung teratas kemungkinan besar di-tap berikutnya
+    prefetcher.schedule(query.from_user.id, 'gedung', [g['uuid'] for g in results_page(results, page)])
 
 
 async def handle_search_again(query, context):
     """Handle search again button"""
     await query.answer()
+    prefetcher.cancel(query.from_user.id)
 
-    lat = context.user_data.get('lat')
-    long = context.user_data.get('long')
+    session = await sessions.get(query.from_user.id)
+    lat = session.get('lat')
+    long = session.get('long')
     
     if not lat or not long:
         # Jika tidak ada data lokasi setelah restart
-        try:
-            await query.edit_message_text(
-                "📍 *Data lokasi tidak ditemukan*\n\n"
-                "Sesi telah berakhir.\n"
-                "Silakan share lokasi Anda kembali untuk memulai pencarian.",
-                parse_mode='Markdown'
-            )
-        except:
-            # Jika gagal edit (pesan adalah foto), kirim message baru
-            await query.message.reply_text(
-                "📍 *Data lokasi tidak ditemukan*\n\n"
-                "Sesi telah berakhir.\n"
-                "Silakan share lokasi Anda kembali untuk memulai pencarian.",
-                parse_mode='Markdown'
-            )
+        await transition(
+            query,
+            "📍 *Data lokasi tidak ditemukan*\n\n"
+            "Sesi telah berakhir.\n"
+            "Silakan share lokasi Anda kembali untuk memulai pencarian."
+        )
         return
     
     keyboard = []
@@ -234,11 +187,17 @@ async def handle_search_again(query, context):
         InlineKeyboardButton("📏 1000m", callback_data='radius_1000'),
     ])
     
+    # Radius terkecil yang ada hasilnya, dalam satu round-trip
+    keyboard.append([
+        InlineKeyboardButton("🎯 Otomatis (terdekat)", callback_data='radius_auto'),
+    ])
+    
     reply_markup = InlineKeyboardMarkup(keyboard)
     
-    await query.edit_message_text(
+    # Pesan sebelumnya bisa foto (detail gedung/unit)
+    await transition(
+        query,
         f"🔍 *Pencarian Baru*\n\n"
         f"Pilih radius pencarian:",
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+        reply_markup
     )
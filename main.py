@@ -12,12 +12,28 @@ from telegram.ext import (
     ContextTypes
 )
 
-from config import TELEGRAM_TOKEN
+from config import (TELEGRAM_TOKEN, TELEGRAM_BASE_URL, BOT_MODE, WEBHOOK_URL, WEBHOOK_PATH,
+                    WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_SECRET, WEBHOOK_WORKERS, CONCURRENT_UPDATES,
+                    TG_GLOBAL_RATE, TG_CHAT_RATE, TG_CHAT_BURST, TG_MAX_RETRIES)
 from utils.redis_manager import RedisLifecycle
+from utils.api_client import ApiLifecycle
+from utils.spatial_index import SpatialIndexLifecycle
+from utils.loader import LoaderLifecycle
+from utils.session_store import SessionLifecycle
+from utils.prefetch import PrefetchLifecycle
+from utils.invalidation import InvalidationLifecycle
+from utils.snapshot import SnapshotLifecycle
+from utils.hotkeys import HotKeysLifecycle
+from utils.warmup import WarmupLifecycle
+from utils.metrics import MetricsLifecycle, route_name, track_route
+from utils.tracing import TracingLifecycle, tracer
+from utils.update_processor import PerChatUpdateProcessor
+from utils.rate_limiter import PriorityRateLimiter
+from utils.views import RESULTS_PAGE_PREFIX, GEDUNG_PAGE_PREFIX
 
 # Import Apps
 from flows.handle_location import (handle_location, search_nearby, handle_search_again)
-from flows.get_gedung import (get_gedung_detail, back_to_results)
+from flows.get_gedung import (get_gedung_detail, gedung_page, back_to_results)
 from flows.get_detail_unit import (get_unit_detail, back_to_gedung)
 
 # Setup logging
@@ -63,16 +79,29 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def callback_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Route all callback queries"""
+    """Route all callback queries (latency per route dicatat ke metrics)"""
     query = update.callback_query
-    data = query.data
+    logger.info(f"Callback: {query.data} from user {query.from_user.id}")
     
-    logger.info(f"Callback: {data} from user {query.from_user.id}")
+    route = route_name(query.data)
+    with track_route(route), tracer.span(f"route.{route}"):
+        await _route_callback(update, context, query, query.data)
+
+
+async def _route_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, query, data: str):
+    # Pagination (dicek dulu - prefix tidak bentrok dengan gedung_/unit_)
+    if data.startswith(RESULTS_PAGE_PREFIX):
+        page = int(data.replace(RESULTS_PAGE_PREFIX, ''))
+        await back_to_results(query, context, page)
+    
+    elif data.startswith(GEDUNG_PAGE_PREFIX):
+        page = int(data.replace(GEDUNG_PAGE_PREFIX, ''))
+        await gedung_page(query, page, context)
     
     # Radius selection
-    if data.startswith('radius_'):
-        radius = int(data.replace('radius_', ''))
-        await search_nearby(update, context, radius)
+    elif data.startswith('radius_'):
+        radius = data.replace('radius_', '')
+        await search_nearby(update, context, None if radius == 'auto' else int(radius))
     
     # Gedung selection
     elif data.startswith('gedung_'):
@@ -102,6 +131,71 @@ async def callback_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.warning(f"Unknown callback data: {data}")
 
 
+async def post_init(app: Application):
+    """Lifecycle: setup metrics + tracing + Redis + API client + spatial index + loader + session + prefetch + invalidasi"""
+    await MetricsLifecycle.post_init(app)
+    await TracingLifecycle.post_init(app)
+    await RedisLifecycle.post_init(app)
+    await ApiLifecycle.post_init(app)
+    await SpatialIndexLifecycle.post_init(app)
+    await SnapshotLifecycle.post_init(app)
+    await LoaderLifecycle.post_init(app)
+    await SessionLifecycle.post_init(app)
+    await PrefetchLifecycle.post_init(app)
+    await HotKeysLifecycle.post_init(app)
+    await WarmupLifecycle.post_init(app)
+    await InvalidationLifecycle.post_init(app)
+
+
+async def post_shutdown(app: Application):
+    """Lifecycle: cleanup invalidasi + prefetch + session + spatial index + API client + Redis"""
+    await InvalidationLifecycle.post_shutdown(app)
+    await PrefetchLifecycle.post_shutdown(app)
+    await SessionLifecycle.post_shutdown(app)
+    await WarmupLifecycle.post_shutdown(app)
+    await HotKeysLifecycle.post_shutdown(app)
+    await SnapshotLifecycle.post_shutdown(app)
+    await SpatialIndexLifecycle.post_shutdown(app)
+    await ApiLifecycle.post_shutdown(app)
+    await RedisLifecycle.post_shutdown(app)
+    await TracingLifecycle.post_shutdown(app)
+    await MetricsLifecycle.post_shutdown(app)
+
+
+def build_application() -> Application:
+    """Buat Application + lifecycle hooks + handlers (dipakai juga oleh worker webhook)"""
+    builder = Application.builder().token(TELEGRAM_TOKEN)
+    if TELEGRAM_BASE_URL:
+        builder = builder.base_url(f"{TELEGRAM_BASE_URL}/bot").base_file_url(f"{TELEGRAM_BASE_URL}/file/bot")
+    
+    app = (
+        builder
+        # Update concurrent, tapi per chat tetap berurutan
+        .concurrent_updates(PerChatUpdateProcessor(CONCURRENT_UPDATES))
+        # Limit outbound global + per chat, answerCallbackQuery didahulukan
+        # Cluster webhook: limiter per proses - rate global dibagi rata antar worker
+        .rate_limiter(PriorityRateLimiter(
+            global_rate=TG_GLOBAL_RATE / (max(1, WEBHOOK_WORKERS) if BOT_MODE == 'webhook' else 1),
+            chat_rate=TG_CHAT_RATE,
+            chat_burst=TG_CHAT_BURST,
+            max_retries=TG_MAX_RETRIES
+        ))
+        .build()
+    )
+
+    # Lifecycle hooks Redis + API client
+    app.post_init = post_init
+    app.post_shutdown = post_shutdown
+    
+    # Handlers
+    app.add_handler(CommandHandler('start', start))
+    app.add_handler(CommandHandler('help', help_command))
+    app.add_handler(MessageHandler(filters.LOCATION, handle_location))
+    app.add_handler(CallbackQueryHandler(callback_router))
+    
+    return app
+
+
 def main():
     """Main function"""
     
@@ -111,24 +205,31 @@ def main():
     
     logger.info("🚀 Starting DKKM Bot...")
     
-    # Create application
-    app = Application.builder().token(TELEGRAM_TOKEN).build()
-
-    # Lifecycle hooks Redis
-    app.post_init = RedisLifecycle.post_init
-    app.post_shutdown = RedisLifecycle.post_shutdown
+    if BOT_MODE == 'webhook' and WEBHOOK_WORKERS > 1:
+        # Front HTTP + beberapa proses worker, update di-route per user id
+        from utils.webhook_cluster import run_cluster
+        logger.info(f"✅ DKKM Bot is running! (webhook, {WEBHOOK_WORKERS} workers)")
+        run_cluster(build_application)
+        return
     
-    # Handlers
-    app.add_handler(CommandHandler('start', start))
-    app.add_handler(CommandHandler('help', help_command))
-    app.add_handler(MessageHandler(filters.LOCATION, handle_location))
-    app.add_handler(CallbackQueryHandler(callback_router))
+    # Create application
+    app = build_application()
     
     logger.info("✅ DKKM Bot is running!")
     logger.info("   Send /start to begin")
     
     # Run bot
-    app.run_polling(allowed_updates=Update.ALL_TYPES)
+    if BOT_MODE == 'webhook':
+        app.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=f"{WEBHOOK_URL}/{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES
+        )
+    else:
+        app.run_polling(allowed_updates=Update.ALL_TYPES)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,271 @@
+# utils/api_client.py
+import aiohttp
+import asyncio
+import logging
+import time
+from typing import Optional
+from telegram.ext import Application
+
+from utils.metrics import UPSTREAM_LATENCY, UPSTREAM_RESPONSES, UPSTREAM_RETRIES, UPSTREAM_HEDGES
+from utils.resilience import CircuitBreaker, backoff, hedged
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class ApiError(Exception):
+    """Response non-200 dari API DKKM"""
+
+    def __init__(self, status: int, text: str = ''):
+        super().__init__(f"API Error {status}")
+        self.status = status
+        self.text = text
+
+
+class CircuitOpenError(ApiError):
+    """Backend sedang dianggap down - request ditolak tanpa network"""
+
+    def __init__(self, endpoint: str):
+        super().__init__(503, f"circuit open ({endpoint})")
+
+
+# Status yang layak di-retry (backend sementara tidak sehat); 4xx lain = response valid
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+
+class ApiClient:
+    """Client API DKKM - satu session + connection pool untuk semua flow"""
+
+    def __init__(self, base_url: str = None, api_key: str = None,
+                 pool_size: int = 20, dns_ttl: int = 300, keepalive: int = 30,
+                 nearby_timeout: float = 10, detail_timeout: float = 5,
+                 bulk_timeout: float = 60, retries: int = 2, retry_base: float = 0.1,
+                 retry_cap: float = 1.0, hedge_delay: float = 0, breaker: CircuitBreaker = None):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.dns_ttl = dns_ttl
+        self.keepalive = keepalive
+        self.nearby_timeout = nearby_timeout
+        self.detail_timeout = detail_timeout
+        self.bulk_timeout = bulk_timeout
+        self.retries = retries
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.hedge_delay = hedge_delay
+        self.breaker = breaker or CircuitBreaker('dkkm')
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def open(self):
+        """Buka session - keep-alive pool + DNS cache"""
+        if self._session and not self._session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            ttl_dns_cache=self.dns_ttl,
+            keepalive_timeout=self.keepalive,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers={
+                'accept': 'application/json',
+                'X-API-Key': self.api_key or '',
+            },
+        )
+        logger.info(f"🌐 API client ready (pool={self.pool_size}, dns_ttl={self.dns_ttl}s)")
+
+    async def close(self):
+        """Tutup session + semua koneksi di pool"""
+        if self._session:
+            try:
+                await self._session.close()
+                logger.info("🔌 API client closed")
+            except Exception as e:
+                logger.error(f"Error closing API client: {e}")
+            self._session = None
+
+    async def _attempt(self, method: str, url: str, path: str, timeout: float, endpoint: str, **kwargs) -> dict:
+        """Satu request HTTP - timeout/koneksi gagal juga jadi ApiError (504/502)"""
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+        status = 'error'
+        start = time.perf_counter()
+
+        with tracer.span(f"api.{endpoint}", method=method, path=path) as span:
+            try:
+                async with self._session.request(method, url, timeout=client_timeout, **kwargs) as resp:
+                    status = str(resp.status)
+                    if resp.status == 200:
+                        return await resp.json()
+
+                    error_text = await resp.text()
+                    logger.error(f"API Error {resp.status} - {url}")
+                    logger.error(f"Response: {error_text}")
+                    raise ApiError(resp.status, error_text)
+            except asyncio.CancelledError:
+                status = 'cancelled'  # kalah hedge / handler di-cancel
+                raise
+            except asyncio.TimeoutError:
+                logger.error(f"API timeout ({timeout:.1f}s) - {url}")
+                if status != 'error':
+                    status = '504'  # status sudah diterima, body timeout - catat yang di-raise
+                raise ApiError(504, 'timeout')
+            except (aiohttp.ClientError, ValueError) as e:
+                # ValueError / ContentTypeError: response 200 tapi body bukan JSON
+                logger.error(f"API connection error - {url}: {e}")
+                if status != 'error':
+                    status = '502'
+                raise ApiError(502, str(e))
+            finally:
+                UPSTREAM_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+                UPSTREAM_RESPONSES.labels(endpoint, status).inc()
+                if span:
+                    span.set(status=status)
+
+    async def _request(self, method: str, path: str, timeout: float, endpoint: str,
+                       hedge: bool = False, **kwargs) -> dict:
+        """
+        Kirim request, return JSON - raise ApiError kalau gagal.
+        timeout = deadline total (termasuk retry). GET di-retry dengan jitter,
+        circuit breaker open -> CircuitOpenError tanpa network.
+        """
+        # Fallback kalau dipanggil sebelum post_init (misal dari script)
+        if not self._session or self._session.closed:
+            await self.open()
+
+        if not self.breaker.allow():
+            raise CircuitOpenError(endpoint)
+
+        url = f"{self.base_url}{path}"
+        attempts = self.retries + 1 if method == 'GET' else 1
+        deadline = time.monotonic() + timeout
+
+        for attempt in range(attempts):
+            # Sisa deadline dibagi rata ke attempt yang tersisa
+            attempt_timeout = (deadline - time.monotonic()) / (attempts - attempt)
+
+            def _call():
+                return self._attempt(method, url, path, attempt_timeout, endpoint, **kwargs)
+
+            try:
+                if hedge and self.hedge_delay:
+                    data = await hedged(_call, self.hedge_delay, UPSTREAM_HEDGES.labels(endpoint).inc)
+                else:
+                    data = await _call()
+                self.breaker.success()
+                return data
+            except ApiError as e:
+                if e.status < 500 and e.status not in RETRYABLE_STATUS:
+                    # 4xx = backend sehat, response memang error
+                    self.breaker.success()
+                    raise
+                self.breaker.failure()
+
+                delay = backoff(attempt, self.retry_base, self.retry_cap)
+                last = (attempt == attempts - 1 or e.status not in RETRYABLE_STATUS
+                        or self.breaker.state != 'closed'
+                        or time.monotonic() + delay >= deadline)
+                if last:
+                    raise
+
+                UPSTREAM_RETRIES.labels(endpoint).inc()
+                logger.warning(f"🔁 Retry {endpoint} ({e.status}) dalam {delay * 1000:.0f}ms")
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # Handler di-cancel - jangan tahan slot probe half-open
+                self.breaker.abort()
+                raise
+            except Exception:
+                self.breaker.failure()
+                raise
+
+    @property
+    def available(self) -> bool:
+        """False kalau circuit breaker open (request akan ditolak)"""
+        return not self.breaker.is_open
+
+    # === ENDPOINTS ===
+
+    async def nearby(self, lat: float, long: float, radius: int) -> dict:
+        """POST /gedung/nearby"""
+        payload = {
+            'lat': lat,
+            'long': long,
+            'radius': radius
+        }
+        return await self._request('POST', '/gedung/nearby', self.nearby_timeout, 'nearby',
+                                   json=payload)
+
+    async def get_gedung(self, uuid: str) -> dict:
+        """GET /gedung/{uuid}"""
+        return await self._request('GET', f'/gedung/{uuid}', self.detail_timeout, 'gedung', hedge=True)
+
+    async def get_unit(self, uuid: str) -> dict:
+        """GET /unit/{uuid}"""
+        return await self._request('GET', f'/unit/{uuid}', self.detail_timeout, 'unit', hedge=True)
+
+    async def _list_pages(self, path: str, endpoint: str, params: dict = None) -> list:
+        """GET list - ikuti pagination kalau ada"""
+        results = []
+        page = 1
+        while True:
+            data = await self._request('GET', path, self.bulk_timeout, endpoint,
+                                       params={**(params or {}), 'page': page})
+            if isinstance(data, list):
+                return results + data
+
+            results.extend(data.get('results', []))
+            if not data.get('next'):
+                return results
+            page += 1
+
+    async def list_gedung(self) -> list:
+        """GET /gedung - semua gedung (ikuti pagination kalau ada)"""
+        return await self._list_pages('/gedung', 'gedung_list')
+
+    async def list_changes(self, kind: str, since: str = None) -> list:
+        """GET /gedung atau /unit dengan detail=1 (+ updated_since) - untuk sync snapshot"""
+        params = {'detail': 1}
+        if since:
+            params['updated_since'] = since
+        return await self._list_pages(f'/{kind}', f'{kind}_list', params)
+
+
+# Global API client instance
+api = ApiClient()
+
+
+# === LIFECYCLE MANAGER ===
+
+class ApiLifecycle:
+    """Lifecycle manager untuk API client - dipakai di main.py"""
+
+    @staticmethod
+    async def post_init(app: Application):
+        """Dipanggil setelah bot initialize - buka connection pool"""
+        from config import (API_BASE_URL, API_KEY, API_POOL_SIZE, API_DNS_TTL,
+                            API_KEEPALIVE, API_TIMEOUT_NEARBY, API_TIMEOUT_DETAIL,
+                            API_TIMEOUT_BULK, API_RETRIES, API_RETRY_BASE, API_RETRY_CAP,
+                            API_HEDGE_DELAY, API_BREAKER_THRESHOLD, API_BREAKER_TIMEOUT)
+
+        api.base_url = API_BASE_URL
+        api.api_key = API_KEY
+        api.pool_size = API_POOL_SIZE
+        api.dns_ttl = API_DNS_TTL
+        api.keepalive = API_KEEPALIVE
+        api.nearby_timeout = API_TIMEOUT_NEARBY
+        api.detail_timeout = API_TIMEOUT_DETAIL
+        api.bulk_timeout = API_TIMEOUT_BULK
+        api.retries = API_RETRIES
+        api.retry_base = API_RETRY_BASE
+        api.retry_cap = API_RETRY_CAP
+        api.hedge_delay = API_HEDGE_DELAY
+        api.breaker.failure_threshold = API_BREAKER_THRESHOLD
+        api.breaker.open_timeout = API_BREAKER_TIMEOUT
+
+        await api.open()
+
+    @staticmethod
+    async def post_shutdown(app: Application):
+        """Dipanggil sebelum bot shutdown - tutup connection pool"""
+        await api.close()
@@ -0,0 +1,129 @@
+# utils/codec.py
+"""
+Codec value cache Redis: json / orjson / msgpack + kompresi zlib / zstd di atas threshold.
+
+Format:
+- JSON polos (entry lama, atau json tanpa kompresi) -> dibaca apa adanya
+- b'\\x01' + flag + payload -> versi 1, flag = codec id | kompresi
+"""
+import json
+import logging
+import zlib
+from typing import Tuple
+
+try:
+    import orjson
+except ImportError:  # opsional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # opsional
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # opsional
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+VERSION = 0x01
+
+CODEC_JSON = 0x01
+CODEC_MSGPACK = 0x02
+
+COMPRESS_ZLIB = 0x10
+COMPRESS_ZSTD = 0x20
+
+
+def _json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode()
+
+
+def _json_loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class Codec:
+    """Encode/decode value cache dengan header versi"""
+
+    def __init__(self, name: str = 'json', compression: str = 'zlib', min_size: int = 1024, level: int = 3):
+        self.name = name
+        self.compression = compression
+        self.min_size = min_size
+        self.level = level
+        self._check()
+
+    def _check(self):
+        """Turunkan ke opsi yang tersedia kalau library opsional tidak terinstall"""
+        if self.name == 'orjson':
+            # orjson tetap format JSON - bedanya hanya kecepatan
+            self.name = 'json'
+        if self.name == 'msgpack' and msgpack is None:
+            logger.warning("⚠️ msgpack not installed - cache codec fallback ke json")
+            self.name = 'json'
+        if self.compression == 'zstd' and zstandard is None:
+            logger.warning("⚠️ zstandard not installed - cache compression fallback ke zlib")
+            self.compression = 'zlib'
+
+    def configure(self, name: str, compression: str, min_size: int):
+        self.name = name
+        self.compression = compression
+        self.min_size = min_size
+        self._check()
+
+    def encode(self, obj) -> Tuple[bytes, int]:
+        """obj -> (bytes untuk Redis, ukuran sebelum kompresi)"""
+        if self.name == 'msgpack':
+            flag = CODEC_MSGPACK
+            payload = msgpack.packb(obj, use_bin_type=True)
+        else:
+            flag = CODEC_JSON
+            payload = _json_dumps(obj)
+
+        size = len(payload)
+        if size >= self.min_size:
+            if self.compression == 'zstd':
+                flag |= COMPRESS_ZSTD
+                payload = zstandard.ZstdCompressor(level=self.level).compress(payload)
+            elif self.compression == 'zlib':
+                flag |= COMPRESS_ZLIB
+                payload = zlib.compress(payload, self.level)
+
+        # JSON tanpa kompresi ditulis polos - tetap terbaca oleh versi lama
+        if flag == CODEC_JSON:
+            return payload, size
+        return bytes((VERSION, flag)) + payload, size
+
+    def decode(self, raw) -> Tuple[object, int]:
+        """bytes dari Redis -> (obj, ukuran sebelum kompresi)"""
+        if isinstance(raw, str):
+            raw = raw.encode()
+
+        # Entry lama / JSON polos
+        if not raw or raw[0] != VERSION:
+            return _json_loads(raw), len(raw)
+
+        flag = raw[1]
+        payload = raw[2:]
+        if flag & COMPRESS_ZSTD:
+            if zstandard is None:
+                raise ValueError("zstd entry but zstandard not installed")
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        elif flag & COMPRESS_ZLIB:
+            payload = zlib.decompress(payload)
+
+        if flag & 0x0F == CODEC_MSGPACK:
+            if msgpack is None:
+                raise ValueError("msgpack entry but msgpack not installed")
+            return msgpack.unpackb(payload, raw=False), len(payload)
+        return _json_loads(payload), len(payload)
+
+
+# Global codec instance
+codec = Codec()
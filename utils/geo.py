@@ -0,0 +1,55 @@
+# utils/geo.py
+"""Helper geo: jarak haversine + geohash untuk key cache lokasi"""
+import math
+
+EARTH_RADIUS_M = 6371000.0
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Jarak dua titik dalam meter"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def geohash(lat: float, lon: float, precision: int = 7) -> str:
+    """Encode koordinat ke geohash (precision 7 ≈ 153m x 153m)"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bit = 0
+    ch = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if lon >= mid:
+                ch = (ch << 1) | 1
+                lon_range[0] = mid
+            else:
+                ch = ch << 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_range[0] = mid
+            else:
+                ch = ch << 1
+                lat_range[1] = mid
+
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_BASE32[ch])
+            bit = 0
+            ch = 0
+
+    return ''.join(chars)
@@ -0,0 +1,234 @@
+# utils/hotkeys.py
+"""
+Frekuensi akses detail gedung/unit (tap user, bukan prefetch) - dasar warm-up dan TTL adaptif.
+Dihitung lokal lalu di-flush berkala ke ZSET Redis hot:{kind} (lintas proses + restart).
+
+- skor meluruh (half-life), key yang skornya habis keluar dari ranking
+- TTL adaptif: top-K global (hot) disimpan lebih lama, key yang belum pernah di-tap (cold,
+  mis. hasil prefetch) lebih cepat keluar dari Redis
+- hot key di-refresh proaktif sebelum soft TTL habis (satu proses per interval, lewat lock Redis)
+- top-K dilaporkan ke metrics (dkkm_hot_key_score)
+"""
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Dict, List
+from telegram.ext import Application
+
+from utils.metrics import CACHE_TTL_TIER, HOT_KEY_SCORE, HOT_REFRESHES
+from utils.redis_manager import cache
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('gedung', 'unit')
+
+
+class AccessTracker:
+    """Counter lokal per kind, flush ke Redis dalam satu pipeline"""
+
+    def __init__(self, flush_interval: float = 10, max_keys: int = 10000, half_life: float = 86400,
+                 min_score: float = 0.5, top_k: int = 200, hot_ttl_factor: float = 4.0,
+                 cold_ttl_factor: float = 0.5, refresh_interval: float = 60, report_top: int = 10,
+                 refresh_concurrency: int = 4):
+        self.flush_interval = flush_interval
+        self.max_keys = max_keys
+        self.half_life = half_life
+        self.min_score = min_score
+        self.top_k = top_k
+        self.hot_ttl_factor = hot_ttl_factor
+        self.cold_ttl_factor = cold_ttl_factor
+        self.refresh_interval = refresh_interval
+        self.report_top = report_top
+        self.refresh_concurrency = refresh_concurrency
+        self._pending: Dict[str, Counter] = {kind: Counter() for kind in KINDS}
+        self._local: Dict[str, Counter] = {kind: Counter() for kind in KINDS}
+        self._hot: Dict[str, Dict[str, float]] = {kind: {} for kind in KINDS}  # top-K global, urut skor
+        self._decayed_at = time.monotonic()
+        self._tasks: List[asyncio.Task] = []
+
+    def record(self, kind: str, uuid: str):
+        self._pending[kind][uuid] += 1
+        self._local[kind][uuid] += 1
+
+    def top_local(self, kind: str, n: int) -> List[str]:
+        """Ranking proses ini saja (cadangan kalau Redis kosong / down)"""
+        return [uuid for uuid, _ in self._local[kind].most_common(n)]
+
+    def top(self, kind: str, n: int) -> List[tuple]:
+        """[(uuid, skor)] top-K global terakhir yang ditarik dari Redis"""
+        return list(self._hot[kind].items())[:n]
+
+    # === TTL ADAPTIF ===
+
+    def tier(self, kind: str, uuid: str) -> str:
+        if uuid in self._hot[kind]:
+            return 'hot'
+        if uuid in self._local[kind]:
+            return 'warm'
+        return 'cold'
+
+    def ttl_for(self, kind: str, uuid: str, base: int) -> int:
+        """Hard TTL detail sesuai popularitas (base = CACHE_TTL)"""
+        tier = self.tier(kind, uuid)
+        CACHE_TTL_TIER.labels(kind, tier).inc()
+        if tier == 'hot':
+            return int(base * self.hot_ttl_factor)
+        if tier == 'cold':
+            return max(1, int(base * self.cold_ttl_factor))
+        return base
+
+    # === FLUSH + DECAY ===
+
+    async def flush(self):
+        for kind, pending in self._pending.items():
+            if not pending or not cache.connected:
+                continue
+            counts = dict(pending)
+            pending.clear()
+            if not await cache.record_access(kind, counts, self.max_keys):
+                # Coba lagi di flush berikutnya
+                pending.update(counts)
+
+        # Ranking lokal dibatasi supaya memory tidak tumbuh tanpa batas
+        for counter in self._local.values():
+            if len(counter) > self.max_keys * 2:
+                kept = counter.most_common(self.max_keys)
+                counter.clear()
+                counter.update(dict(kept))
+
+    def _decay_local(self):
+        """Skor lokal ikut meluruh - key yang tidak di-tap lagi kembali jadi cold"""
+        now = time.monotonic()
+        factor = 0.5 ** ((now - self._decayed_at) / self.half_life)
+        self._decayed_at = now
+        for kind, counter in self._local.items():
+            self._local[kind] = Counter({uuid: score * factor for uuid, score in counter.items()
+                                         if score * factor >= self.min_score})
+
+    async def load_hot(self):
+        """Tarik top-K global (tier hot) + update metrics top-K"""
+        for kind in KINDS:
+            rows = await cache.top_accessed(kind, self.top_k, with_scores=True)
+            if rows or cache.connected:
+                # Redis down - tier hot terakhir tetap dipakai
+                self._hot[kind] = dict(rows)
+
+        HOT_KEY_SCORE.clear()
+        for kind in KINDS:
+            for uuid, score in self.top(kind, self.report_top):
+                HOT_KEY_SCORE.labels(kind, uuid).set(score)
+
+    # === REFRESH PROAKTIF ===
+
+    async def refresh_hot(self):
+        """Hot key yang tidak ada di cache / hampir stale di-fetch ulang dari API"""
+        from utils.api_client import api
+        from utils.loader import refresh
+        from utils.snapshot import snapshot
+
+        # Snapshot dataset aktif - detail tidak dibaca dari cache
+        if snapshot.is_fresh():
+            return
+
+        semaphore = asyncio.Semaphore(self.refresh_concurrency)
+        # Dua interval - sweep berikutnya bisa jatuh ke proses lain yang tick-nya lebih lambat
+        ahead = self.refresh_interval * 2
+
+        async def _one(kind: str, uuid: str):
+            async with semaphore:
+                if not api.available:
+                    return
+                try:
+                    await refresh(kind, uuid)
+                    HOT_REFRESHES.labels(kind, 'ok').inc()
+                except Exception as e:
+                    HOT_REFRESHES.labels(kind, 'failed').inc()
+                    logger.debug(f"Refresh hot {kind} {uuid} gagal: {e}")
+
+        for kind in KINDS:
+            due = await cache.refresh_due(kind, list(self._hot[kind]), ahead)
+            if due:
+                await asyncio.gather(*(_one(kind, uuid) for uuid in due))
+                logger.info(f"♨️ Refreshed hot {kind}: {len(due)}/{len(self._hot[kind])}")
+
+    async def maintain(self):
+        """Decay skor + top-K + refresh proaktif (decay Redis & refresh cukup satu proses per interval)"""
+        self._decay_local()
+        # Lock tidak dilepas - expire sendiri, sedikit lebih pendek dari interval supaya pemegangnya
+        # tetap dapat di tick berikutnya
+        owner = await cache.acquire_lock('lock:hot:maintain', int(self.refresh_interval * 900))
+        if owner:
+            await cache.decay_access(list(KINDS), self.half_life, self.min_score)
+        await self.load_hot()
+        if owner:
+            await self.refresh_hot()
+
+    # === LOOP ===
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Access tracker flush error: {e}")
+
+    async def _maintain_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.maintain()
+            except Exception as e:
+                logger.error(f"❌ Access tracker maintain error: {e}")
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(self._flush_loop()))
+        if self.refresh_interval > 0:
+            self._tasks.append(asyncio.create_task(self._maintain_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.flush()
+
+
+# Global tracker instance
+hotkeys = AccessTracker()
+
+
+# === LIFECYCLE MANAGER ===
+
+class HotKeysLifecycle:
+    """Lifecycle manager untuk access tracker - dipakai di main.py"""
+
+    @staticmethod
+    async def post_init(app: Application):
+        """Dipanggil setelah bot initialize - tier hot awal (sebelum warm-up) + start loop berkala"""
+        from config import (HOTKEYS_FLUSH_INTERVAL, HOTKEYS_MAX_KEYS, HOTKEYS_HALF_LIFE, HOTKEYS_MIN_SCORE,
+                            HOTKEYS_TOP_K, HOTKEYS_HOT_TTL_FACTOR, HOTKEYS_COLD_TTL_FACTOR,
+                            HOTKEYS_REFRESH_INTERVAL, HOTKEYS_REPORT_TOP)
+
+        hotkeys.flush_interval = HOTKEYS_FLUSH_INTERVAL
+        hotkeys.max_keys = HOTKEYS_MAX_KEYS
+        hotkeys.half_life = HOTKEYS_HALF_LIFE
+        hotkeys.min_score = HOTKEYS_MIN_SCORE
+        hotkeys.top_k = HOTKEYS_TOP_K
+        hotkeys.hot_ttl_factor = HOTKEYS_HOT_TTL_FACTOR
+        hotkeys.cold_ttl_factor = HOTKEYS_COLD_TTL_FACTOR
+        hotkeys.refresh_interval = HOTKEYS_REFRESH_INTERVAL
+        hotkeys.report_top = HOTKEYS_REPORT_TOP
+
+        await hotkeys.load_hot()
+        hotkeys.start()
+        logger.info(f"♨️ Hot keys: top {HOTKEYS_TOP_K} TTL x{HOTKEYS_HOT_TTL_FACTOR:g}, "
+                    f"cold x{HOTKEYS_COLD_TTL_FACTOR:g}, half-life {HOTKEYS_HALF_LIFE:.0f}s")
+
+    @staticmethod
+    async def post_shutdown(app: Application):
+        """Dipanggil sebelum bot shutdown - flush counter terakhir (sebelum Redis ditutup)"""
+        await hotkeys.stop()
@@ -0,0 +1,302 @@
+# utils/invalidation.py
+"""
+Invalidasi cache berbasis event dari backend Django (gedung/unit berubah, termasuk status blacklist):
+- Redis stream consumer (XREADGROUP) - event tidak hilang walau bot restart / Redis sempat putus
+- endpoint HTTP POST /invalidate (Bearer token) - untuk backend yang tidak akses Redis
+
+Format event (JSON body atau field stream, list boleh dipisah koma):
+    {"gedung": ["uuid", ...], "unit": ["uuid", ...], "refresh": false}
+    {"all": ["gedung", "unit"]}  # update massal - hapus semua key jenis itu
+
+Unit yang berubah ikut meng-invalidasi gedung induknya (list unit di detail gedung).
+Gedung berubah: cell nearby yang memuatnya dihapus, spatial index di semua proses di-patch
+(nama / alamat / total_units / lokasi baru) lewat pub/sub EVENT_CHANNEL.
+Snapshot dataset lokal ikut: row dihapus + di-fetch ulang, "all" -> full sync segera.
+View render di-memoize per content hash, jadi otomatis ikut berganti begitu data baru di-load.
+"""
+import asyncio
+import hmac
+import json
+import logging
+import socket
+from typing import Dict, List, Optional, Set
+from aiohttp import web
+from telegram.ext import Application
+
+from utils.api_client import ApiError
+from utils.loader import load_gedung, load_unit
+from utils.redis_manager import cache
+from utils.singleflight import singleflight
+from utils.snapshot import snapshot
+from utils.spatial_index import gedung_index, refresh_index
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('gedung', 'unit')
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _as_list(value) -> List[str]:
+    """List JSON atau string dipisah koma -> list uuid"""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [_decode(v).strip() for v in value if _decode(v).strip()]
+    return [v.strip() for v in _decode(value).split(',') if v.strip()]
+
+
+def parse_event(fields: dict) -> dict:
+    """Event JSON / field stream -> {'gedung': [...], 'unit': [...], 'all': [...], 'refresh': bool}"""
+    fields = {_decode(k): v for k, v in fields.items()}
+    if 'payload' in fields:
+        # Field stream tunggal berisi JSON
+        fields = json.loads(_decode(fields['payload']))
+
+    event = {kind: _as_list(fields.get(kind)) for kind in KINDS}
+    event['all'] = [kind for kind in _as_list(fields.get('all')) if kind in KINDS]
+    refresh = fields.get('refresh', False)
+    event['refresh'] = refresh if isinstance(refresh, bool) else _decode(refresh).lower() in ('1', 'true', 'yes')
+    return event
+
+
+class Invalidator:
+    """Terapkan event invalidasi + konsumsi stream event backend"""
+
+    def __init__(self, stream: str = '', group: str = 'dkkm-bot', refresh_concurrency: int = 4):
+        self.stream = stream
+        self.group = group
+        self.refresh_concurrency = refresh_concurrency
+        self._consumer: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
+        self._reindex_pending: Set[str] = set()
+        self._reindex_task: Optional[asyncio.Task] = None
+
+    async def apply(self, event: dict) -> bool:
+        """Hapus key terdampak (False kalau Redis tidak bisa di-update - L1 lokal tetap dihapus)"""
+        ok = True
+        for kind in event.get('all', []):
+            await snapshot.reset(kind)
+            ok = await cache.invalidate_all(kind) and ok
+        if 'gedung' in event.get('all', []):
+            ok = await cache.invalidate_all('nearby') and ok
+
+        uuids: Dict[str, List[str]] = {kind: list(event.get(kind, [])) for kind in KINDS}
+        if uuids['unit'] and 'gedung' not in event.get('all', []):
+            # Gedung induk dari data unit yang masih di cache / snapshot
+            cached_units = await cache.get_unit_many(uuids['unit'], track=False)
+            for uuid in uuids['unit']:
+                unit = cached_units.get(uuid) or snapshot.get('unit', uuid, fresh_only=False)
+                if unit and unit.get('gedung_uuid'):
+                    uuids['gedung'].append(unit['gedung_uuid'])
+
+        for kind, kind_uuids in uuids.items():
+            if not kind_uuids or kind in event.get('all', []):
+                continue
+            # Fetch yang sedang jalan bisa menyimpan data lama setelah delete - tunggu dulu
+            await singleflight.settle([f"{kind}:{uuid}" for uuid in kind_uuids])
+            await snapshot.mark_dirty(kind, kind_uuids)
+            if kind == 'gedung':
+                # Nama / jumlah unit di hasil pencarian juga berubah
+                ok = await cache.invalidate_nearby(kind_uuids) and ok
+            ok = await cache.invalidate(kind, kind_uuids) and ok
+
+        if event.get('refresh'):
+            self._refresh(uuids)
+        return ok
+
+    def _refresh(self, uuids: Dict[str, List[str]]):
+        """Load ulang data terbaru di background (concurrency dibatasi)"""
+        semaphore = asyncio.Semaphore(self.refresh_concurrency)
+        loaders = {'gedung': load_gedung, 'unit': load_unit}
+
+        async def _one(kind: str, uuid: str):
+            async with semaphore:
+                try:
+                    await loaders[kind](uuid)
+                except Exception as e:
+                    logger.warning(f"⚠️ Refresh {kind} {uuid} gagal: {e}")
+
+        async def _run():
+            await asyncio.gather(*(_one(kind, uuid) for kind in KINDS for uuid in dict.fromkeys(uuids[kind])))
+
+        self._spawn(_run())
+
+    # === SPATIAL INDEX ===
+
+    def on_event(self, key: str):
+        """Hook EVENT_CHANNEL (semua proses): gedung berubah -> patch spatial index lokal"""
+        kind, _, uuid = key.partition(':')
+        if kind != 'gedung' or len(gedung_index) == 0:
+            return
+        if uuid == '*':
+            # Snapshot dataset: index dibangun ulang oleh full sync setelah reset
+            if not snapshot.opened:
+                self._spawn(refresh_index())
+            return
+        self._reindex_pending.add(uuid)
+        if self._reindex_task is None or self._reindex_task.done():
+            self._reindex_task = self._spawn(self._reindex())
+
+    async def _reindex(self):
+        """Load ulang gedung yang berubah (cache / API) lalu patch index - 404 = dihapus dari index"""
+        semaphore = asyncio.Semaphore(self.refresh_concurrency)
+
+        async def _one(uuid: str):
+            async with semaphore:
+                try:
+                    gedung_index.patch(uuid, await load_gedung(uuid))
+                except ApiError as e:
+                    if e.status == 404:
+                        gedung_index.patch(uuid, None)
+                    else:
+                        logger.warning(f"⚠️ Spatial index {uuid} tidak di-patch: {e}")
+                except Exception as e:
+                    logger.warning(f"⚠️ Spatial index {uuid} tidak di-patch: {e}")
+
+        while self._reindex_pending:
+            uuids = list(self._reindex_pending)
+            self._reindex_pending.clear()
+            await asyncio.gather(*(_one(uuid) for uuid in uuids))
+            logger.info(f"🗺️ Spatial index di-patch: {len(uuids)} gedung")
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    # === STREAM CONSUMER ===
+
+    def start(self, consumer: str):
+        if self.stream and not self._consumer:
+            self._consumer = asyncio.create_task(self._consume(consumer))
+
+    async def _consume(self, consumer: str):
+        """Satu consumer group - tiap event diproses satu worker, efeknya ke semua via Redis + pub/sub"""
+        # Mulai dari event yang belum di-ack (restart / gagal sebelumnya), lalu event baru
+        pending = True
+        while True:
+            try:
+                if not cache.connected:
+                    pending = True
+                    await asyncio.sleep(1)
+                    continue
+
+                entries = await cache.read_events(self.stream, self.group, consumer, '0' if pending else '>')
+                if entries is None:
+                    pending = True
+                    await asyncio.sleep(1)
+                    continue
+                if pending and not entries:
+                    pending = False
+                    continue
+                done = []
+                for entry_id, fields in entries:
+                    try:
+                        event = parse_event(fields)
+                    except Exception as e:
+                        # Event rusak tidak akan pernah berhasil - ack supaya tidak macet
+                        logger.error(f"❌ Event invalidasi tidak valid {_decode(entry_id)}: {e}")
+                        done.append(entry_id)
+                        continue
+                    if not await self.apply(event):
+                        pending = True  # Redis putus - dibaca ulang setelah reconnect
+                        break
+                    done.append(entry_id)
+                await cache.ack_events(self.stream, self.group, done)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Invalidation consumer error: {e}")
+                await asyncio.sleep(1)
+
+    async def stop(self):
+        tasks = [t for t in [self._consumer, *self._background] if t]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            # Dibatasi - XREADGROUP yang macet di koneksi tidak boleh menahan shutdown (flush session, snapshot)
+            await asyncio.wait(tasks, timeout=2)
+        self._consumer = None
+
+
+# Global invalidator instance
+invalidator = Invalidator()
+
+
+# === ENDPOINT HTTP ===
+
+def _handler(token: str):
+    async def handle_invalidate(request: web.Request):
+        auth = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(auth.encode(), f"Bearer {token}".encode()):
+            return web.json_response({'ok': False, 'error': 'unauthorized'}, status=401)
+
+        try:
+            event = parse_event(await request.json())
+        except Exception:
+            return web.json_response({'ok': False, 'error': 'invalid payload'}, status=400)
+
+        ok = await invalidator.apply(event)
+        # 503 - backend sebaiknya retry (Redis sedang tidak bisa di-update)
+        return web.json_response({'ok': ok}, status=200 if ok else 503)
+
+    return handle_invalidate
+
+
+# === LIFECYCLE MANAGER ===
+
+class InvalidationLifecycle:
+    """Lifecycle manager untuk invalidasi event - dipakai di main.py"""
+
+    _runner: Optional[web.AppRunner] = None
+
+    @staticmethod
+    async def post_init(app: Application):
+        """Dipanggil setelah bot initialize - start stream consumer + endpoint HTTP"""
+        from config import (INVALIDATION_STREAM, INVALIDATION_GROUP, INVALIDATION_PORT,
+                            INVALIDATION_ADDR, INVALIDATION_TOKEN)
+        from utils.metrics import worker_index
+
+        invalidator.stream = INVALIDATION_STREAM
+        invalidator.group = INVALIDATION_GROUP
+        # Semua worker - event bisa diterapkan di proses lain (stream / endpoint worker 0)
+        if invalidator.on_event not in cache.event_hooks:
+            cache.event_hooks.append(invalidator.on_event)
+        # Nama consumer stabil antar restart supaya event pending miliknya diproses ulang
+        invalidator.start(f"{socket.gethostname()}-{worker_index}")
+        if INVALIDATION_STREAM:
+            logger.info(f"📮 Invalidation stream: {INVALIDATION_STREAM} (group {INVALIDATION_GROUP})")
+
+        # Cluster webhook: cukup worker 0 - efek invalidasi tersebar lewat Redis
+        if not INVALIDATION_PORT or worker_index != 0:
+            return
+        if not INVALIDATION_TOKEN:
+            logger.warning("⚠️ INVALIDATION_PORT di-set tanpa INVALIDATION_TOKEN - endpoint tidak dijalankan")
+            return
+
+        web_app = web.Application()
+        web_app.router.add_post('/invalidate', _handler(INVALIDATION_TOKEN))
+        runner = web.AppRunner(web_app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, INVALIDATION_ADDR, INVALIDATION_PORT).start()
+        except OSError as e:
+            logger.error(f"❌ Invalidation endpoint gagal di port {INVALIDATION_PORT}: {e}")
+            await runner.cleanup()
+            return
+        InvalidationLifecycle._runner = runner
+        logger.info(f"🧹 Invalidation endpoint: http://{INVALIDATION_ADDR}:{INVALIDATION_PORT}/invalidate")
+
+    @staticmethod
+    async def post_shutdown(app: Application):
+        """Dipanggil sebelum bot shutdown - stop consumer + endpoint"""
+        if InvalidationLifecycle._runner:
+            await InvalidationLifecycle._runner.cleanup()
+            InvalidationLifecycle._runner = None
+        if invalidator.on_event in cache.event_hooks:
+            cache.event_hooks.remove(invalidator.on_event)
+        await invalidator.stop()
@@ -0,0 +1,215 @@
+# utils/loader.py
+"""
+Loader data gedung/unit/nearby: cache dulu, lalu API (coalesced), lalu simpan ke cache.
+Dipakai semua flow supaya urutan lookup cukup ditulis sekali.
+Snapshot dataset lokal (kalau aktif) dibaca paling awal.
+TTL detail adaptif sesuai popularitas key (utils.hotkeys).
+API gagal / circuit open -> data kedaluwarsa (stale-if-error) atau snapshot spatial index lama.
+"""
+import asyncio
+import logging
+from telegram.ext import Application
+
+from utils.api_client import ApiError, api
+from utils.hotkeys import hotkeys
+from utils.metrics import STALE_SERVED
+from utils.redis_manager import cache
+from utils.singleflight import singleflight
+from utils.snapshot import snapshot
+from utils.spatial_index import gedung_index
+
+logger = logging.getLogger(__name__)
+
+# Referensi task refresh background supaya tidak di-GC sebelum selesai
+_background = set()
+
+
+def _refresh_in_background(key: str, fn, recheck):
+    """Stale-while-revalidate: refresh via single-flight, error cukup di-log"""
+    # Backend sedang down - data stale tetap dipakai, tidak perlu antre refresh
+    if not api.available:
+        return
+
+    async def _run():
+        try:
+            await singleflight.do(key, fn, recheck=recheck)
+            logger.info(f"♻️ Refreshed stale {key}")
+        except Exception as e:
+            logger.warning(f"⚠️ Background refresh {key} failed: {e}")
+
+    task = asyncio.create_task(_run())
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+# === GEDUNG ===
+
+async def _fetch_gedung(uuid: str) -> dict:
+    data = await api.get_gedung(uuid)
+    await cache.save_gedung(uuid, data, hotkeys.ttl_for('gedung', uuid, cache.ttl))
+    return data
+
+
+async def _fresh_gedung(uuid: str):
+    """Recheck single-flight - hanya terima data yang belum stale"""
+    entry = await cache.get_gedung_entry(uuid)
+    return entry.data if entry and not entry.stale else None
+
+
+async def load_gedung(uuid: str) -> dict:
+    """Detail gedung - raise ApiError kalau API gagal (dan tidak ada data lama)"""
+    data = snapshot.get('gedung', uuid)
+    if data is not None:
+        return data
+
+    entry = await cache.get_gedung_entry(uuid)
+    if entry and not entry.expired:
+        if entry.stale:
+            _refresh_in_background(
+                f"gedung:{uuid}",
+                lambda: _fetch_gedung(uuid),
+                lambda: _fresh_gedung(uuid)
+            )
+        return entry.data
+
+    try:
+        return await singleflight.do(
+            f"gedung:{uuid}",
+            lambda: _fetch_gedung(uuid),
+            recheck=lambda: _fresh_gedung(uuid)
+        )
+    except ApiError as e:
+        if e.status < 500:
+            raise
+        # Snapshot lewat max_age masih lebih baik daripada error
+        data = entry.data if entry else snapshot.get('gedung', uuid, fresh_only=False)
+        if data is None:
+            raise
+        logger.warning(f"⚠️ API gagal ({e.status}), pakai gedung kedaluwarsa: {uuid}")
+        STALE_SERVED.labels('gedung').inc()
+        return data
+
+
+# === UNIT ===
+
+async def _fetch_unit(uuid: str) -> dict:
+    data = await api.get_unit(uuid)
+    await cache.save_unit(uuid, data, hotkeys.ttl_for('unit', uuid, cache.ttl))
+    return data
+
+
+async def _fresh_unit(uuid: str):
+    """Recheck single-flight - hanya terima data yang belum stale"""
+    entry = await cache.get_unit_entry(uuid)
+    return entry.data if entry and not entry.stale else None
+
+
+async def load_unit(uuid: str) -> dict:
+    """Detail unit - raise ApiError kalau API gagal (dan tidak ada data lama)"""
+    data = snapshot.get('unit', uuid)
+    if data is not None:
+        return data
+
+    entry = await cache.get_unit_entry(uuid)
+    if entry and not entry.expired:
+        if entry.stale:
+            _refresh_in_background(
+                f"unit:{uuid}",
+                lambda: _fetch_unit(uuid),
+                lambda: _fresh_unit(uuid)
+            )
+        return entry.data
+
+    try:
+        return await singleflight.do(
+            f"unit:{uuid}",
+            lambda: _fetch_unit(uuid),
+            recheck=lambda: _fresh_unit(uuid)
+        )
+    except ApiError as e:
+        if e.status < 500:
+            raise
+        data = entry.data if entry else snapshot.get('unit', uuid, fresh_only=False)
+        if data is None:
+            raise
+        logger.warning(f"⚠️ API gagal ({e.status}), pakai unit kedaluwarsa: {uuid}")
+        STALE_SERVED.labels('unit').inc()
+        return data
+
+
+async def refresh(kind: str, uuid: str) -> dict:
+    """Fetch detail dari API tanpa lihat cache (prefetch / refresh proaktif hot key)"""
+    fetch, fresh = (_fetch_gedung, _fresh_gedung) if kind == 'gedung' else (_fetch_unit, _fresh_unit)
+    return await singleflight.do(f"{kind}:{uuid}", lambda: fetch(uuid), recheck=lambda: fresh(uuid))
+
+
+# === NEARBY ===
+
+async def _fetch_nearby(lat: float, long: float, radius: int) -> dict:
+    data = await api.nearby(lat, long, radius)
+    await cache.save_nearby(lat, long, radius, data)
+    return data
+
+
+async def load_nearby(lat: float, long: float, radius: int) -> dict:
+    """Nearby search - spatial index lokal (dari list API atau snapshot dataset), cache geo-cell, lalu API"""
+    # Spatial index lokal - kalau snapshot masih fresh, tanpa network sama sekali
+    if gedung_index.is_fresh():
+        return gedung_index.nearby(lat, long, radius)
+
+    cached_data = await cache.get_nearby(lat, long, radius)
+    if cached_data:
+        return cached_data
+
+    # Key pakai koordinat (±1m), bukan geo-cell - hasil harus untuk titik yang sama
+    try:
+        return await singleflight.do(
+            f"nearby:{lat:.5f}:{long:.5f}:{radius}",
+            lambda: _fetch_nearby(lat, long, radius),
+            recheck=lambda: cache.get_nearby(lat, long, radius)
+        )
+    except ApiError as e:
+        # Snapshot index yang sudah lewat max_age masih lebih baik daripada error
+        if len(gedung_index) == 0 or e.status < 500:
+            raise
+        logger.warning(f"⚠️ API gagal ({e.status}), nearby dari snapshot index lama")
+        STALE_SERVED.labels('nearby').inc()
+        return gedung_index.nearby(lat, long, radius)
+
+
+async def load_nearby_auto(lat: float, long: float, radii: list) -> dict:
+    """
+    Mode radius otomatis: satu query di radius terbesar, lalu radius preset terkecil yang ada hasilnya.
+    Hasil radius terbesar sudah di-cache, jadi radius kecil (dan ganti radius nanti) dijawab dari
+    cache lewat subset haversine. Kalau list API terpotong, radius terpilih di-query sekali lagi.
+    """
+    radii = sorted(radii)
+    widest = await load_nearby(lat, long, radii[-1])
+    results = widest.get('results', [])
+    if not widest.get('success') or not results:
+        return widest
+
+    nearest = min(float(g.get('distance', 0)) for g in results)
+    radius = next((r for r in radii if nearest <= r), radii[-1])
+    if radius == radii[-1]:
+        return widest
+
+    if widest.get('count', len(results)) <= len(results):
+        # List lengkap - subset lokal (tanpa round-trip walau Redis sedang down)
+        subset = [g for g in results if float(g.get('distance', 0)) <= radius]
+        return {**widest, 'results': subset, 'count': len(subset), 'radius': radius}
+    return await load_nearby(lat, long, radius)
+
+
+# === LIFECYCLE ===
+
+class LoaderLifecycle:
+    """Lifecycle manager untuk loader - dipakai di main.py"""
+
+    @staticmethod
+    async def post_init(app: Application):
+        """Dipanggil setelah bot initialize - konfigurasi single-flight"""
+        from config import SINGLEFLIGHT_DISTRIBUTED, SINGLEFLIGHT_LOCK_TTL_MS
+
+        singleflight.distributed = SINGLEFLIGHT_DISTRIBUTED
+        singleflight.lock_ttl_ms = SINGLEFLIGHT_LOCK_TTL_MS
@@ -0,0 +1,151 @@
+# utils/metrics.py
+"""
+Metrics Prometheus (endpoint /metrics lewat prometheus_client):
+- latency per route callback_router + jumlah handler in-flight
+- hit/miss per cache (gedung, unit, nearby)
+- latency + status code per endpoint API DKKM
+- latency + error per method Telegram Bot API
+- retry / hedge / state circuit breaker API DKKM
+- status Redis + total waktu degraded
+- jumlah row + hasil sync snapshot dataset lokal
+- top-K hot key + tier TTL adaptif + refresh proaktif
+
+Mode cluster webhook: tiap worker buka port sendiri (METRICS_PORT + index worker).
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from telegram.ext import Application
+
+logger = logging.getLogger(__name__)
+
+# Bucket latency (detik) - dari hit L1 (<1ms) sampai timeout API
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+ROUTE_LATENCY = Histogram(
+    'dkkm_route_duration_seconds', 'Durasi handler per route callback',
+    ['route'], buckets=LATENCY_BUCKETS
+)
+ROUTE_ERRORS = Counter(
+    'dkkm_route_errors_total', 'Handler yang raise exception', ['route']
+)
+HANDLERS_IN_FLIGHT = Gauge(
+    'dkkm_handlers_in_flight', 'Update yang sedang diproses'
+)
+CACHE_LOOKUPS = Counter(
+    'dkkm_cache_lookups_total', 'Lookup cache per key (result: hit_snapshot, hit_l1, hit_redis, miss)',
+    ['cache', 'result']
+)
+UPSTREAM_LATENCY = Histogram(
+    'dkkm_upstream_duration_seconds', 'Durasi request ke API DKKM',
+    ['endpoint'], buckets=LATENCY_BUCKETS
+)
+UPSTREAM_RESPONSES = Counter(
+    'dkkm_upstream_responses_total', 'Response API DKKM per status (error = timeout/koneksi)',
+    ['endpoint', 'status']
+)
+TELEGRAM_LATENCY = Histogram(
+    'dkkm_telegram_duration_seconds', 'Durasi call Telegram Bot API (tanpa antre rate limiter)',
+    ['method'], buckets=LATENCY_BUCKETS
+)
+TELEGRAM_ERRORS = Counter(
+    'dkkm_telegram_errors_total', 'Call Telegram Bot API yang gagal', ['method', 'error']
+)
+UPSTREAM_RETRIES = Counter(
+    'dkkm_upstream_retries_total', 'Retry request API DKKM', ['endpoint']
+)
+UPSTREAM_HEDGES = Counter(
+    'dkkm_upstream_hedges_total', 'Hedged request (request kedua) ke API DKKM', ['endpoint']
+)
+CIRCUIT_STATE = Gauge(
+    'dkkm_circuit_state', 'State circuit breaker (0 closed, 1 half-open, 2 open)', ['backend']
+)
+REDIS_UP = Gauge(
+    'dkkm_redis_up', 'Koneksi Redis sehat (1) atau degraded (0)'
+)
+REDIS_DEGRADED_SECONDS = Counter(
+    'dkkm_redis_degraded_seconds_total', 'Total waktu Redis down (ditambah saat pulih)'
+)
+PREFETCH = Counter(
+    'dkkm_prefetch_total', 'Prefetch detail (result: fetched, cached, skipped, failed)', ['kind', 'result']
+)
+SNAPSHOT_ROWS = Gauge(
+    'dkkm_snapshot_rows', 'Jumlah row di snapshot dataset lokal', ['kind']
+)
+SNAPSHOT_SYNCS = Counter(
+    'dkkm_snapshot_syncs_total', 'Sync snapshot (mode: full, delta)', ['mode', 'result']
+)
+STALE_SERVED = Counter(
+    'dkkm_stale_served_total', 'Data cache kedaluwarsa yang dilayani karena API gagal', ['cache']
+)
+HOT_KEY_SCORE = Gauge(
+    'dkkm_hot_key_score', 'Skor akses (meluruh) top-K gedung/unit terpanas', ['kind', 'uuid']
+)
+CACHE_TTL_TIER = Counter(
+    'dkkm_cache_ttl_tier_total', 'Detail disimpan per tier TTL adaptif (hot, warm, cold)', ['kind', 'tier']
+)
+HOT_REFRESHES = Counter(
+    'dkkm_hot_refresh_total', 'Refresh proaktif hot key sebelum soft TTL habis (result: ok, failed)',
+    ['kind', 'result']
+)
+
+# Diisi webhook_cluster sebelum worker build Application
+worker_index = 0
+
+
+def route_name(data: str) -> str:
+    """Nama route dari callback data (tanpa uuid/angka supaya label tidak meledak)"""
+    if data.startswith('pg_'):
+        return data.rsplit('_', 1)[0]
+    for prefix in ('radius', 'gedung', 'unit'):
+        if data.startswith(f"{prefix}_"):
+            return prefix
+    if data in ('back_results', 'back_gedung', 'search_again', 'no_action'):
+        return data
+    return 'unknown'
+
+
+@contextmanager
+def track_route(route: str):
+    """Catat durasi + error satu handler"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ROUTE_ERRORS.labels(route).inc()
+        raise
+    finally:
+        ROUTE_LATENCY.labels(route).observe(time.perf_counter() - start)
+
+
+def cache_lookup(cache: str, result: str, count: int = 1):
+    if count:
+        CACHE_LOOKUPS.labels(cache, result).inc(count)
+
+
+# === LIFECYCLE MANAGER ===
+
+class MetricsLifecycle:
+    """Lifecycle manager untuk endpoint metrics - dipakai di main.py"""
+
+    @staticmethod
+    async def post_init(app: Application):
+        """Dipanggil setelah bot initialize - start HTTP server /metrics (thread daemon)"""
+        from config import METRICS_PORT, METRICS_ADDR
+
+        if not METRICS_PORT:
+            return
+
+        port = METRICS_PORT + worker_index
+        try:
+            start_http_server(port, addr=METRICS_ADDR)
+            logger.info(f"📈 Metrics endpoint: http://{METRICS_ADDR}:{port}/metrics")
+        except OSError as e:
+            logger.error(f"❌ Metrics endpoint gagal di port {port}: {e}")
+
+    @staticmethod
+    async def post_shutdown(app: Application):
+        """Server metrics thread daemon - ikut berhenti bersama proses"""
+        pass
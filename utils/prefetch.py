@@ -0,0 +1,122 @@
+# utils/prefetch.py
+"""
+Prefetch prediktif: setelah daftar hasil tampil, detail N gedung teratas di-load ke cache;
+setelah detail gedung tampil, detail unit di halaman itu. Tap berikutnya jadi cache hit.
+
+- satu task prefetch per user - navigasi berikutnya membatalkan prefetch sebelumnya
+- budget concurrency global (semaphore) supaya tidak membanjiri API
+- key yang sudah ada di cache dilewati, tidak jalan kalau circuit breaker API open
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from telegram.ext import Application
+
+from utils.api_client import api
+from utils.loader import refresh
+from utils.metrics import PREFETCH
+from utils.redis_manager import cache
+from utils.snapshot import snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    def __init__(self, enabled: bool = True, top_gedung: int = 3, top_units: int = 6, concurrency: int = 4):
+        self.enabled = enabled
+        self.top_gedung = top_gedung
+        self.top_units = top_units
+        self.concurrency = concurrency
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def schedule(self, user_id: int, kind: str, uuids: List[str]):
+        """Prefetch detail gedung/unit untuk user ini (menggantikan prefetch sebelumnya)"""
+        self.cancel(user_id)
+        if not self.enabled or not uuids:
+            return
+
+        limit = self.top_gedung if kind == 'gedung' else self.top_units
+        uuids = list(dict.fromkeys(uuids))[:limit]
+        if not uuids:
+            return
+
+        task = asyncio.create_task(self.fetch(kind, uuids))
+        self._tasks[user_id] = task
+        task.add_done_callback(lambda t: self._done(user_id, t))
+
+    def cancel(self, user_id: int):
+        """User pindah layar - prefetch lama tidak relevan lagi"""
+        task = self._tasks.pop(user_id, None)
+        if task and not task.done():
+            task.cancel()
+
+    def _done(self, user_id: int, task: asyncio.Task):
+        if self._tasks.get(user_id) is task:
+            del self._tasks[user_id]
+
+    async def fetch(self, kind: str, uuids: List[str]):
+        """Pastikan detail ada di cache (urutan uuids = prioritas) - dipakai juga warm-up startup"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        # Snapshot dataset aktif - detail sudah lokal
+        if snapshot.is_fresh():
+            return
+
+        get_many = cache.get_gedung_many if kind == 'gedung' else cache.get_unit_many
+
+        # Sekalian menghangatkan L1 untuk yang sudah ada di Redis - tidak dihitung di hit ratio
+        cached = await get_many(uuids, track=False)
+        PREFETCH.labels(kind, 'cached').inc(len(cached))
+        missing = [uuid for uuid in uuids if uuid not in cached]
+
+        async def _one(uuid: str):
+            async with self._semaphore:
+                if not api.available:
+                    PREFETCH.labels(kind, 'skipped').inc()
+                    return
+                try:
+                    # Langsung fetch - cache sudah dicek lewat get_many di atas
+                    await refresh(kind, uuid)
+                    PREFETCH.labels(kind, 'fetched').inc()
+                except Exception as e:
+                    PREFETCH.labels(kind, 'failed').inc()
+                    logger.debug(f"Prefetch {kind} {uuid} gagal: {e}")
+
+        # Semaphore FIFO - urutan ranking (teratas dulu) tetap terjaga
+        await asyncio.gather(*(_one(uuid) for uuid in missing))
+        if missing:
+            logger.info(f"🔮 Prefetched {kind}: {len(missing)} (cached {len(cached)})")
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Global prefetcher instance
+prefetcher = Prefetcher()
+
+
+# === LIFECYCLE MANAGER ===
+
+class PrefetchLifecycle:
+    """Lifecycle manager untuk prefetcher - dipakai di main.py"""
+
+    @staticmethod
+    async def post_init(app: Application):
+        """Dipanggil setelah bot initialize - konfigurasi budget prefetch"""
+        from config import PREFETCH_ENABLED, PREFETCH_TOP_GEDUNG, PREFETCH_TOP_UNITS, PREFETCH_CONCURRENCY
+
+        prefetcher.enabled = PREFETCH_ENABLED
+        prefetcher.top_gedung = PREFETCH_TOP_GEDUNG
+        prefetcher.top_units = PREFETCH_TOP_UNITS
+        prefetcher.concurrency = PREFETCH_CONCURRENCY
+        prefetcher._semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+
+    @staticmethod
+    async def post_shutdown(app: Application):
+        """Dipanggil sebelum bot shutdown - batalkan prefetch yang masih jalan"""
+        await prefetcher.stop()
@@ -0,0 +1,156 @@
+# utils/rate_limiter.py
+"""
+Rate limiter outbound Telegram Bot API: token bucket global + per chat, dengan prioritas.
+answerCallbackQuery didahulukan (spinner tombol user), lalu teks/edit, lalu kirim/edit foto.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from utils.metrics import TELEGRAM_LATENCY, TELEGRAM_ERRORS
+from utils.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_ANSWER = 0
+PRIORITY_TEXT = 1
+PRIORITY_MEDIA = 2
+
+MEDIA_ENDPOINTS = {'sendPhoto', 'editMessageMedia', 'sendMediaGroup', 'sendDocument'}
+
+# Endpoint yang tidak kena limit pesan per chat
+UNLIMITED_PER_CHAT = {'answerCallbackQuery', 'deleteMessage', 'getMe', 'getUpdates', 'setWebhook',
+                      'deleteWebhook', 'getWebhookInfo'}
+
+
+class PriorityBucket:
+    """Token bucket - waiter dilayani berdasarkan prioritas (angka kecil dulu), lalu FIFO"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._waiters = []  # heap (priority, seq, future)
+        self._seq = itertools.count()
+        self._drainer: Optional[asyncio.Task] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    @property
+    def idle(self) -> bool:
+        self._refill()
+        return not self._waiters and self.tokens >= self.burst
+
+    async def acquire(self, priority: int):
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if not self._drainer or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain())
+        await future
+
+    async def _drain(self):
+        while self._waiters:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                continue
+
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():  # waiter sudah di-cancel
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+
+
+class PriorityRateLimiter(BaseRateLimiter):
+    """BaseRateLimiter PTB - dipasang lewat ApplicationBuilder.rate_limiter()"""
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1, chat_burst: float = 3,
+                 max_retries: int = 2):
+        self.global_bucket = PriorityBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._chat_buckets: Dict[Any, PriorityBucket] = {}
+        self._calls = 0
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    @staticmethod
+    def _priority(endpoint: str) -> int:
+        if endpoint == 'answerCallbackQuery':
+            return PRIORITY_ANSWER
+        if endpoint in MEDIA_ENDPOINTS:
+            return PRIORITY_MEDIA
+        return PRIORITY_TEXT
+
+    def _chat_bucket(self, chat_id) -> PriorityBucket:
+        # Bersihkan bucket chat yang idle sesekali
+        self._calls += 1
+        if self._calls % 1000 == 0:
+            self._chat_buckets = {k: b for k, b in self._chat_buckets.items() if not b.idle}
+
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = PriorityBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[Any],
+    ):
+        priority = self._priority(endpoint)
+        chat_id = data.get('chat_id')
+
+        for attempt in range(self.max_retries + 1):
+            queued = time.perf_counter()
+            if chat_id is not None and endpoint not in UNLIMITED_PER_CHAT:
+                await self._chat_bucket(chat_id).acquire(priority)
+            await self.global_bucket.acquire(priority)
+
+            start = time.perf_counter()
+            try:
+                with tracer.span(f"telegram.{endpoint}", attempt=attempt,
+                                 queued_ms=round((start - queued) * 1000, 1)):
+                    result = await callback(*args, **kwargs)
+            except RetryAfter as e:
+                TELEGRAM_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+                TELEGRAM_ERRORS.labels(endpoint, 'RetryAfter').inc()
+                if attempt == self.max_retries:
+                    raise
+                delay = e.retry_after
+                if hasattr(delay, 'total_seconds'):
+                    delay = delay.total_seconds()
+                logger.warning(f"⏳ Telegram 429 on {endpoint}, retry dalam {delay}s")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                TELEGRAM_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+                TELEGRAM_ERRORS.labels(endpoint, type(e).__name__).inc()
+                raise
+            else:
+                TELEGRAM_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+                return result
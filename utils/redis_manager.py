@@ -1,135 +1,1119 @@
 # utils/redis_manager.py
 import redis.asyncio as redis
-import json
+import asyncio
+import hashlib
+import random
+import secrets
+import time
 import logging
-from typing import Optional
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional
 from telegram.ext import Application
 
+from utils.codec import codec
+from utils.geo import geohash, haversine
+from utils.metrics import REDIS_DEGRADED_SECONDS, REDIS_UP, cache_lookup
+from utils.tracing import traced
+
 logger = logging.getLogger(__name__)
 
+INVALIDATE_CHANNEL = 'cache:invalidate'
+# Invalidasi dari event backend (bukan save biasa) - semua proses, termasuk pengirim
+EVENT_CHANNEL = 'cache:event'
+
+
+class CacheEntry(NamedTuple):
+    """Data dari cache + apakah sudah lewat soft TTL / hard TTL (hanya dipakai kalau API gagal)"""
+    data: dict
+    stale: bool
+    expired: bool = False
+
+
+def _unwrap(envelope: dict) -> CacheEntry:
+    """Envelope SWR -> CacheEntry (entry JSON lama tanpa envelope dianggap fresh)"""
+    if '_swr' not in envelope:
+        return CacheEntry(envelope, False)
+    now = time.time()
+    return CacheEntry(envelope['data'], envelope['_swr'] <= now, envelope.get('_exp', now + 1) <= now)
+
+
+class LocalCache:
+    """L1 in-process LRU - dibatasi total byte (ukuran JSON) + TTL per entry"""
+    
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024, ttl: int = 60):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()  # key -> (expires_at, size, value)
+    
+    def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, size, value = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            self.misses += 1
+            return None
+        
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def peek(self, key: str):
+        """Seperti get, tanpa mengubah urutan LRU / statistik hit"""
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[2]
+    
+    def set(self, key: str, value, size: int, ttl: int = None):
+        if self.max_bytes <= 0 or size > self.max_bytes:
+            self.delete(key)
+            return
+        
+        # TTL L1 tidak boleh lebih lama dari sisa TTL di Redis
+        ttl = min(ttl or self.ttl, self.ttl)
+        self.delete(key)
+        self._data[key] = (time.monotonic() + ttl, size, value)
+        self.size += size
+        
+        while self.size > self.max_bytes:
+            self._evict()
+    
+    def _evict(self):
+        """Buang entry expired dulu, kalau tidak ada buang yang paling lama tidak dipakai"""
+        now = time.monotonic()
+        for key, (expires_at, _, _) in self._data.items():
+            if expires_at <= now:
+                self._drop(key)
+                self.evictions += 1
+                return
+        key = next(iter(self._data))
+        self._drop(key)
+        self.evictions += 1
+    
+    def _drop(self, key: str):
+        _, size, _ = self._data.pop(key)
+        self.size -= size
+    
+    def delete(self, key: str):
+        if key in self._data:
+            self._drop(key)
+    
+    def delete_prefix(self, prefix: str):
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            self._drop(key)
+    
+    def clear(self):
+        self._data.clear()
+        self.size = 0
+    
+    def dump(self, prefixes: tuple) -> list:
+        """[(key, sisa TTL detik, size, value)] untuk key dengan prefix tertentu (LRU -> MRU)"""
+        now = time.monotonic()
+        return [(key, expires_at - now, size, value)
+                for key, (expires_at, size, value) in self._data.items()
+                if key.startswith(prefixes) and expires_at > now]
+    
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'bytes': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
+
 
 class RedisCache:
-    """Simple Redis cache - Support URL atau host/port"""
+    """Redis cache - URL (bisa beberapa, failover berurutan), host/port, atau Sentinel"""
     
-    def __init__(self, redis_url: str = None, host: str = None, port: int = None, ttl=3600):
+    def __init__(self, redis_url: str = None, host: str = None, port: int = None, ttl=3600,
+                 soft_ttl=None, nearby_ttl=600, nearby_precision=7, nearby_radii=None,
+                 file_id_ttl=30 * 86400, view_ttl=3600, stale_if_error=0):
         self.redis_url = redis_url
         self.host = host
         self.port = port
         self.ttl = ttl
+        self.soft_ttl = soft_ttl if soft_ttl is not None else ttl
+        self.stale_if_error = stale_if_error
+        self.nearby_ttl = nearby_ttl
+        self.nearby_precision = nearby_precision
+        self.nearby_radii = sorted(nearby_radii or [])
+        self.file_id_ttl = file_id_ttl
+        self.view_ttl = view_ttl
+        self.local = LocalCache()
+        self.instance_id = secrets.token_hex(4)
+        
+        # Failover + pool + health check
+        self.fallback_urls: List[str] = []
+        self.sentinels: List[tuple] = []
+        self.sentinel_master = 'mymaster'
+        self.max_connections = 50
+        self.socket_timeout = 1.0
+        self.connect_timeout = 1.0
+        self.health_interval = 5.0
+        self.reconnect_max = 60.0
+        
         self._client = None
-        self._connected = False
+        self._up = False
+        self._down_since: Optional[float] = None
+        self._target = 0  # index URL yang sedang dipakai
+        self._listener = None
+        self._stream_groups = set()
+        self._health = None
+        self._wake = asyncio.Event()
+        # Dipanggil (sync) untuk tiap key dari EVENT_CHANNEL, mis. patch spatial index
+        self.event_hooks: List[Callable[[str], None]] = []
     
-    async def connect(self):
-        """Connect ke Redis - auto detect URL atau host/port"""
-        if not self._client:
-            if self.redis_url:
-                self._client = redis.from_url(
-                    self.redis_url,
-                    decode_responses=True
-                )
-                logger.info(f"📡 Connecting to Redis via URL...")
-            elif self.host and self.port:
-                self._client = redis.Redis(
-                    host=self.host,
-                    port=self.port,
-                    decode_responses=True
-                )
-                logger.info(f"📡 Connecting to Redis at {self.host}:{self.port}...")
-            else:
-                raise ValueError("Redis config not set. Provide redis_url OR host+port")
-            
-            # TEST KONEKSI REAL
+    # Semua path graceful-fail cukup set _connected = False - health check yang reconnect
+    @property
+    def _connected(self) -> bool:
+        return self._up
+    
+    @_connected.setter
+    def _connected(self, value: bool):
+        if value == self._up:
+            return
+        self._up = value
+        REDIS_UP.set(1 if value else 0)
+        if value:
+            if self._down_since is not None:
+                down = time.monotonic() - self._down_since
+                REDIS_DEGRADED_SECONDS.inc(down)
+                logger.info(f"✅ Redis pulih setelah {down:.1f}s degraded")
+            self._down_since = None
+        else:
+            self._down_since = time.monotonic()
+            logger.warning("⚠️ Redis ditandai down - cache nonaktif sampai reconnect")
+            self._wake.set()
+    
+    def _targets(self) -> list:
+        """Daftar target koneksi: ('sentinel',) | ('url', url) | ('host', host, port)"""
+        if self.sentinels:
+            return [('sentinel',)]
+        urls = [u for u in [self.redis_url] + self.fallback_urls if u]
+        if urls:
+            return [('url', u) for u in urls]
+        if self.host and self.port:
+            return [('host', self.host, self.port)]
+        raise ValueError("Redis config not set. Provide redis_url OR host+port")
+    
+    def _build_client(self, target: tuple):
+        options = dict(
+            decode_responses=False,
+            socket_timeout=self.socket_timeout,
+            socket_connect_timeout=self.connect_timeout,
+        )
+        if target[0] == 'sentinel':
+            from redis.asyncio.sentinel import Sentinel
+            sentinel = Sentinel(self.sentinels, socket_timeout=self.socket_timeout,
+                                socket_connect_timeout=self.connect_timeout)
+            logger.info(f"📡 Connecting to Redis via Sentinel (master={self.sentinel_master})...")
+            return sentinel.master_for(self.sentinel_master, max_connections=self.max_connections,
+                                       **options)
+        
+        # Pool blocking: kalau penuh, tunggu koneksi bebas (maks socket_timeout), bukan error
+        if target[0] == 'url':
+            logger.info(f"📡 Connecting to Redis via URL #{self._targets().index(target) + 1}...")
+            pool = redis.BlockingConnectionPool.from_url(
+                target[1], max_connections=self.max_connections, timeout=self.socket_timeout, **options
+            )
+        else:
+            logger.info(f"📡 Connecting to Redis at {target[1]}:{target[2]}...")
+            pool = redis.BlockingConnectionPool(
+                host=target[1], port=target[2], max_connections=self.max_connections,
+                timeout=self.socket_timeout, **options
+            )
+        return redis.Redis(connection_pool=pool)
+    
+    async def _open(self) -> bool:
+        """Coba semua target mulai dari yang terakhir berhasil - True kalau ada yang PING ok"""
+        targets = self._targets()
+        for offset in range(len(targets)):
+            index = (self._target + offset) % len(targets)
+            client = self._build_client(targets[index])
             try:
-                await self._client.ping()
-                self._connected = True
-                logger.info("✅ Redis connection verified")
+                await client.ping()
             except Exception as e:
                 logger.error(f"❌ Redis PING failed: {e}")
-                self._connected = False
-                self._client = None
+                await self._discard(client)
+                continue
+            
+            old, self._client, self._target = self._client, client, index
+            if old is not None and old is not client:
+                await self._discard(old)
+            self._start_listener()
+            self._connected = True
+            logger.info("✅ Redis connection verified")
+            return True
+        return False
+    
+    @staticmethod
+    async def _discard(client):
+        try:
+            await client.close()
+        except Exception:
+            pass
+    
+    def _start_listener(self):
+        if self._listener:
+            self._listener.cancel()
+        self._listener = asyncio.create_task(self._listen_invalidation())
+    
+    async def connect(self):
+        """Connect ke Redis + start health check (reconnect otomatis kalau putus)"""
+        # Health loop start setelah percobaan pertama - kalau lebih dulu, ia ikut reconnect
+        # (client baru + L1 dikosongkan) selagi _open() pertama masih jalan
+        opened = self._client is not None or await self._open()
+        if not self._health:
+            self._health = asyncio.create_task(self._health_loop())
+        if not opened:
+            # Belum pernah up - mulai hitung waktu degraded dari sekarang
+            if self._down_since is None:
+                self._down_since = time.monotonic()
+            REDIS_UP.set(0)
+            raise ConnectionError("Redis tidak bisa dihubungi (health check akan reconnect)")
+    
+    async def _health_loop(self):
+        """PING berkala; kalau down, reconnect dengan exponential backoff + jitter"""
+        failures = 0
+        while True:
+            try:
+                if self._up:
+                    failures = 0
+                    self._wake.clear()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), self.health_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    if not self._up:
+                        continue
+                    try:
+                        await self._client.ping()
+                        if self._listener is None or self._listener.done():
+                            self._start_listener()
+                    except Exception as e:
+                        logger.error(f"❌ Redis health check failed: {e}")
+                        self._connected = False
+                    continue
+                
+                delay = min(self.reconnect_max, 0.5 * (2 ** failures)) * random.uniform(0.5, 1.0)
+                await asyncio.sleep(delay)
+                if await self._open():
+                    # Invalidasi selama down terlewat - L1 bisa basi
+                    self.local.clear()
+                else:
+                    failures += 1
+            except asyncio.CancelledError:
                 raise
+            except Exception as e:
+                logger.error(f"❌ Redis health loop error: {e}")
+                await asyncio.sleep(1)
+    
+    @property
+    def connected(self) -> bool:
+        return self._connected
+    
+    @property
+    def degraded_seconds(self) -> float:
+        """Lama down saat ini (0 kalau terhubung)"""
+        return time.monotonic() - self._down_since if self._down_since is not None else 0.0
     
     async def close(self):
-        """Close connection"""
+        """Close connection + stop health check"""
+        tasks = [task for task in (self._health, self._listener) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._health = None
+        self._listener = None
+        
         if self._client:
             try:
                 await self._client.close()
-                self._connected = False
+                self._up = False
                 logger.info("🔌 Redis closed")
             except Exception as e:
                 logger.error(f"Error closing Redis: {e}")
+            self._client = None
     
-    # === GEDUNG ===
+    # === DETAIL (gedung / unit) ===
+    # Value disimpan sebagai envelope {"_swr": fresh_until, "_exp": expire_at, "data": ...}:
+    # setelah soft TTL entry masih dilayani (stale) sambil di-refresh. Lewat hard TTL (_exp)
+    # entry hanya dipakai kalau API gagal; TTL Redis = hard TTL + stale_if_error.
+    # Hard TTL bisa per key (hot key lebih lama, key dingin lebih cepat keluar).
     
-    async def save_gedung(self, uuid: str, data: dict):
-        """Simpan gedung ke cache - graceful fail"""
+    def _retention(self, ttl: int) -> int:
+        """TTL Redis: hard TTL + cadangan stale-if-error (key dingin cadangannya ikut dipendekkan)"""
+        return ttl + int(self.stale_if_error * min(1.0, ttl / self.ttl))
+    
+    async def _save(self, kind: str, uuid: str, data: dict, ttl: int = None):
+        """Simpan detail ke L1 + Redis, lalu broadcast invalidasi L1 proses lain"""
+        key = f"{kind}:{uuid}"
+        ttl = ttl or self.ttl
+        now = time.time()
+        envelope = {'_swr': now + min(self.soft_ttl, ttl), '_exp': now + ttl, 'data': data}
+        value, size = codec.encode(envelope)
+        self.local.set(key, envelope, size, ttl)
+        
         if not self._connected:
             return False
         
         try:
-            key = f"gedung:{uuid}"
-            value = json.dumps(data, ensure_ascii=False)
-            await self._client.setex(key, self.ttl, value)
-            logger.info(f"✅ Cached gedung: {uuid}")
+            # Disimpan lebih lama dari hard TTL - cadangan kalau API down (stale-if-error)
+            await self._client.setex(key, self._retention(ttl), value)
+            await self._publish_invalidation(key)
+            logger.info(f"✅ Cached {kind}: {uuid}")
             return True
         except Exception as e:
-            logger.error(f"❌ Error save gedung {uuid}: {e}")
+            logger.error(f"❌ Error save {kind} {uuid}: {e}")
             self._connected = False
             return False
     
-    async def get_gedung(self, uuid: str) -> Optional[dict]:
-        """Ambil gedung dari cache - graceful fail"""
+    async def _get_entry(self, kind: str, uuid: str) -> Optional[CacheEntry]:
+        """Ambil detail dari L1, lalu Redis - graceful fail"""
+        key = f"{kind}:{uuid}"
+        envelope = self.local.get(key)
+        if envelope is not None:
+            logger.info(f"🎯 L1 HIT: {kind} {uuid}")
+            cache_lookup(kind, 'hit_l1')
+            return _unwrap(envelope)
+        
         if not self._connected:
+            cache_lookup(kind, 'miss')
             return None
         
         try:
-            key = f"gedung:{uuid}"
-            data = await self._client.get(key)
-            if data:
-                logger.info(f"🎯 Cache HIT: gedung {uuid}")
-                return json.loads(data)
-            logger.info(f"❌ Cache MISS: gedung {uuid}")
+            async with self._client.pipeline(transaction=False) as pipe:
+                pipe.get(key)
+                pipe.ttl(key)
+                value, ttl = await pipe.execute()
+            if value:
+                logger.info(f"🎯 Cache HIT: {kind} {uuid}")
+                cache_lookup(kind, 'hit_redis')
+                envelope, size = codec.decode(value)
+                self.local.set(key, envelope, size, ttl if ttl > 0 else self.ttl)
+                return _unwrap(envelope)
+            logger.info(f"❌ Cache MISS: {kind} {uuid}")
+            cache_lookup(kind, 'miss')
             return None
         except Exception as e:
-            logger.error(f"❌ Error get gedung {uuid}: {e}")
+            logger.error(f"❌ Error get {kind} {uuid}: {e}")
+            cache_lookup(kind, 'miss')
             self._connected = False
             return None
     
+    async def _save_many(self, kind: str, items: Dict[str, dict], ttls: Dict[str, int] = None):
+        """Simpan banyak detail dalam satu pipeline SETEX (TTL per key opsional) - graceful fail"""
+        if not items:
+            return True
+        
+        ttls = ttls or {}
+        values = {}
+        for uuid, data in items.items():
+            key = f"{kind}:{uuid}"
+            ttl = ttls.get(uuid, self.ttl)
+            now = time.time()
+            envelope = {'_swr': now + min(self.soft_ttl, ttl), '_exp': now + ttl, 'data': data}
+            value, size = codec.encode(envelope)
+            values[key] = (self._retention(ttl), value)
+            self.local.set(key, envelope, size, ttl)
+        
+        if not self._connected:
+            return False
+        
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                for key, (ttl, value) in values.items():
+                    pipe.setex(key, ttl, value)
+                    pipe.publish(INVALIDATE_CHANNEL, f"{self.instance_id}|{key}")
+                await pipe.execute()
+            logger.info(f"✅ Cached {len(values)} {kind}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error save_many {kind} ({len(values)}): {e}")
+            self._connected = False
+            return False
+    
+    async def _get_many_entries(self, kind: str, uuids: List[str], track: bool = True) -> Dict[str, CacheEntry]:
+        """Ambil banyak detail: L1 dulu, sisanya satu MGET (track False = tidak dihitung di metrics) - graceful fail"""
+        lookup = cache_lookup if track else _no_lookup
+        entries = {}
+        missing = []
+        for uuid in dict.fromkeys(uuids):
+            envelope = self.local.get(f"{kind}:{uuid}")
+            if envelope is not None:
+                entries[uuid] = _unwrap(envelope)
+            else:
+                missing.append(uuid)
+        lookup(kind, 'hit_l1', len(entries))
+        
+        if not missing or not self._connected:
+            lookup(kind, 'miss', len(missing))
+            return entries
+        
+        local_hits = len(entries)
+        total = len(entries) + len(missing)
+        keys = [f"{kind}:{uuid}" for uuid in missing]
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                pipe.mget(keys)
+                for key in keys:
+                    pipe.ttl(key)
+                values, *ttls = await pipe.execute()
+            
+            for uuid, key, value, ttl in zip(missing, keys, values, ttls):
+                if not value:
+                    continue
+                envelope, size = codec.decode(value)
+                self.local.set(key, envelope, size, ttl if ttl > 0 else self.ttl)
+                entries[uuid] = _unwrap(envelope)
+            logger.info(f"🎯 Cache get_many {kind}: {len(entries)}/{total} hit")
+            lookup(kind, 'hit_redis', len(entries) - local_hits)
+            lookup(kind, 'miss', total - len(entries))
+            return entries
+        except Exception as e:
+            logger.error(f"❌ Error get_many {kind} ({len(keys)}): {e}")
+            lookup(kind, 'miss', len(missing))
+            self._connected = False
+            return entries
+    
+    async def _get(self, kind: str, uuid: str) -> Optional[dict]:
+        entry = await self._get_entry(kind, uuid)
+        return entry.data if entry and not entry.expired else None
+    
+    # === GEDUNG ===
+    
+    async def save_gedung(self, uuid: str, data: dict, ttl: int = None):
+        """Simpan gedung ke cache (ttl None = CACHE_TTL) - graceful fail"""
+        return await self._save('gedung', uuid, data, ttl)
+    
+    @traced('cache.get_gedung')
+    async def get_gedung(self, uuid: str) -> Optional[dict]:
+        """Ambil gedung dari cache (fresh atau stale) - graceful fail"""
+        return await self._get('gedung', uuid)
+    
+    @traced('cache.get_gedung_entry')
+    async def get_gedung_entry(self, uuid: str) -> Optional[CacheEntry]:
+        """Ambil gedung + status stale (lewat soft TTL) - graceful fail"""
+        return await self._get_entry('gedung', uuid)
+    
+    async def save_gedung_many(self, items: Dict[str, dict], ttls: Dict[str, int] = None):
+        """Simpan banyak gedung {uuid: data} dalam satu round-trip - graceful fail"""
+        return await self._save_many('gedung', items, ttls)
+    
+    @traced('cache.get_gedung_many')
+    async def get_gedung_many(self, uuids: List[str], track: bool = True) -> Dict[str, dict]:
+        """Ambil banyak gedung -> {uuid: data} (yang miss tidak ada di dict) - graceful fail"""
+        entries = await self._get_many_entries('gedung', uuids, track)
+        return {uuid: entry.data for uuid, entry in entries.items() if not entry.expired}
+    
     # === UNIT ===
     
-    async def save_unit(self, uuid: str, data: dict):
-        """Simpan unit ke cache - graceful fail"""
+    async def save_unit(self, uuid: str, data: dict, ttl: int = None):
+        """Simpan unit ke cache (ttl None = CACHE_TTL) - graceful fail"""
+        return await self._save('unit', uuid, data, ttl)
+    
+    @traced('cache.get_unit')
+    async def get_unit(self, uuid: str) -> Optional[dict]:
+        """Ambil unit dari cache (fresh atau stale) - graceful fail"""
+        return await self._get('unit', uuid)
+    
+    @traced('cache.get_unit_entry')
+    async def get_unit_entry(self, uuid: str) -> Optional[CacheEntry]:
+        """Ambil unit + status stale (lewat soft TTL) - graceful fail"""
+        return await self._get_entry('unit', uuid)
+    
+    async def save_unit_many(self, items: Dict[str, dict], ttls: Dict[str, int] = None):
+        """Simpan banyak unit {uuid: data} dalam satu round-trip - graceful fail"""
+        return await self._save_many('unit', items, ttls)
+    
+    @traced('cache.get_unit_many')
+    async def get_unit_many(self, uuids: List[str], track: bool = True) -> Dict[str, dict]:
+        """Ambil banyak unit -> {uuid: data} (yang miss tidak ada di dict) - graceful fail"""
+        entries = await self._get_many_entries('unit', uuids, track)
+        return {uuid: entry.data for uuid, entry in entries.items() if not entry.expired}
+    
+    # === TELEGRAM FILE_ID (foto gedung / unit) ===
+    
+    def _file_id_key(self, url: str) -> str:
+        return f"tgfile:{hashlib.sha1(url.encode()).hexdigest()}"
+    
+    async def save_file_id(self, url: str, file_id: str):
+        """Simpan file_id Telegram untuk URL gambar - graceful fail"""
+        key = self._file_id_key(url)
+        self.local.set(key, file_id, len(file_id), self.file_id_ttl)
+        
         if not self._connected:
             return False
         
         try:
-            key = f"unit:{uuid}"
-            value = json.dumps(data, ensure_ascii=False)
-            await self._client.setex(key, self.ttl, value)
-            logger.info(f"✅ Cached unit: {uuid}")
+            await self._client.setex(key, self.file_id_ttl, file_id)
             return True
         except Exception as e:
-            logger.error(f"❌ Error save unit {uuid}: {e}")
+            logger.error(f"❌ Error save file_id: {e}")
             self._connected = False
             return False
     
-    async def get_unit(self, uuid: str) -> Optional[dict]:
-        """Ambil unit dari cache - graceful fail"""
+    @traced('cache.get_file_id')
+    async def get_file_id(self, url: str) -> Optional[str]:
+        """Ambil file_id Telegram untuk URL gambar - graceful fail"""
+        key = self._file_id_key(url)
+        file_id = self.local.get(key)
+        if file_id is not None:
+            return file_id
+        
+        if not self._connected:
+            return None
+        
+        try:
+            value = await self._client.get(key)
+            if not value:
+                return None
+            file_id = value.decode()
+            self.local.set(key, file_id, len(file_id), self.file_id_ttl)
+            return file_id
+        except Exception as e:
+            logger.error(f"❌ Error get file_id: {e}")
+            self._connected = False
+            return None
+    
+    async def delete_file_id(self, url: str):
+        """Hapus file_id yang ditolak Telegram - graceful fail"""
+        key = self._file_id_key(url)
+        self.local.delete(key)
+        
+        if not self._connected:
+            return False
+        
+        try:
+            await self._client.delete(key)
+            await self._publish_invalidation(key)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error delete file_id: {e}")
+            self._connected = False
+            return False
+    
+    # === RENDERED VIEW (key = content hash data sumber) ===
+    
+    @traced('cache.get_view')
+    async def get_view(self, key: str) -> Optional[dict]:
+        """Ambil view {caption, keyboard} - graceful fail"""
         if not self._connected:
             return None
         
         try:
-            key = f"unit:{uuid}"
-            data = await self._client.get(key)
-            if data:
-                logger.info(f"🎯 Cache HIT: unit {uuid}")
-                return json.loads(data)
-            logger.info(f"❌ Cache MISS: unit {uuid}")
+            value = await self._client.get(key)
+            return codec.decode(value)[0] if value else None
+        except Exception as e:
+            logger.error(f"❌ Error get view {key}: {e}")
+            self._connected = False
             return None
+    
+    async def save_view(self, key: str, view: dict):
+        """Simpan view {caption, keyboard} - graceful fail"""
+        if not self._connected:
+            return False
+        
+        try:
+            await self._client.setex(key, self.view_ttl, codec.encode(view)[0])
+            return True
         except Exception as e:
-            logger.error(f"❌ Error get unit {uuid}: {e}")
+            logger.error(f"❌ Error save view {key}: {e}")
             self._connected = False
+            return False
+    
+    # === SESSION USER ===
+    
+    @traced('cache.get_session')
+    async def get_session(self, user_id: int) -> Optional[dict]:
+        """Ambil session user - graceful fail"""
+        if not self._connected:
             return None
+        
+        try:
+            value = await self._client.get(f"session:{user_id}")
+            return codec.decode(value)[0] if value else None
+        except Exception as e:
+            logger.error(f"❌ Error get session {user_id}: {e}")
+            self._connected = False
+            return None
+    
+    async def save_sessions(self, items: Dict[int, dict], ttl: int):
+        """Simpan banyak session {user_id: session} dalam satu pipeline - graceful fail"""
+        if not items:
+            return True
+        if not self._connected:
+            return False
+        
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                for user_id, session in items.items():
+                    pipe.setex(f"session:{user_id}", ttl, codec.encode(session)[0])
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error save {len(items)} session: {e}")
+            self._connected = False
+            return False
+    
+    # === INVALIDASI L1 (pub/sub) ===
+    
+    async def _publish_invalidation(self, key: str):
+        await self._client.publish(INVALIDATE_CHANNEL, f"{self.instance_id}|{key}")
+    
+    def _run_event_hooks(self, key: str):
+        for hook in self.event_hooks:
+            try:
+                hook(key)
+            except Exception as e:
+                logger.error(f"❌ Event hook error {key}: {e}")
+    
+    async def _listen_invalidation(self):
+        """Subscriber: drop key L1 yang di-update proses lain"""
+        pubsub = self._client.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATE_CHANNEL, EVENT_CHANNEL)
+            while True:
+                # Poll dengan timeout - aman dengan socket_timeout pendek
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not message or message.get('type') != 'message':
+                    continue
+                payload = message['data']
+                if isinstance(payload, bytes):
+                    payload = payload.decode()
+                sender, _, key = payload.partition('|')
+                if _decode_key(message['channel']) == EVENT_CHANNEL:
+                    self._run_event_hooks(key)
+                    continue
+                if sender == self.instance_id:
+                    continue
+                if key.endswith('*'):
+                    self.local.delete_prefix(key[:-1])
+                else:
+                    self.local.delete(key)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ L1 invalidation listener stopped: {e}")
+            # Tanpa listener, L1 bisa basi - kosongkan supaya aman (health check start ulang)
+            self.local.clear()
+        finally:
+            try:
+                await pubsub.close()
+            except Exception:
+                pass
+    
+    async def revalidate_local(self, keys: List[str]) -> int:
+        """
+        Entry L1 yang dipulihkan dari disk hanya dipertahankan kalau Redis masih menyimpan versi
+        yang sama (_exp sama) - invalidasi / update selama proses mati terlewat. Return jumlah yang tersisa.
+        """
+        if not keys:
+            return 0
+        if not self._connected:
+            for key in keys:
+                self.local.delete(key)
+            return 0
+        
+        try:
+            values = await self._client.mget(keys)
+        except Exception as e:
+            logger.error(f"❌ Error revalidate L1 ({len(keys)}): {e}")
+            self._connected = False
+            values = [None] * len(keys)
+        
+        kept = 0
+        for key, value in zip(keys, values):
+            restored = self.local.peek(key)
+            if restored is not None and value and codec.decode(value)[0].get('_exp') == restored.get('_exp'):
+                kept += 1
+            else:
+                # Dihapus / diganti versi lain di Redis - dibaca ulang dari Redis saat dipakai
+                self.local.delete(key)
+        return kept
+    
+    # === FREKUENSI AKSES (hot key) ===
+    
+    async def record_access(self, kind: str, counts: Dict[str, int], max_keys: int = 10000) -> bool:
+        """ZINCRBY hot:{kind} per uuid (satu pipeline), ZSET dipangkas ke max_keys teratas - graceful fail"""
+        if not counts or not self._connected:
+            return not counts
+        
+        key = f"hot:{kind}"
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                for uuid, count in counts.items():
+                    pipe.zincrby(key, count, uuid)
+                pipe.zremrangebyrank(key, 0, -(max_keys + 1))
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error record access {kind}: {e}")
+            self._connected = False
+            return False
+    
+    async def top_accessed(self, kind: str, n: int, with_scores: bool = False) -> list:
+        """uuid paling sering diakses (lintas proses + restart), opsional [(uuid, skor)] - graceful fail"""
+        if n <= 0 or not self._connected:
+            return []
+        
+        try:
+            rows = await self._client.zrevrange(f"hot:{kind}", 0, n - 1, withscores=with_scores)
+            if with_scores:
+                return [(_decode_key(uuid), float(score)) for uuid, score in rows]
+            return [_decode_key(uuid) for uuid in rows]
+        except Exception as e:
+            logger.error(f"❌ Error top accessed {kind}: {e}")
+            self._connected = False
+            return []
+    
+    async def decay_access(self, kinds: List[str], half_life: float, min_score: float) -> bool:
+        """
+        Skor hot:{kind} diluruhkan sesuai waktu sejak decay terakhir (timestamp di hot:decayed_at),
+        skor di bawah min_score dibuang. Caller memastikan hanya satu proses yang menjalankan.
+        """
+        if not self._connected:
+            return False
+        
+        try:
+            now = time.time()
+            last = await self._client.set('hot:decayed_at', now, get=True)
+            if last is None:
+                return True
+            factor = 0.5 ** (max(0.0, now - float(last)) / half_life)
+            async with self._client.pipeline(transaction=False) as pipe:
+                for kind in kinds:
+                    key = f"hot:{kind}"
+                    pipe.zunionstore(key, {key: factor})
+                    pipe.zremrangebyscore(key, '-inf', f"({min_score}")
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error decay access: {e}")
+            self._connected = False
+            return False
+    
+    async def refresh_due(self, kind: str, uuids: List[str], ahead: float) -> List[str]:
+        """uuid yang tidak ada di cache / soft TTL-nya habis dalam `ahead` detik (tanpa metrics/L1) - graceful fail"""
+        due = []
+        missing = []
+        now = time.time()
+        for uuid in uuids:
+            envelope = self.local.peek(f"{kind}:{uuid}")
+            if envelope is None:
+                missing.append(uuid)
+            elif envelope.get('_swr', now) - now < ahead:
+                due.append(uuid)
+        
+        if not missing or not self._connected:
+            return due
+        
+        try:
+            values = await self._client.mget([f"{kind}:{uuid}" for uuid in missing])
+            for uuid, value in zip(missing, values):
+                envelope = codec.decode(value)[0] if value else None
+                if envelope is None or envelope.get('_swr', now) - now < ahead:
+                    due.append(uuid)
+            return due
+        except Exception as e:
+            logger.error(f"❌ Error refresh due {kind} ({len(missing)}): {e}")
+            self._connected = False
+            return due
+    
+    # === INVALIDASI EVENT (backend) ===
+    
+    async def invalidate(self, kind: str, uuids: List[str]) -> bool:
+        """Hapus detail gedung/unit dari L1 + Redis + L1 proses lain - graceful fail"""
+        keys = [f"{kind}:{uuid}" for uuid in dict.fromkeys(uuids)]
+        for key in keys:
+            self.local.delete(key)
+        
+        if not keys or not self._connected:
+            return not keys
+        
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                pipe.delete(*keys)
+                for key in keys:
+                    pipe.publish(INVALIDATE_CHANNEL, f"{self.instance_id}|{key}")
+                    pipe.publish(EVENT_CHANNEL, f"{self.instance_id}|{key}")
+                deleted, *_ = await pipe.execute()
+            logger.info(f"🧹 Invalidated {kind}: {deleted}/{len(keys)} key di Redis")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error invalidate {kind} ({len(keys)}): {e}")
+            self._connected = False
+            return False
+    
+    async def invalidate_all(self, kind: str, batch: int = 500) -> bool:
+        """Hapus semua key satu jenis (SCAN + DEL per batch) - untuk update massal"""
+        self.local.delete_prefix(f"{kind}:")
+        if not self._connected:
+            return False
+        
+        try:
+            deleted = 0
+            keys = []
+            async for key in self._client.scan_iter(match=f"{kind}:*", count=batch):
+                keys.append(key)
+                if len(keys) >= batch:
+                    deleted += await self._client.delete(*keys)
+                    keys = []
+            if keys:
+                deleted += await self._client.delete(*keys)
+            await self._publish_invalidation(f"{kind}:*")
+            await self._client.publish(EVENT_CHANNEL, f"{self.instance_id}|{kind}:*")
+            logger.info(f"🧹 Invalidated semua {kind}: {deleted} key")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error invalidate_all {kind}: {e}")
+            self._connected = False
+            return False
+    
+    async def invalidate_nearby(self, uuids: List[str]) -> bool:
+        """Hapus cell nearby yang hasilnya memuat gedung ini (lewat nearby:ref:{uuid}) - graceful fail"""
+        refs = [f"nearby:ref:{uuid}" for uuid in dict.fromkeys(uuids)]
+        if not refs or not self._connected:
+            return not refs
+        
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                for ref in refs:
+                    pipe.smembers(ref)
+                members = await pipe.execute()
+            keys = {key for cells in members for key in cells}
+            await self._client.delete(*refs, *keys)
+            if keys:
+                logger.info(f"🧹 Invalidated nearby: {len(keys)} cell")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error invalidate nearby ({len(refs)}): {e}")
+            self._connected = False
+            return False
+    
+    async def read_events(self, stream: str, group: str, consumer: str, last_id: str = '>',
+                          count: int = 100, block_ms: int = 500) -> Optional[list]:
+        """
+        XREADGROUP dari stream event backend (group dibuat kalau belum ada) - graceful fail (None).
+        last_id '>' = event baru, '0' = event milik consumer ini yang belum di-ack.
+        """
+        if not self._connected:
+            return None
+        
+        try:
+            if (stream, group) not in self._stream_groups:
+                try:
+                    # id '0' - event yang antre sebelum bot pertama kali jalan ikut diproses
+                    await self._client.xgroup_create(stream, group, id='0', mkstream=True)
+                    logger.info(f"📮 Consumer group {group} dibuat di stream {stream}")
+                except redis.ResponseError as e:
+                    if 'BUSYGROUP' not in str(e):
+                        raise
+                self._stream_groups.add((stream, group))
+            
+            response = await self._client.xreadgroup(group, consumer, {stream: last_id},
+                                                     count=count, block=block_ms)
+            return [(entry_id, fields) for _, entries in response or [] for entry_id, fields in entries]
+        except redis.ResponseError as e:
+            # Mis. NOGROUP setelah Redis kehilangan data - group dibuat ulang di call berikutnya
+            logger.error(f"❌ Error read stream {stream}: {e}")
+            self._stream_groups.discard((stream, group))
+            return None
+        except Exception as e:
+            logger.error(f"❌ Error read stream {stream}: {e}")
+            self._connected = False
+            return None
+    
+    async def ack_events(self, stream: str, group: str, ids: list) -> bool:
+        """XACK event yang sudah diproses - graceful fail"""
+        if not ids or not self._connected:
+            return not ids
+        
+        try:
+            await self._client.xack(stream, group, *ids)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error ack stream {stream}: {e}")
+            self._connected = False
+            return False
+    
+    # === NEARBY ===
+    
+    def _nearby_key(self, lat: float, long: float, radius: int) -> str:
+        return f"nearby:{geohash(lat, long, self.nearby_precision)}:{radius}"
+    
+    async def save_nearby(self, lat: float, long: float, radius: int, data: dict):
+        """Simpan hasil nearby per geo-cell + radius - graceful fail"""
+        if not self._connected or not data.get('success'):
+            return False
+        
+        try:
+            key = self._nearby_key(lat, long, radius)
+            value, _ = codec.encode({
+                'lat': lat,
+                'long': long,
+                'radius': radius,
+                'data': data
+            })
+            async with self._client.pipeline(transaction=False) as pipe:
+                pipe.setex(key, self.nearby_ttl, value)
+                # Reverse index gedung -> cell, supaya event gedung bisa menghapus cell yang memuatnya
+                for uuid in {g['uuid'] for g in data.get('results', []) if g.get('uuid')}:
+                    pipe.sadd(f"nearby:ref:{uuid}", key)
+                    pipe.expire(f"nearby:ref:{uuid}", self.nearby_ttl)
+                await pipe.execute()
+            logger.info(f"✅ Cached nearby: {key}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error save nearby r={radius}: {e}")
+            self._connected = False
+            return False
+    
+    @traced('cache.get_nearby')
+    async def get_nearby(self, lat: float, long: float, radius: int) -> Optional[dict]:
+        """
+        Ambil hasil nearby dari cache - graceful fail.
+        Radius kecil dijawab dari hasil radius besar di cell yang sama (filter haversine).
+        """
+        if not self._connected:
+            cache_lookup('nearby', 'miss')
+            return None
+        
+        # Radius yang diminta dulu, lalu preset yang lebih besar (paling kecil dulu)
+        radii = [radius] + [r for r in self.nearby_radii if r > radius]
+        keys = [self._nearby_key(lat, long, r) for r in radii]
+        
+        try:
+            values = await self._client.mget(keys)
+            for key, value in zip(keys, values):
+                if not value:
+                    continue
+                data = _narrow_nearby(codec.decode(value)[0], lat, long, radius)
+                if data is not None:
+                    logger.info(f"🎯 Cache HIT: nearby r={radius} dari {key}")
+                    cache_lookup('nearby', 'hit_redis')
+                    return data
+            logger.info(f"❌ Cache MISS: nearby r={radius}")
+            cache_lookup('nearby', 'miss')
+            return None
+        except Exception as e:
+            logger.error(f"❌ Error get nearby r={radius}: {e}")
+            cache_lookup('nearby', 'miss')
+            self._connected = False
+            return None
+
+    
+    # === LOCK (single-flight lintas proses) ===
+    
+    _RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
+    _EXTEND_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+    )
+    
+    async def acquire_lock(self, name: str, ttl_ms: int) -> Optional[str]:
+        """SET NX PX - return token kalau dapat lock, None kalau tidak - graceful fail"""
+        if not self._connected:
+            return None
+        
+        try:
+            token = secrets.token_hex(8)
+            if await self._client.set(name, token, nx=True, px=ttl_ms):
+                return token
+            return None
+        except Exception as e:
+            logger.error(f"❌ Error acquire lock {name}: {e}")
+            self._connected = False
+            return None
+    
+    async def release_lock(self, name: str, token: str):
+        """Lepas lock hanya kalau masih milik token ini - graceful fail"""
+        if not self._connected:
+            return False
+        
+        try:
+            return bool(await self._client.eval(self._RELEASE_SCRIPT, 1, name, token))
+        except Exception as e:
+            logger.error(f"❌ Error release lock {name}: {e}")
+            self._connected = False
+            return False
+    
+    async def extend_lock(self, name: str, token: str, ttl_ms: int) -> bool:
+        """Perpanjang lock hanya kalau masih milik token ini - graceful fail"""
+        if not self._connected:
+            return False
+        
+        try:
+            return bool(await self._client.eval(self._EXTEND_SCRIPT, 1, name, token, ttl_ms))
+        except Exception as e:
+            logger.error(f"❌ Error extend lock {name}: {e}")
+            self._connected = False
+            return False
+    
+    async def lock_exists(self, name: str) -> bool:
+        """Cek lock masih dipegang proses lain - graceful fail"""
+        if not self._connected:
+            return False
+        
+        try:
+            return bool(await self._client.exists(name))
+        except Exception as e:
+            logger.error(f"❌ Error check lock {name}: {e}")
+            self._connected = False
+            return False
+
+
+def _no_lookup(*args):
+    """Pengganti cache_lookup untuk lookup internal (prefetch, warm-up) - hit ratio hanya dari user"""
+
+
+def _decode_key(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _narrow_nearby(entry: dict, lat: float, long: float, radius: int) -> Optional[dict]:
+    """Turunkan hasil nearby radius R (dari titik asal entry) ke radius <= R di titik (lat, long)"""
+    data = entry['data']
+    results = data.get('results', [])
+    cached_radius = entry['radius']
+    offset = haversine(entry['lat'], entry['long'], lat, long)
+    
+    # Lingkaran baru harus seluruhnya di dalam lingkaran yang di-cache
+    if offset + radius > cached_radius:
+        return None
+    
+    # API memotong list hasil - subset tidak bisa dijamin lengkap
+    if data.get('count', len(results)) > len(results) and radius != cached_radius:
+        return None
+    
+    if offset < 1:
+        # Titik sama - cukup pakai distance dari API
+        subset = [g for g in results if g['distance'] <= radius]
+    else:
+        subset = []
+        for g in results:
+            if g.get('lat') is None or g.get('long') is None:
+                return None
+            distance = haversine(lat, long, float(g['lat']), float(g['long']))
+            if distance <= radius:
+                subset.append({**g, 'distance': distance})
+        subset.sort(key=lambda g: g['distance'])
+    
+    return {**data, 'results': subset, 'count': len(subset), 'radius': radius}
 
 
 # Global cache instance
@@ -144,25 +1128,50 @@ class RedisLifecycle:
     @staticmethod
     async def post_init(app: Application):
         """Dipanggil setelah bot initialize - setup Redis"""
-        from config import REDIS_URL, REDIS_HOST, REDIS_PORT, CACHE_TTL
+        from config import (REDIS_URL, REDIS_HOST, REDIS_PORT, REDIS_FALLBACK_URLS, REDIS_SENTINELS,
+                            REDIS_SENTINEL_MASTER, REDIS_MAX_CONNECTIONS, REDIS_SOCKET_TIMEOUT,
+                            REDIS_CONNECT_TIMEOUT, REDIS_HEALTH_INTERVAL, REDIS_RECONNECT_MAX,
+                            CACHE_TTL, CACHE_SOFT_TTL,
+                            NEARBY_CACHE_TTL, NEARBY_GEOHASH_PRECISION, RADIUS_OPTIONS,
+                            CACHE_STALE_IF_ERROR, L1_MAX_BYTES, L1_TTL, FILE_ID_TTL, VIEW_CACHE_TTL,
+                            CACHE_CODEC, CACHE_COMPRESSION, CACHE_COMPRESS_MIN)
         
         logger.info("🔧 Initializing Redis cache...")
         
         cache.redis_url = REDIS_URL
         cache.host = REDIS_HOST
         cache.port = REDIS_PORT
+        cache.fallback_urls = REDIS_FALLBACK_URLS
+        cache.sentinels = REDIS_SENTINELS
+        cache.sentinel_master = REDIS_SENTINEL_MASTER
+        cache.max_connections = REDIS_MAX_CONNECTIONS
+        cache.socket_timeout = REDIS_SOCKET_TIMEOUT
+        cache.connect_timeout = REDIS_CONNECT_TIMEOUT
+        cache.health_interval = REDIS_HEALTH_INTERVAL
+        cache.reconnect_max = REDIS_RECONNECT_MAX
         cache.ttl = CACHE_TTL
+        cache.soft_ttl = min(CACHE_SOFT_TTL, CACHE_TTL)
+        cache.stale_if_error = CACHE_STALE_IF_ERROR
+        cache.nearby_ttl = NEARBY_CACHE_TTL
+        cache.nearby_precision = NEARBY_GEOHASH_PRECISION
+        cache.nearby_radii = sorted(RADIUS_OPTIONS)
+        cache.file_id_ttl = FILE_ID_TTL
+        cache.view_ttl = VIEW_CACHE_TTL
+        cache.local.max_bytes = L1_MAX_BYTES
+        cache.local.ttl = L1_TTL
+        codec.configure(CACHE_CODEC, CACHE_COMPRESSION, CACHE_COMPRESS_MIN)
         
         try:
             await cache.connect()
             logger.info("✅ Redis cache ready")
         except Exception as e:
             logger.error(f"❌ Redis connection failed: {e}")
-            logger.warning("⚠️ Bot will run without cache - All requests will use API")
+            logger.warning("⚠️ Bot will run without cache until Redis is reachable - reconnect di background")
     
     @staticmethod
     async def post_shutdown(app: Application):
         """Dipanggil sebelum bot shutdown - cleanup Redis"""
+        logger.info(f"📊 L1 cache stats: {cache.local.stats()}")
         try:
             await cache.close()
         except Exception as e:
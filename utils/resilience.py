@@ -0,0 +1,112 @@
+# utils/resilience.py
+"""
+Building block resilience untuk upstream (API DKKM):
+- CircuitBreaker: setelah N kegagalan beruntun -> open (fail fast) selama open_timeout,
+  lalu half-open (satu probe) -> closed kalau sukses
+- backoff: jeda retry exponential dengan full jitter
+- hedged: request kedua kalau yang pertama belum selesai setelah delay, ambil yang duluan sukses
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable
+
+from utils.metrics import CIRCUIT_STATE
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Circuit breaker per backend (bukan per endpoint - satu backend Django yang sama)"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, open_timeout: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_timeout = open_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = CLOSED
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self.opened_at >= self.open_timeout:
+            self._set(HALF_OPEN)
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """Backend dianggap down (request baru akan ditolak)"""
+        return self.state == OPEN or (self._state == HALF_OPEN and self._probing)
+
+    def _set(self, state: str):
+        if state != self._state:
+            logger.warning(f"🔌 Circuit {self.name}: {self._state} -> {state}")
+        self._state = state
+        CIRCUIT_STATE.labels(self.name).set(_STATE_VALUE[state])
+
+    def allow(self) -> bool:
+        """Boleh kirim request? Half-open hanya mengizinkan satu probe sekaligus"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def abort(self):
+        """Request dibatalkan tanpa hasil - lepas slot probe"""
+        self._probing = False
+
+    def success(self):
+        self.failures = 0
+        self._probing = False
+        if self._state != CLOSED:
+            self._set(CLOSED)
+
+    def failure(self):
+        self.failures += 1
+        self._probing = False
+        if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set(OPEN)
+
+
+def backoff(attempt: int, base: float = 0.1, cap: float = 1.0) -> float:
+    """Full jitter: uniform(0, min(cap, base * 2^attempt))"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+async def hedged(fn: Callable[[], Awaitable], delay: float, on_hedge: Callable[[], None] = None):
+    """
+    Jalankan fn(); kalau belum selesai setelah delay detik, jalankan fn() kedua.
+    Hasil sukses pertama dipakai, sisanya di-cancel. Error hanya di-raise kalau semua gagal.
+    """
+    tasks = {asyncio.ensure_future(fn())}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            if on_hedge:
+                on_hedge()
+            tasks.add(asyncio.ensure_future(fn()))
+
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # Yang kalah (atau semua, kalau caller di-cancel) dibatalkan
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,126 @@
+# utils/session_store.py
+"""
+Session per user di Redis (session:{user_id}) - pengganti context.user_data.
+
+Yang disimpan hanya state kecil: lokasi, parameter pencarian terakhir, uuid gedung aktif.
+Object lengkap (hasil nearby, detail gedung) di-rehydrate lewat utils.loader dari cache.
+Write-behind: perubahan ditampung di LRU lokal dan di-flush berkala dalam satu pipeline.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Optional
+from telegram.ext import Application
+
+from utils.redis_manager import cache
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """LRU lokal (write-behind) di depan Redis"""
+
+    def __init__(self, ttl: int = 7 * 86400, max_local: int = 1000, flush_interval: float = 2.0):
+        self.ttl = ttl
+        self.max_local = max_local
+        self.flush_interval = flush_interval
+        self._local = OrderedDict()  # user_id -> dict
+        self._dirty = set()
+        self._task: Optional[asyncio.Task] = None
+
+    async def get(self, user_id: int) -> dict:
+        """Session user - lokal dulu, lalu Redis, kosong kalau tidak ada"""
+        session = self._local.get(user_id)
+        if session is not None:
+            self._local.move_to_end(user_id)
+            return session
+
+        session = await cache.get_session(user_id) or {}
+        # Bisa sudah diisi coroutine lain selama menunggu Redis
+        return self._local.setdefault(user_id, session)
+
+    async def update(self, user_id: int, **fields):
+        """Ubah field session - ditulis ke Redis pada flush berikutnya"""
+        session = await self.get(user_id)
+        session.update(fields)
+        self._dirty.add(user_id)
+
+    def dump(self) -> list:
+        """[(user_id, session, dirty)] - untuk snapshot disk saat shutdown"""
+        return [(uid, session, uid in self._dirty) for uid, session in self._local.items()]
+
+    def restore(self, items: list):
+        """Muat session dari snapshot disk (yang belum sempat ke Redis ditandai dirty)"""
+        for uid, session, dirty in items:
+            if uid in self._local:
+                continue
+            self._local[uid] = session
+            if dirty:
+                self._dirty.add(uid)
+
+    async def flush(self):
+        """Tulis semua session dirty dalam satu pipeline, lalu trim LRU lokal"""
+        if self._dirty and cache.connected:
+            dirty = {uid: self._local[uid] for uid in self._dirty if uid in self._local}
+            self._dirty.clear()
+            if not await cache.save_sessions(dirty, self.ttl):
+                # Coba lagi di flush berikutnya
+                self._dirty.update(dirty)
+
+        # Hanya buang session yang sudah tersimpan (tanpa Redis: buang yang paling lama)
+        excess = len(self._local) - self.max_local
+        for uid in list(self._local):
+            if excess <= 0:
+                break
+            if uid in self._dirty and cache.connected:
+                continue
+            del self._local[uid]
+            self._dirty.discard(uid)
+            excess -= 1
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Session flush loop error: {e}")
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# Global session store instance
+sessions = SessionStore()
+
+
+# === LIFECYCLE MANAGER ===
+
+class SessionLifecycle:
+    """Lifecycle manager untuk session store - dipakai di main.py"""
+
+    @staticmethod
+    async def post_init(app: Application):
+        """Dipanggil setelah bot initialize - start write-behind flush"""
+        from config import SESSION_TTL, SESSION_MAX_LOCAL, SESSION_FLUSH_INTERVAL
+
+        sessions.ttl = SESSION_TTL
+        sessions.max_local = SESSION_MAX_LOCAL
+        sessions.flush_interval = SESSION_FLUSH_INTERVAL
+        sessions.start()
+
+    @staticmethod
+    async def post_shutdown(app: Application):
+        """Dipanggil sebelum bot shutdown - flush session terakhir (sebelum Redis ditutup)"""
+        await sessions.stop()
@@ -0,0 +1,84 @@
+# utils/singleflight.py
+"""
+Single-flight: satu fetch in-flight per key, semua waiter concurrent dapat hasil yang sama.
+Opsional lock Redis supaya beberapa proses bot juga saling menunggu.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from utils.redis_manager import cache
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalescing fetch per key - lokal (asyncio) + opsional lintas proses (Redis lock)"""
+
+    def __init__(self, distributed: bool = False, lock_ttl_ms: int = 5000, poll_interval: float = 0.05):
+        self.distributed = distributed
+        self.lock_ttl_ms = lock_ttl_ms
+        self.poll_interval = poll_interval
+        self._inflight = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable],
+                 recheck: Optional[Callable[[], Awaitable]] = None):
+        """
+        Jalankan fn() sekali untuk key ini. Caller lain dengan key sama menunggu hasil/exception yang sama.
+        recheck() dipakai saat menunggu lock proses lain (biasanya cache.get_*).
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, fn, recheck))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            logger.info(f"🔗 Coalesced: {key}")
+
+        # shield - waiter yang di-cancel tidak membatalkan fetch untuk waiter lain
+        return await asyncio.shield(task)
+
+    async def settle(self, keys):
+        """Tunggu fetch in-flight untuk key ini selesai (hasil/error diabaikan)"""
+        tasks = [self._inflight[key] for key in keys if key in self._inflight]
+        if tasks:
+            await asyncio.wait(tasks)
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Tandai exception sudah dibaca kalau semua waiter sudah pergi
+        if not task.cancelled():
+            task.exception()
+
+    async def _run(self, key: str, fn, recheck):
+        if not self.distributed or not cache.connected:
+            return await fn()
+
+        lock_name = f"lock:{key}"
+        token = await cache.acquire_lock(lock_name, self.lock_ttl_ms)
+        if token:
+            try:
+                return await fn()
+            finally:
+                await cache.release_lock(lock_name, token)
+
+        # Proses lain sedang fetch - tunggu hasilnya muncul di cache
+        deadline = time.monotonic() + self.lock_ttl_ms / 1000
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            if recheck:
+                value = await recheck()
+                if value is not None:
+                    logger.info(f"🔗 Coalesced (remote): {key}")
+                    return value
+            if not await cache.lock_exists(lock_name):
+                break
+
+        # Lock hilang tanpa hasil (fetch gagal / expired) - fetch sendiri
+        return await fn()
+
+
+# Global single-flight instance
+singleflight = SingleFlight()
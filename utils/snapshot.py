@@ -0,0 +1,440 @@
+# utils/snapshot.py
+"""
+Snapshot lokal dataset gedung + unit (SQLite) dengan sync inkremental:
+- sync pertama tarik semua (GET /gedung?detail=1, GET /unit?detail=1), berikutnya hanya delta
+  (updated_since = updated_at terbesar yang sudah disimpan)
+- loader baca snapshot dulu -> API hampir tidak dipakai untuk read
+- backend lambat / down: snapshot tetap dilayani (lewat max_age hanya sebagai fallback)
+- spatial index nearby dibangun dari gedung di snapshot (tanpa list API terpisah)
+
+Row dengan "deleted": true dihapus dari snapshot. Tanpa updated_at di response, setiap sync jadi full sync.
+
+Cluster webhook: satu file untuk semua worker. Hanya pemegang lock Redis SYNC_LOCK yang sync (dan menulis),
+worker lain membuka file read-only dan mengikuti meta synced_at / index_at / full:{kind}.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from telegram.ext import Application
+
+from utils.codec import codec
+from utils.metrics import SNAPSHOT_ROWS, SNAPSHOT_SYNCS, cache_lookup
+from utils.spatial_index import gedung_index
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('gedung', 'unit')
+SYNC_LOCK = 'lock:snapshot:sync'
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS items ("
+    " kind TEXT NOT NULL, uuid TEXT NOT NULL, updated_at TEXT, data BLOB NOT NULL,"
+    " PRIMARY KEY (kind, uuid)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+)
+
+
+class SnapshotStore:
+    """SQLite (WAL): read di event loop (lookup primary key, <1ms), write di thread"""
+
+    def __init__(self, path: str = 'snapshot.db', max_age: int = 3600, concurrency: int = 8):
+        self.path = path
+        self.max_age = max_age
+        self.concurrency = concurrency
+        self.synced_at = 0.0
+        self.writable = False
+        self._reader: Optional[sqlite3.Connection] = None  # event loop
+        self._conn: Optional[sqlite3.Connection] = None  # thread - read-write hanya di worker yang sync
+        self._dirty: Dict[str, Set[str]] = {kind: set() for kind in KINDS}
+        self._resetting: Dict[str, float] = {}  # kind yang menunggu full sync (sejak) - tidak dilayani dulu
+        self._index_at = 0.0
+        self._token: Optional[str] = None
+        self._events: Dict[str, Set[str]] = {kind: set() for kind in KINDS}
+        self._events_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()  # satu operasi thread sekaligus
+        self.wake = asyncio.Event()
+
+    # === STORAGE ===
+
+    def open(self, writable: bool = True):
+        """Read-only: file + schema harus sudah dibuat worker yang sync (sqlite3.Error kalau belum)"""
+        uri = f"{Path(self.path).absolute().as_uri()}?mode=ro"
+        try:
+            if writable:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                for statement in _SCHEMA:
+                    self._conn.execute(statement)
+            else:
+                self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None)
+            self._reader = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self.writable = writable
+
+            self.synced_at = float(self._meta('synced_at') or 0)
+            self._index_at = float(self._meta('index_at') or 0)
+            self._update_gauges()
+        except sqlite3.Error:
+            self.close()
+            raise
+
+    def close(self):
+        for conn in (self._reader, self._conn):
+            if conn:
+                conn.close()
+        self._reader = None
+        self._conn = None
+        self.writable = False
+
+    async def reopen(self, writable: bool):
+        """Ganti peran (worker yang sync berpindah) - tidak ada operasi thread yang sedang jalan"""
+        async with self._lock:
+            self.close()
+            self.open(writable)
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _update_gauges(self):
+        for kind in KINDS:
+            count = self._conn.execute("SELECT COUNT(*) FROM items WHERE kind = ?", (kind,)).fetchone()[0]
+            SNAPSHOT_ROWS.labels(kind).set(count)
+
+    async def _run(self, fn, *args):
+        """Operasi writer di thread, serial"""
+        async with self._lock:
+            return await asyncio.to_thread(fn, *args)
+
+    @property
+    def opened(self) -> bool:
+        return self._reader is not None
+
+    def is_fresh(self) -> bool:
+        return self.synced_at > 0 and (time.time() - self.synced_at) <= self.max_age
+
+    def get(self, kind: str, uuid: str, fresh_only: bool = True) -> Optional[dict]:
+        """Detail dari snapshot (None kalau tidak ada / snapshot terlalu lama dan fresh_only)"""
+        if self._reader is None or kind in self._resetting or (fresh_only and not self.is_fresh()):
+            return None
+        try:
+            row = self._reader.execute(
+                "SELECT data FROM items WHERE kind = ? AND uuid = ?", (kind, uuid)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"❌ Error read snapshot {kind} {uuid}: {e}")
+            return None
+        if row is None:
+            return None
+        cache_lookup(kind, 'hit_snapshot')
+        return codec.decode(row[0])[0]
+
+    def all(self, kind: str) -> List[dict]:
+        rows = self._conn.execute("SELECT data FROM items WHERE kind = ?", (kind,)).fetchall()
+        return [codec.decode(row[0])[0] for row in rows]
+
+    def _write(self, kind: str, rows: List[dict], deleted: List[str], full: bool, cursor: Optional[str]):
+        """Satu transaksi per kind - reader tidak pernah melihat snapshot setengah jadi"""
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            if full:
+                conn.execute("DELETE FROM items WHERE kind = ?", (kind,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO items (kind, uuid, updated_at, data) VALUES (?, ?, ?, ?)",
+                [(kind, row['uuid'], row.get('updated_at'), codec.encode(row)[0]) for row in rows]
+            )
+            if deleted:
+                conn.executemany("DELETE FROM items WHERE kind = ? AND uuid = ?",
+                                 [(kind, uuid) for uuid in deleted])
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                         (f"cursor:{kind}", cursor))
+            if full:
+                # Worker read-only melayani kind ini lagi setelah reset
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                             (f"full:{kind}", str(time.time())))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _mark_synced(self, index: bool):
+        self.synced_at = time.time()
+        rows = [('synced_at', str(self.synced_at))]
+        if index:
+            # Gedung berubah - worker read-only ikut membangun ulang spatial index
+            self._index_at = self.synced_at
+            rows.append(('index_at', str(self._index_at)))
+        self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", rows)
+        self._update_gauges()
+
+    # === SYNC ===
+
+    async def sync(self):
+        """Full sync (belum ada cursor) atau delta, lalu rebuild spatial index kalau gedung berubah"""
+        from utils.api_client import api
+
+        start = time.perf_counter()
+        gedung_changed = False
+        for kind in KINDS:
+            cursor = await self._run(self._meta, f"cursor:{kind}")
+            rows = await api.list_changes(kind, cursor)
+            deleted = [row['uuid'] for row in rows if row.get('deleted')]
+            rows = [row for row in rows if not row.get('deleted') and row.get('uuid')]
+
+            stamps = [row['updated_at'] for row in rows if row.get('updated_at')]
+            new_cursor = max(stamps + ([cursor] if cursor else [])) if stamps else cursor
+            full = cursor is None
+            # updated_since inklusif - row di batas cursor selalu ikut terkirim lagi
+            changed = [row for row in rows if full or (row.get('updated_at') or '') > cursor]
+
+            await self._run(self._write, kind, rows, deleted, full, new_cursor)
+            # Row yang baru masuk sudah versi terbaru - tidak perlu di-fetch ulang
+            self._dirty[kind].difference_update(row['uuid'] for row in rows)
+            if full:
+                self._resetting.pop(kind, None)
+            gedung_changed |= kind == 'gedung' and bool(full or changed or deleted)
+
+            SNAPSHOT_SYNCS.labels('full' if full else 'delta', 'ok').inc()
+            if full or changed or deleted:
+                logger.info(f"💾 Snapshot {kind}: {'full' if full else 'delta'} {len(changed)} row, "
+                            f"{len(deleted)} dihapus")
+
+        await self._refetch_dirty()
+        await self._run(self._mark_synced, gedung_changed)
+        if gedung_changed or len(gedung_index) == 0:
+            await self.load_index()
+        else:
+            gedung_index.loaded_at = time.time()
+        logger.debug(f"💾 Snapshot synced ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    async def load_index(self):
+        rows = await self._run(self.all, 'gedung')
+        if rows:
+            gedung_index.load(rows)
+            gedung_index.loaded_at = self.synced_at
+            logger.info(f"🗺️ Spatial index dari snapshot: {len(gedung_index)} gedung")
+
+    async def reload(self):
+        """Worker read-only: ikuti hasil sync worker lain lewat meta"""
+        meta = dict(await self._run(lambda: self._conn.execute("SELECT key, value FROM meta").fetchall()))
+        for kind, since in list(self._resetting.items()):
+            if float(meta.get(f"full:{kind}") or 0) > since:
+                del self._resetting[kind]
+
+        self.synced_at = float(meta.get('synced_at') or 0)
+        index_at = float(meta.get('index_at') or 0)
+        if index_at != self._index_at:
+            self._index_at = index_at
+            await self.load_index()
+        elif len(gedung_index):
+            gedung_index.loaded_at = self.synced_at
+        await self._run(self._update_gauges)
+
+    async def mark_dirty(self, kind: str, uuids: List[str]):
+        """Event invalidasi: hapus dari snapshot, fetch ulang di sync berikutnya (worker yang sync saja)"""
+        if not self.writable or kind not in KINDS:
+            return
+        uuids = list(dict.fromkeys(uuids))
+        self._dirty[kind].update(uuids)
+        await self._run(self._conn.executemany, "DELETE FROM items WHERE kind = ? AND uuid = ?",
+                        [(kind, uuid) for uuid in uuids])
+
+    async def reset(self, kind: str):
+        """Update massal: cursor dibuang, kind ini tidak dilayani sampai full sync berikutnya (segera)"""
+        if self._reader is None or kind not in KINDS:
+            return
+        self._resetting[kind] = time.time()
+        if self.writable:
+            await self._run(self._conn.execute, "DELETE FROM meta WHERE key = ?", (f"cursor:{kind}",))
+            self.wake.set()
+
+    def on_event(self, key: str):
+        """Hook EVENT_CHANNEL (cluster): event invalidasi yang diterapkan di worker lain"""
+        kind, _, uuid = key.partition(':')
+        if kind not in KINDS or self._reader is None:
+            return
+        if uuid != '*' and not self.writable:
+            return
+        self._events[kind].add(uuid)
+        if self._events_task is None or self._events_task.done():
+            self._events_task = asyncio.create_task(self._apply_events())
+
+    async def _apply_events(self):
+        """Batch event dari hook - satu DELETE per kind"""
+        while any(self._events.values()):
+            for kind, keys in self._events.items():
+                uuids = list(keys)
+                keys.clear()
+                if '*' in uuids:
+                    await self.reset(kind)
+                uuids = [uuid for uuid in uuids if uuid != '*']
+                if uuids:
+                    await self.mark_dirty(kind, uuids)
+
+    # === CLUSTER ===
+
+    async def claim(self, ttl_ms: int) -> Optional[bool]:
+        """Lock SYNC_LOCK: True = worker ini yang sync (lock diperpanjang), None = Redis down (peran tetap)"""
+        from utils.redis_manager import cache
+
+        if self._token:
+            if await cache.extend_lock(SYNC_LOCK, self._token, ttl_ms):
+                return True
+            if not cache.connected:
+                return None
+            self._token = None  # lock expired dan diambil worker lain
+        self._token = await cache.acquire_lock(SYNC_LOCK, ttl_ms)
+        if self._token is None and not cache.connected:
+            return None
+        return self._token is not None
+
+    async def release(self):
+        from utils.redis_manager import cache
+
+        if self._token:
+            await cache.release_lock(SYNC_LOCK, self._token)
+            self._token = None
+
+    async def _refetch_dirty(self):
+        """Detail yang di-invalidasi tapi tidak muncul di delta (mis. event lebih cepat dari cursor)"""
+        from utils.api_client import ApiError, api
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        fetchers = {'gedung': api.get_gedung, 'unit': api.get_unit}
+
+        async def _one(kind: str, uuid: str):
+            async with semaphore:
+                try:
+                    row = await fetchers[kind](uuid)
+                except ApiError as e:
+                    if e.status == 404:
+                        self._dirty[kind].discard(uuid)
+                    return None
+                self._dirty[kind].discard(uuid)
+                return row
+
+        for kind in KINDS:
+            uuids = list(self._dirty[kind])
+            if not uuids:
+                continue
+            rows = [row for row in await asyncio.gather(*(_one(kind, uuid) for uuid in uuids)) if row]
+            if rows:
+                cursor = await self._run(self._meta, f"cursor:{kind}")
+                await self._run(self._write, kind, rows, [], False, cursor)
+
+
+# Global snapshot instance
+snapshot = SnapshotStore()
+
+
+async def _elect(interval: int, worker_index: int):
+    """Cluster: pemegang lock sync (read-write), worker lain read-only - dicek tiap tick"""
+    # TTL beberapa interval - full sync yang lama tidak membuat lock lepas ke worker lain
+    writable = await snapshot.claim(interval * 3000)
+    if writable is None:
+        # Redis down - peran terakhir dipertahankan (belum pernah dibuka: worker 0 yang sync)
+        if snapshot.opened:
+            return
+        writable = worker_index == 0
+    if snapshot.opened and snapshot.writable == writable:
+        return
+
+    first = not snapshot.opened
+    try:
+        await snapshot.reopen(writable)
+    except sqlite3.Error as e:
+        # File belum dibuat worker yang sync - dicoba lagi di tick berikutnya
+        logger.debug(f"Snapshot {snapshot.path} belum bisa dibuka: {e}")
+        return
+    logger.info(f"💾 Snapshot {snapshot.path}: {'sync' if writable else 'read-only'} (worker {worker_index})")
+    if first and snapshot.synced_at:
+        await snapshot.load_index()
+
+
+async def _sync_loop(interval: int, shared: bool = False, worker_index: int = 0):
+    """Sync terjadwal - error tidak menghentikan loop, snapshot lama tetap dipakai"""
+    while True:
+        try:
+            if shared:
+                await _elect(interval, worker_index)
+            if snapshot.writable:
+                await snapshot.sync()
+            elif snapshot.opened:
+                await snapshot.reload()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if snapshot.writable:
+                SNAPSHOT_SYNCS.labels('delta' if snapshot.synced_at else 'full', 'error').inc()
+                logger.error(f"❌ Snapshot sync failed: {e}")
+            else:
+                logger.error(f"❌ Snapshot reload failed: {e}")
+        snapshot.wake.clear()
+        try:
+            # Read-only yang masih menunggu sync pertama worker lain - cek lebih sering
+            wait = interval if snapshot.writable or snapshot.synced_at else min(interval, 5)
+            await asyncio.wait_for(snapshot.wake.wait(), wait)
+        except asyncio.TimeoutError:
+            pass
+
+
+# === LIFECYCLE MANAGER ===
+
+class SnapshotLifecycle:
+    """Lifecycle manager untuk snapshot dataset - dipakai di main.py"""
+
+    _task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def post_init(app: Application):
+        """Dipanggil setelah bot initialize - buka snapshot di disk + start sync terjadwal"""
+        from config import (SNAPSHOT_ENABLED, SNAPSHOT_PATH, SNAPSHOT_SYNC_INTERVAL, SNAPSHOT_MAX_AGE,
+                            BOT_MODE, WEBHOOK_WORKERS)
+        from utils.metrics import worker_index
+        from utils.redis_manager import cache
+
+        if not SNAPSHOT_ENABLED:
+            return
+
+        snapshot.path = SNAPSHOT_PATH
+        snapshot.max_age = SNAPSHOT_MAX_AGE
+        gedung_index.max_age = SNAPSHOT_MAX_AGE
+        # Cluster webhook: satu file, satu worker yang sync - lainnya read-only
+        shared = BOT_MODE == 'webhook' and WEBHOOK_WORKERS > 1
+        if shared:
+            if snapshot.on_event not in cache.event_hooks:
+                cache.event_hooks.append(snapshot.on_event)
+            await _elect(SNAPSHOT_SYNC_INTERVAL, worker_index)
+        else:
+            snapshot.open()
+            if snapshot.synced_at:
+                # Snapshot dari run sebelumnya - langsung bisa dipakai walau backend down
+                await snapshot.load_index()
+
+        SnapshotLifecycle._task = asyncio.create_task(
+            _sync_loop(SNAPSHOT_SYNC_INTERVAL, shared, worker_index))
+        logger.info(f"💾 Snapshot {snapshot.path} (sync tiap {SNAPSHOT_SYNC_INTERVAL}s)")
+
+    @staticmethod
+    async def post_shutdown(app: Application):
+        """Dipanggil sebelum bot shutdown - stop sync + lepas lock sync + tutup SQLite"""
+        from utils.redis_manager import cache
+
+        if snapshot.on_event in cache.event_hooks:
+            cache.event_hooks.remove(snapshot.on_event)
+        tasks = [task for task in (SnapshotLifecycle._task, snapshot._events_task) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        SnapshotLifecycle._task = None
+        # Worker lain langsung bisa mengambil alih sync
+        await snapshot.release()
+        snapshot.close()
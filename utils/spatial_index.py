@@ -0,0 +1,230 @@
+# utils/spatial_index.py
+"""
+Spatial index lokal untuk semua gedung - nearby search tanpa round-trip API.
+Kolom disimpan array-backed + grid index (cell lat/long dalam derajat).
+"""
+import asyncio
+import logging
+import math
+import time
+from array import array
+from typing import Optional
+from telegram.ext import Application
+
+from utils.geo import EARTH_RADIUS_M, haversine
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsional - fallback ke loop Python
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# 1 derajat latitude ≈ 111 km
+METERS_PER_DEG = 111320.0
+
+
+class GedungIndex:
+    """Snapshot kolom gedung + grid index"""
+
+    def __init__(self, cell_deg: float = 0.01, max_age: int = 3600):
+        self.cell_deg = cell_deg
+        self.max_age = max_age
+        self.loaded_at = 0.0
+        self._clear()
+
+    def _clear(self):
+        self.uuids = []
+        self.names = []
+        self.addresses = []
+        self.lats = array('d')
+        self.longs = array('d')
+        self.total_units = array('l')
+        self.grid = {}
+
+    def __len__(self):
+        return len(self.uuids)
+
+    def is_fresh(self) -> bool:
+        """Snapshot ada dan belum melewati max_age"""
+        return len(self) > 0 and (time.time() - self.loaded_at) <= self.max_age
+
+    def _cell(self, lat: float, long: float):
+        return (int(math.floor(lat / self.cell_deg)), int(math.floor(long / self.cell_deg)))
+
+    def load(self, rows: list):
+        """Bangun ulang kolom + grid dari list gedung API, lalu swap"""
+        fresh = GedungIndex(self.cell_deg, self.max_age)
+
+        for row in rows:
+            lat = row.get('lat')
+            long = row.get('long')
+            if lat is None or long is None:
+                continue
+
+            idx = len(fresh.uuids)
+            fresh.uuids.append(row['uuid'])
+            fresh.names.append(row.get('nama_gedung', ''))
+            fresh.addresses.append(row.get('alamat', 'N/A'))
+            fresh.lats.append(float(lat))
+            fresh.longs.append(float(long))
+            fresh.total_units.append(int(row.get('total_units') or 0))
+            fresh.grid.setdefault(fresh._cell(float(lat), float(long)), array('l')).append(idx)
+
+        # Swap atomik - query yang sedang jalan tetap pakai kolom lama
+        (self.uuids, self.names, self.addresses, self.lats, self.longs,
+         self.total_units, self.grid) = (fresh.uuids, fresh.names, fresh.addresses, fresh.lats,
+                                         fresh.longs, fresh.total_units, fresh.grid)
+        self.loaded_at = time.time()
+
+    def patch(self, uuid: str, row: Optional[dict]):
+        """Update satu gedung di tempat (row None = hapus) - tanpa rebuild seluruh index"""
+        try:
+            idx = self.uuids.index(uuid)
+        except ValueError:
+            idx = None
+
+        if idx is not None:
+            # Keluar dari grid cell lama - baris kolom tetap ada tapi tidak pernah jadi kandidat
+            cell = self.grid.get(self._cell(self.lats[idx], self.longs[idx]))
+            if cell is not None and idx in cell:
+                cell.remove(idx)
+
+        if row is None or row.get('lat') is None or row.get('long') is None:
+            return
+
+        lat, long = float(row['lat']), float(row['long'])
+        if idx is None:
+            idx = len(self.uuids)
+            self.uuids.append(uuid)
+            self.names.append(row.get('nama_gedung', ''))
+            self.addresses.append(row.get('alamat', 'N/A'))
+            self.lats.append(lat)
+            self.longs.append(long)
+            self.total_units.append(int(row.get('total_units') or 0))
+        else:
+            self.names[idx] = row.get('nama_gedung', '')
+            self.addresses[idx] = row.get('alamat', 'N/A')
+            self.lats[idx] = lat
+            self.longs[idx] = long
+            self.total_units[idx] = int(row.get('total_units') or 0)
+        self.grid.setdefault(self._cell(lat, long), array('l')).append(idx)
+
+    def _candidates(self, lat: float, long: float, radius: int) -> list:
+        """Index baris di semua grid cell yang menyentuh bounding box radius"""
+        dlat = radius / METERS_PER_DEG
+        dlong = radius / (METERS_PER_DEG * max(math.cos(math.radians(lat)), 0.01))
+
+        lat_min, long_min = self._cell(lat - dlat, long - dlong)
+        lat_max, long_max = self._cell(lat + dlat, long + dlong)
+
+        rows = []
+        for i in range(lat_min, lat_max + 1):
+            for j in range(long_min, long_max + 1):
+                cell = self.grid.get((i, j))
+                if cell:
+                    rows.extend(cell)
+        return rows
+
+    def _distances(self, rows: list, lat: float, long: float):
+        """Jarak haversine (meter) dari titik ke setiap baris kandidat"""
+        if np is None:
+            return [haversine(lat, long, self.lats[i], self.longs[i]) for i in rows]
+
+        idx = np.asarray(rows, dtype=np.int64)
+        lats = np.radians(np.frombuffer(self.lats, dtype=np.float64)[idx])
+        longs = np.radians(np.frombuffer(self.longs, dtype=np.float64)[idx])
+        phi = math.radians(lat)
+
+        a = (np.sin((lats - phi) / 2) ** 2 +
+             math.cos(phi) * np.cos(lats) * np.sin((longs - math.radians(long)) / 2) ** 2)
+        return (2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))).tolist()
+
+    def nearby(self, lat: float, long: float, radius: int) -> dict:
+        """Nearby lokal - format sama dengan response POST /gedung/nearby"""
+        rows = self._candidates(lat, long, radius)
+        hits = []
+        if rows:
+            for i, distance in zip(rows, self._distances(rows, lat, long)):
+                if distance <= radius:
+                    hits.append((distance, i))
+        hits.sort()
+
+        results = [{
+            'uuid': self.uuids[i],
+            'nama_gedung': self.names[i],
+            'alamat': self.addresses[i],
+            'lat': self.lats[i],
+            'long': self.longs[i],
+            'total_units': self.total_units[i],
+            'distance': distance,
+        } for distance, i in hits]
+
+        return {
+            'success': True,
+            'results': results,
+            'count': len(results),
+            'radius': radius
+        }
+
+
+# Global index instance
+gedung_index = GedungIndex()
+
+
+async def refresh_index():
+    """Tarik semua gedung dari API dan rebuild index"""
+    from utils.api_client import api
+
+    start = time.perf_counter()
+    rows = await api.list_gedung()
+    gedung_index.load(rows)
+    logger.info(f"🗺️ Spatial index refreshed: {len(gedung_index)} gedung "
+                f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+
+async def _refresh_loop(interval: int):
+    """Refresh index terjadwal - error tidak menghentikan loop"""
+    while True:
+        try:
+            await refresh_index()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Spatial index refresh failed: {e}")
+        await asyncio.sleep(interval)
+
+
+# === LIFECYCLE MANAGER ===
+
+class SpatialIndexLifecycle:
+    """Lifecycle manager untuk spatial index - dipakai di main.py"""
+
+    _task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def post_init(app: Application):
+        """Dipanggil setelah bot initialize - start refresh terjadwal"""
+        from config import SPATIAL_INDEX_ENABLED, SPATIAL_INDEX_REFRESH, SPATIAL_INDEX_MAX_AGE, SNAPSHOT_ENABLED
+
+        if not SPATIAL_INDEX_ENABLED:
+            return
+        if SNAPSHOT_ENABLED:
+            logger.info("🗺️ Spatial index dibangun dari snapshot dataset (tanpa refresh list API)")
+            return
+
+        gedung_index.max_age = SPATIAL_INDEX_MAX_AGE
+        SpatialIndexLifecycle._task = asyncio.create_task(_refresh_loop(SPATIAL_INDEX_REFRESH))
+        logger.info(f"🗺️ Spatial index enabled (refresh tiap {SPATIAL_INDEX_REFRESH}s)")
+
+    @staticmethod
+    async def post_shutdown(app: Application):
+        """Dipanggil sebelum bot shutdown - stop refresh"""
+        task = SpatialIndexLifecycle._task
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            SpatialIndexLifecycle._task = None
@@ -0,0 +1,79 @@
+# utils/telegram_media.py
+"""Kirim foto gedung/unit - pakai file_id Telegram yang sudah pernah di-upload kalau ada"""
+import logging
+from typing import Optional
+from telegram import InputMediaPhoto, Message
+from telegram.error import BadRequest
+
+from utils.redis_manager import cache
+
+logger = logging.getLogger(__name__)
+
+# Pesan BadRequest Telegram untuk file_id yang sudah tidak bisa dipakai
+FILE_ID_ERRORS = (
+    'wrong file identifier',
+    'wrong remote file identifier',
+    'file reference expired',
+)
+
+
+def photo_file_id(message) -> Optional[str]:
+    """file_id resolusi terbesar dari message foto (None kalau bukan foto)"""
+    if isinstance(message, Message) and message.photo:
+        return message.photo[-1].file_id
+    return None
+
+
+def is_file_id_error(error: BadRequest) -> bool:
+    """BadRequest karena file_id tidak valid (bukan karena caption/markup)"""
+    text = str(error).lower()
+    return any(marker in text for marker in FILE_ID_ERRORS)
+
+
+async def reply_photo_cached(message: Message, photo_url: str, **kwargs) -> Message:
+    """
+    reply_photo dengan file_id cache.
+    file_id ditolak -> hapus dari cache lalu kirim ulang pakai URL.
+    """
+    file_id = await cache.get_file_id(photo_url)
+    if file_id:
+        try:
+            return await message.reply_photo(photo=file_id, **kwargs)
+        except BadRequest as e:
+            if not is_file_id_error(e):
+                raise
+            logger.warning(f"⚠️ file_id rejected, fallback ke URL: {e}")
+            await cache.delete_file_id(photo_url)
+
+    sent = await message.reply_photo(photo=photo_url, **kwargs)
+
+    file_id = photo_file_id(sent)
+    if file_id:
+        await cache.save_file_id(photo_url, file_id)
+    return sent
+
+
+async def edit_media_cached(query, photo_url: str, caption: str, reply_markup=None, parse_mode=None):
+    """
+    edit_message_media (foto -> foto) dengan file_id cache.
+    file_id ditolak -> hapus dari cache lalu edit ulang pakai URL.
+    """
+    def _media(photo):
+        return InputMediaPhoto(media=photo, caption=caption, parse_mode=parse_mode)
+
+    file_id = await cache.get_file_id(photo_url)
+    if file_id:
+        try:
+            return await query.edit_message_media(media=_media(file_id), reply_markup=reply_markup)
+        except BadRequest as e:
+            if not is_file_id_error(e):
+                raise
+            logger.warning(f"⚠️ file_id rejected, fallback ke URL: {e}")
+            await cache.delete_file_id(photo_url)
+
+    edited = await query.edit_message_media(media=_media(photo_url), reply_markup=reply_markup)
+
+    file_id = photo_file_id(edited)
+    if file_id:
+        await cache.save_file_id(photo_url, file_id)
+    return edited
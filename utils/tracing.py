@@ -0,0 +1,309 @@
+# utils/tracing.py
+"""
+Tracing ringan per update: satu root span per update, child span untuk cache, API DKKM,
+dan call Telegram. Span aktif disimpan di contextvars (ikut ke await di task yang sama).
+
+Sampling:
+- head: TRACE_SAMPLE_RATE (0..1) - trace yang tidak terpilih hampir tanpa biaya
+- slow: TRACE_SLOW_MS > 0 - semua trace direkam, yang lebih lambat dari ambang selalu di-export
+
+Export batch di background: file JSONL lokal atau OTLP/HTTP (JSON) ke collector.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+import aiohttp
+from telegram.ext import Application
+
+logger = logging.getLogger(__name__)
+
+
+class Trace:
+    """Kumpulan span satu update"""
+
+    __slots__ = ('trace_id', 'sampled', 'spans', 'closed')
+
+    def __init__(self, sampled: bool):
+        self.trace_id = os.urandom(16).hex()
+        self.sampled = sampled
+        self.spans: List['Span'] = []
+        self.closed = False
+
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'attrs', 'start_ns', 'end_ns', 'error')
+
+    def __init__(self, trace: Trace, name: str, parent: Optional['Span'], attrs: dict):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_ns': self.start_ns,
+            'duration_ms': round(self.duration_ms, 3),
+            'attrs': self.attrs,
+            'error': self.error,
+        }
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('trace_span', default=None)
+
+
+# === EXPORTER ===
+
+class FileExporter:
+    """Satu baris JSON per span (append)"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _write(self, spans: List[Span]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + '\n')
+
+    async def export(self, spans: List[Span]):
+        await asyncio.get_running_loop().run_in_executor(None, self._write, spans)
+
+    async def close(self):
+        pass
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class OtlpExporter:
+    """OTLP/HTTP JSON - POST ke {endpoint} (biasanya http://collector:4318/v1/traces)"""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _payload(self, spans: List[Span]) -> dict:
+        otlp_spans = []
+        for span in spans:
+            item = {
+                'traceId': span.trace.trace_id,
+                'spanId': span.span_id,
+                'name': span.name,
+                'kind': 1,  # SPAN_KIND_INTERNAL
+                'startTimeUnixNano': str(span.start_ns),
+                'endTimeUnixNano': str(span.end_ns),
+                'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in span.attrs.items()],
+            }
+            if span.parent_id:
+                item['parentSpanId'] = span.parent_id
+            if span.error:
+                item['status'] = {'code': 2, 'message': span.error}  # STATUS_CODE_ERROR
+            otlp_spans.append(item)
+
+        return {'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': self.service_name}}
+            ]},
+            'scopeSpans': [{'scope': {'name': 'dkkm-bot'}, 'spans': otlp_spans}],
+        }]}
+
+    async def export(self, spans: List[Span]):
+        if not self._session or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        async with self._session.post(self.endpoint, json=self._payload(spans),
+                                      timeout=aiohttp.ClientTimeout(total=self.timeout)) as resp:
+            if resp.status >= 300:
+                logger.warning(f"⚠️ OTLP export {resp.status}: {await resp.text()}")
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+
+# === TRACER ===
+
+class Tracer:
+    """Sampling + buffer span selesai, di-export batch oleh task background"""
+
+    def __init__(self, sample_rate: float = 0.0, slow_ms: float = 0, flush_interval: float = 5,
+                 max_buffer: int = 10000):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.exporter = None
+        self._buffer: List[Span] = []
+        self._dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None and (self.sample_rate > 0 or self.slow_ms > 0)
+
+    @contextmanager
+    def trace(self, name: str, **attrs):
+        """Root span satu update - no-op kalau tidak di-sample dan slow-trace nonaktif"""
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not self.enabled or (not sampled and self.slow_ms <= 0):
+            yield None
+            return
+
+        trace = Trace(sampled)
+        try:
+            with self._span(trace, name, None, attrs) as root:
+                yield root
+        finally:
+            trace.closed = True
+            # Trace error ikut di-export kalau lambat, sama seperti yang sukses
+            if trace.sampled or root.duration_ms >= self.slow_ms > 0:
+                root.set(slow=not trace.sampled)
+                self._enqueue(trace.spans)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Child span dari span aktif - no-op kalau update ini tidak direkam"""
+        parent = _current.get()
+        # Span milik trace yang sudah selesai (misal refresh background) dibuang
+        if parent is None or parent.trace.closed:
+            yield None
+            return
+
+        with self._span(parent.trace, name, parent, attrs) as span:
+            yield span
+
+    @contextmanager
+    def _span(self, trace: Trace, name: str, parent: Optional[Span], attrs: dict):
+        span = Span(trace, name, parent, attrs)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current.reset(token)
+            trace.spans.append(span)
+
+    def _enqueue(self, spans: List[Span]):
+        if len(self._buffer) + len(spans) > self.max_buffer:
+            self._dropped += len(spans)
+            return
+        self._buffer.extend(spans)
+
+    async def flush(self):
+        if not self._buffer or not self.exporter:
+            return
+        spans, self._buffer = self._buffer, []
+        try:
+            await self.exporter.export(spans)
+        except Exception as e:
+            logger.warning(f"⚠️ Trace export gagal ({len(spans)} span): {e}")
+        if self._dropped:
+            logger.warning(f"⚠️ {self._dropped} span dibuang (buffer penuh)")
+            self._dropped = 0
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self.exporter:
+            await self.exporter.close()
+
+
+# Global tracer instance
+tracer = Tracer()
+
+
+def traced(name: str):
+    """Decorator coroutine -> child span (nama span tetap, tanpa atribut argumen)"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# === LIFECYCLE MANAGER ===
+
+class TracingLifecycle:
+    """Lifecycle manager untuk tracing - dipakai di main.py"""
+
+    @staticmethod
+    async def post_init(app: Application):
+        """Dipanggil setelah bot initialize - pilih exporter + start flush background"""
+        from config import (TRACE_SAMPLE_RATE, TRACE_SLOW_MS, TRACE_EXPORTER, TRACE_FILE,
+                            TRACE_OTLP_ENDPOINT, TRACE_SERVICE_NAME, TRACE_FLUSH_INTERVAL)
+
+        tracer.sample_rate = TRACE_SAMPLE_RATE
+        tracer.slow_ms = TRACE_SLOW_MS
+        tracer.flush_interval = TRACE_FLUSH_INTERVAL
+
+        if TRACE_SAMPLE_RATE <= 0 and TRACE_SLOW_MS <= 0:
+            return
+
+        if TRACE_EXPORTER == 'otlp':
+            tracer.exporter = OtlpExporter(TRACE_OTLP_ENDPOINT, TRACE_SERVICE_NAME)
+            target = TRACE_OTLP_ENDPOINT
+        else:
+            # Cluster webhook: satu file per proses supaya baris tidak bercampur
+            from utils import metrics
+            path = TRACE_FILE if not metrics.worker_index else f"{TRACE_FILE}.{metrics.worker_index}"
+            tracer.exporter = FileExporter(path)
+            target = path
+
+        tracer.start()
+        logger.info(f"🔭 Tracing aktif (sample={TRACE_SAMPLE_RATE}, slow={TRACE_SLOW_MS}ms) → {target}")
+
+    @staticmethod
+    async def post_shutdown(app: Application):
+        """Dipanggil sebelum bot shutdown - export span terakhir"""
+        await tracer.stop()
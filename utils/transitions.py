@@ -0,0 +1,85 @@
+# utils/transitions.py
+"""
+Transisi message navigasi dengan jumlah Bot API call minimal.
+
+  sekarang -> target | call
+  teks     -> teks   | edit_message_text                (1)
+  foto     -> foto   | edit_message_media               (1)
+  teks     -> foto   | reply_photo + delete_message     (2, Bot API tidak bisa ubah teks jadi media)
+  foto     -> teks   | reply_text + delete_message      (2)
+
+Kirim dulu baru delete: kalau kirim gagal, message lama masih utuh untuk fallback.
+"""
+import logging
+from telegram.error import BadRequest
+
+from utils.telegram_media import edit_media_cached, reply_photo_cached
+
+logger = logging.getLogger(__name__)
+
+# Batas caption foto Telegram
+CAPTION_LIMIT = 1024
+
+
+def _not_modified(error: BadRequest) -> bool:
+    return 'not modified' in str(error).lower()
+
+
+async def _delete(query):
+    """Delete message lama - gagal (misal sudah > 48 jam) tidak masalah"""
+    try:
+        await query.delete_message()
+    except BadRequest as e:
+        logger.warning(f"⚠️ delete_message failed: {e}")
+
+
+async def _to_text(query, text, reply_markup, parse_mode, disable_web_page_preview):
+    kwargs = dict(reply_markup=reply_markup, parse_mode=parse_mode,
+                  disable_web_page_preview=disable_web_page_preview)
+
+    if not query.message.photo:
+        try:
+            return await query.edit_message_text(text, **kwargs)
+        except BadRequest as e:
+            if _not_modified(e):
+                return query.message
+            raise
+
+    sent = await query.message.reply_text(text, **kwargs)
+    await _delete(query)
+    return sent
+
+
+async def _to_photo(query, photo, text, reply_markup, parse_mode):
+    if query.message.photo:
+        try:
+            return await edit_media_cached(query, photo, text, reply_markup=reply_markup, parse_mode=parse_mode)
+        except BadRequest as e:
+            if _not_modified(e):
+                return query.message
+            raise
+
+    sent = await reply_photo_cached(
+        query.message,
+        photo,
+        caption=text,
+        reply_markup=reply_markup,
+        parse_mode=parse_mode
+    )
+    await _delete(query)
+    return sent
+
+
+async def transition(query, text: str, reply_markup=None, photo: str = None,
+                     parse_mode: str = 'Markdown', disable_web_page_preview: bool = None):
+    """
+    Tampilkan view (teks, atau foto + caption) menggantikan message callback saat ini.
+    Foto gagal / caption terlalu panjang -> fallback ke teks.
+    """
+    if photo and len(text) <= CAPTION_LIMIT:
+        try:
+            return await _to_photo(query, photo, text, reply_markup, parse_mode)
+        except BadRequest as e:
+            logger.warning(f"⚠️ Photo transition failed, fallback ke teks: {e}")
+
+    return await _to_text(query, text, reply_markup, parse_mode, disable_web_page_preview)
@@ -0,0 +1,78 @@
+# utils/update_processor.py
+"""Update diproses concurrent, tapi update dari chat yang sama tetap berurutan"""
+import asyncio
+from typing import Awaitable
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from utils.metrics import HANDLERS_IN_FLIGHT
+from utils.tracing import tracer
+
+# Batas semaphore PTB (praktis tanpa batas) - lihat PerChatUpdateProcessor.__init__
+_UNBOUNDED = 1 << 20
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """Maksimal N update concurrent - satu lock per chat untuk menjaga urutan per user"""
+
+    def __init__(self, max_concurrent_updates: int):
+        # Semaphore bawaan PTB diambil sebelum do_process_update, jadi update yang masih antre
+        # di lock chat ikut memakan slot - batas sebenarnya dipegang _slots, diambil setelah lock chat
+        super().__init__(_UNBOUNDED)
+        self._slots = asyncio.Semaphore(max_concurrent_updates)
+        self._locks = {}  # key -> [asyncio.Lock, jumlah pemakai]
+
+    @staticmethod
+    def _key(update: object):
+        if isinstance(update, Update):
+            if update.effective_chat:
+                return update.effective_chat.id
+            if update.effective_user:
+                return update.effective_user.id
+        return None
+
+    @staticmethod
+    def _kind(update: object) -> str:
+        """Nama root span: callback / location / command / message"""
+        if isinstance(update, Update):
+            if update.callback_query:
+                return 'update.callback'
+            message = update.effective_message
+            if message and message.location:
+                return 'update.location'
+            if message and message.text and message.text.startswith('/'):
+                return 'update.command'
+        return 'update.message'
+
+    async def do_process_update(self, update: object, coroutine: Awaitable):
+        key = self._key(update)
+        if key is None:
+            await self._run(update, key, coroutine)
+            return
+
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            # Lock chat dulu, baru slot global - chat yang ramai tidak menahan slot user lain
+            async with entry[0]:
+                await self._run(update, key, coroutine)
+        finally:
+            entry[1] -= 1
+            # Lock chat yang sudah tidak dipakai dibuang supaya dict tidak tumbuh terus
+            if entry[1] == 0:
+                del self._locks[key]
+
+    async def _run(self, update: object, key, coroutine: Awaitable):
+        """Slot global + metrics/span hanya untuk waktu handler (tanpa antre lock chat)"""
+        async with self._slots:
+            with HANDLERS_IN_FLIGHT.track_inprogress(), tracer.trace(self._kind(update)) as span:
+                if span:
+                    span.set(chat=key)
+                await coroutine
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
@@ -0,0 +1,256 @@
+# utils/views.py
+"""
+Render view (caption + InlineKeyboardMarkup) untuk daftar hasil nearby dan detail gedung.
+Hasil render di-memoize per content hash data sumber: L1 in-process, lalu Redis.
+"""
+import hashlib
+import json
+import logging
+from typing import Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from config import RESULTS_PAGE_SIZE, UNITS_PAGE_SIZE
+from utils.redis_manager import cache
+from utils.transitions import CAPTION_LIMIT
+
+logger = logging.getLogger(__name__)
+
+View = Tuple[str, InlineKeyboardMarkup]
+
+# Callback data halaman: pg_results_{n} / pg_gedung_{n}
+RESULTS_PAGE_PREFIX = 'pg_results_'
+GEDUNG_PAGE_PREFIX = 'pg_gedung_'
+
+
+def _digest(kind: str, source) -> str:
+    raw = json.dumps(source, sort_keys=True, ensure_ascii=False, default=str)
+    return f"view:{kind}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+async def _memoized(kind: str, source, render) -> View:
+    """Ambil view dari L1 / Redis, render + simpan kalau belum ada"""
+    key = _digest(kind, source)
+
+    view = cache.local.get(key)
+    if view is not None:
+        return view
+
+    stored = await cache.get_view(key)
+    if stored:
+        view = (stored['caption'], InlineKeyboardMarkup.de_json(stored['keyboard'], None))
+    else:
+        view = render()
+        caption, markup = view
+        await cache.save_view(key, {'caption': caption, 'keyboard': markup.to_dict()})
+
+    cache.local.set(key, view, len(view[0]), cache.view_ttl)
+    return view
+
+
+# === PAGINATION ===
+
+def page_count(total: int, page_size: int) -> int:
+    return max(1, -(-total // page_size))
+
+
+def clamp_page(page: int, total: int, page_size: int) -> int:
+    return max(0, min(page, page_count(total, page_size) - 1))
+
+
+def page_slice(items: list, page: int, page_size: int):
+    """(page yang di-clamp, jumlah halaman, offset, item di halaman itu)"""
+    page = clamp_page(page, len(items), page_size)
+    offset = page * page_size
+    return page, page_count(len(items), page_size), offset, items[offset:offset + page_size]
+
+
+def results_page(results: list, page: int) -> list:
+    """Gedung yang tampil di halaman hasil (dipakai juga prefetcher)"""
+    return page_slice(results, page, RESULTS_PAGE_SIZE)[3]
+
+
+def units_page(gedung: dict, page: int) -> list:
+    """Unit yang tampil di halaman detail gedung (dipakai juga prefetcher)"""
+    return page_slice(gedung.get('units', []), page, UNITS_PAGE_SIZE)[3]
+
+
+def _nav_row(prefix: str, page: int, pages: int) -> list:
+    """Baris « Prev | p/P | Next » (kosong kalau cuma 1 halaman)"""
+    if pages <= 1:
+        return []
+
+    row = []
+    if page > 0:
+        row.append(InlineKeyboardButton("« Prev", callback_data=f"{prefix}{page - 1}"))
+    row.append(InlineKeyboardButton(f"{page + 1}/{pages}", callback_data="no_action"))
+    if page < pages - 1:
+        row.append(InlineKeyboardButton("Next »", callback_data=f"{prefix}{page + 1}"))
+    return row
+
+
+# === HASIL NEARBY ===
+
+def _render_results(items: list, radius: int, count: int, page: int, pages: int, offset: int) -> View:
+    # Format text hasil (seperti WhatsApp tapi lebih rapi)
+    text_lines = [
+        f"🏢 Ditemukan *{count}* gedung dalam radius {radius}m\n"
+    ]
+
+    # Buat button untuk setiap gedung
+    keyboard = []
+
+    for idx, gedung in enumerate(items, offset + 1):
+        nama = gedung['nama_gedung']
+        alamat = gedung.get('alamat', 'N/A')
+        distance = gedung['distance']
+        total_units = gedung['total_units']
+
+        # Format text list
+        text_lines.append(
+            f"{idx}. *{nama}*\n"
+            f"   📍 {alamat}\n"
+            f"   📏 Jarak: *{distance:.0f}m* | {total_units} unit"
+        )
+
+        # Tambahkan separator kecuali item terakhir
+        if idx < offset + len(items):
+            text_lines.append("━━━━━━━━━━━━━━━━")
+
+        # Button untuk gedung
+        button_text = f"{idx}. {nama} ({distance:.0f}m)"
+        keyboard.append([InlineKeyboardButton(
+            button_text,
+            callback_data=f"gedung_{gedung['uuid']}"
+        )])
+
+    if pages > 1:
+        text_lines.append(f"\n📄 Halaman {page + 1}/{pages}")
+
+    # Navigation buttons
+    nav = _nav_row(RESULTS_PAGE_PREFIX, page, pages)
+    if nav:
+        keyboard.append(nav)
+    keyboard.append([InlineKeyboardButton("🔄 Pencarian Baru", callback_data="search_again")])
+
+    # Gabungkan text
+    return "\n".join(text_lines), InlineKeyboardMarkup(keyboard)
+
+
+async def results_view(results: list, radius: int, count: int, page: int = 0) -> View:
+    """Caption + keyboard satu halaman daftar gedung hasil nearby"""
+    page, pages, offset, items = page_slice(results, page, RESULTS_PAGE_SIZE)
+
+    source = {'results': items, 'radius': radius, 'count': count, 'page': page, 'pages': pages}
+    return await _memoized(
+        'results', source,
+        lambda: _render_results(items, radius, count, page, pages, offset)
+    )
+
+
+# === DETAIL GEDUNG ===
+
+def _clip(text: str, limit: int) -> str:
+    """Potong teks bebas ke maksimal limit karakter (… di akhir)"""
+    text = str(text)
+    if len(text) <= limit:
+        return text
+    return text[:limit - 1] + "…" if limit > 0 else ""
+
+
+def _fit(deskripsi: str, alasan: str, budget: int) -> tuple:
+    """Bagi budget karakter satu unit: alasan minimal separuh kalau deskripsi panjang"""
+    alasan_len = min(len(alasan), max(budget - len(deskripsi), budget // 2))
+    return _clip(deskripsi, budget - alasan_len), _clip(alasan, alasan_len)
+
+
+def _render_gedung(gedung: dict, units: list, page: int, pages: int, offset: int) -> View:
+    nama = gedung['nama_gedung']
+    alamat = gedung['alamat']
+    lat = gedung['lat']
+    lon = gedung['long']
+    total_units = gedung['total_units']
+
+    def _caption(texts: list) -> str:
+        # Format text seperti WhatsApp tapi lebih rapi
+        text_lines = [
+            f"🏢 *{nama}*\n",
+            f"📍 *{total_units}* Unit",
+            f"📌 *{alamat}*",
+            f"[📍 Lihat di Maps](https://www.google.com/maps?q={lat},{lon})\n",
+            "━━━━━━━━━━━━━━━━",
+            "🏠 *DAFTAR UNIT*",
+            "━━━━━━━━━━━━━━━━\n"
+        ]
+
+        if units:
+            for idx, (unit, (deskripsi, alasan)) in enumerate(zip(units, texts), offset + 1):
+                # Format unit info
+                text_lines.append(
+                    f"{idx}. *Lt {unit['lantai']} ({unit['unit_number']})*\n"
+                    f"   📝 {deskripsi}"
+                )
+
+                if unit.get('alasan_blacklist'):
+                    text_lines.append(f"   🚫 {alasan}")
+
+                text_lines.append("")  # Empty line
+
+            text_lines.append("━━━━━━━━━━━━━━━━")
+        else:
+            text_lines.append("_Tidak ada unit tersedia_\n")
+            text_lines.append("━━━━━━━━━━━━━━━━")
+
+        if pages > 1:
+            text_lines.append(f"📄 Halaman {page + 1}/{pages}")
+
+        # Gabungkan text
+        return "\n".join(text_lines)
+
+    texts = [(str(unit.get('deskripsi', 'N/A')), str(unit.get('alasan_blacklist') or '')) for unit in units]
+    caption = _caption(texts)
+    if len(caption) > CAPTION_LIMIT and units:
+        # Deskripsi / alasan teks bebas - dipotong rata per unit supaya halaman tetap muat di caption foto
+        budget = max(0, (CAPTION_LIMIT - len(_caption([('', '')] * len(units)))) // len(units))
+        caption = _caption([_fit(deskripsi, alasan, budget) for deskripsi, alasan in texts])
+
+    # Keyboard untuk units (3 kolom)
+    keyboard = []
+    row = []  # Temporary row untuk menampung 3 button
+
+    for idx, unit in enumerate(units, offset + 1):
+        # Button untuk unit
+        button_text = f"{idx}. Lt {unit['lantai']} ({unit['unit_number']})"
+        row.append(InlineKeyboardButton(
+            button_text,
+            callback_data=f"unit_{unit['uuid']}"
+        ))
+
+        # Jika row sudah 3 atau ini adalah unit terakhir, append ke keyboard
+        if len(row) == 3 or idx == offset + len(units):
+            keyboard.append(row)
+            row = []  # Reset row untuk baris berikutnya
+
+    # Navigation buttons
+    nav = _nav_row(GEDUNG_PAGE_PREFIX, page, pages)
+    if nav:
+        keyboard.append(nav)
+    keyboard.append([
+        InlineKeyboardButton("« Back ke Awal", callback_data="back_results"),
+        InlineKeyboardButton("🔄 Pencarian Baru", callback_data="search_again")
+    ])
+
+    return caption, InlineKeyboardMarkup(keyboard)
+
+
+async def gedung_view(gedung: dict, page: int = 0) -> View:
+    """Caption + keyboard detail gedung, satu halaman daftar unit (3 kolom)"""
+    page, pages, offset, units = page_slice(gedung.get('units', []), page, UNITS_PAGE_SIZE)
+
+    # Hash hanya header + unit di halaman ini
+    source = {k: v for k, v in gedung.items() if k != 'units'}
+    source.update(units=units, page=page, pages=pages)
+    return await _memoized(
+        'gedung', source,
+        lambda: _render_gedung(gedung, units, page, pages, offset)
+    )
@@ -0,0 +1,136 @@
+# utils/warmup.py
+"""
+Warm restart supaya deploy tidak terlihat sebagai lonjakan latency:
+- warm-up saat startup: gedung/unit paling sering diakses (ZSET hot:*) di-load ke L1
+  (MGET dari Redis), yang tidak ada di Redis di-fetch dari API di background
+- snapshot disk opsional: isi L1 (detail gedung/unit) + session lokal ditulis saat shutdown
+  dan dimuat lagi saat start (sisa TTL dikurangi lama downtime). Entry L1 dicocokkan dulu ke Redis -
+  yang di-invalidasi / di-update selama bot mati dibuang (Redis down = L1 tidak dipulihkan)
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+from telegram.ext import Application
+
+from utils.codec import codec
+from utils.hotkeys import hotkeys
+from utils.prefetch import prefetcher
+from utils.redis_manager import cache
+from utils.session_store import sessions
+
+logger = logging.getLogger(__name__)
+
+# Hanya detail - view / nearby / file_id murah dibangun ulang atau sudah di Redis
+L1_PREFIXES = ('gedung:', 'unit:')
+
+
+# === SNAPSHOT DISK ===
+
+def save_snapshot(path: str):
+    """Tulis L1 + session + ranking lokal ke file (atomic replace)"""
+    state = {
+        'saved_at': time.time(),
+        'l1': [[key, ttl, size, value] for key, ttl, size, value in cache.local.dump(L1_PREFIXES)],
+        'sessions': sessions.dump(),
+        'hot': {kind: hotkeys.top_local(kind, 1000) for kind in ('gedung', 'unit')},
+    }
+    value, size = codec.encode(state)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(value)
+    os.replace(tmp, path)
+    logger.info(f"💾 Warm snapshot ditulis: {len(state['l1'])} L1, {len(state['sessions'])} session "
+                f"({size / 1024:.0f} KB)")
+
+
+async def load_snapshot(path: str, max_age: int) -> dict:
+    """Muat snapshot disk ke L1 + session - return state (kosong kalau tidak ada / terlalu lama)"""
+    try:
+        with open(path, 'rb') as f:
+            state = codec.decode(f.read())[0]
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.error(f"❌ Warm snapshot {path} tidak bisa dibaca: {e}")
+        return {}
+
+    downtime = time.time() - state.get('saved_at', 0)
+    if downtime > max_age:
+        logger.info(f"💾 Warm snapshot terlalu lama ({downtime:.0f}s) - diabaikan")
+        return {}
+
+    restored = []
+    # Urutan file LRU -> MRU, jadi yang paling baru dipakai tetap paling akhir di-evict
+    for key, ttl, size, value in state.get('l1', []):
+        remaining = ttl - downtime
+        if remaining > 1:
+            cache.local.set(key, value, size, int(remaining))
+            restored.append(key)
+    kept = await cache.revalidate_local(restored)
+    sessions.restore(state.get('sessions', []))
+    logger.info(f"💾 Warm snapshot dimuat: {kept}/{len(restored)} L1 masih valid, "
+                f"{len(state.get('sessions', []))} session (downtime {downtime:.0f}s)")
+    return state
+
+
+# === WARM-UP ===
+
+async def warm_up(top_gedung: int, top_units: int, fallback: dict = None):
+    """Load key terpanas ke L1 (Redis) / cache (API) - urutan ranking, dibatasi budget prefetch"""
+    fallback = fallback or {}
+    start = time.perf_counter()
+    for kind, n in (('gedung', top_gedung), ('unit', top_units)):
+        uuids = await cache.top_accessed(kind, n) or fallback.get(kind, [])[:n]
+        if uuids:
+            await prefetcher.fetch(kind, uuids)
+    logger.info(f"🔥 Warm-up selesai ({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+
+# === LIFECYCLE MANAGER ===
+
+class WarmupLifecycle:
+    """Lifecycle manager untuk warm-up + snapshot disk - dipakai di main.py"""
+
+    _task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def post_init(app: Application):
+        """Dipanggil setelah bot initialize - muat snapshot disk, warm-up di background"""
+        from config import WARMUP_TOP_GEDUNG, WARMUP_TOP_UNITS, WARM_SNAPSHOT_PATH, WARM_SNAPSHOT_MAX_AGE
+        from utils.metrics import worker_index
+
+        state = {}
+        if WARM_SNAPSHOT_PATH:
+            path = f"{WARM_SNAPSHOT_PATH}.{worker_index}" if worker_index else WARM_SNAPSHOT_PATH
+            state = await load_snapshot(path, WARM_SNAPSHOT_MAX_AGE)
+
+        if WARMUP_TOP_GEDUNG or WARMUP_TOP_UNITS:
+            # Tidak menahan startup - update pertama sudah bisa dilayani selama warm-up
+            WarmupLifecycle._task = asyncio.create_task(
+                warm_up(WARMUP_TOP_GEDUNG, WARMUP_TOP_UNITS, state.get('hot'))
+            )
+
+    @staticmethod
+    async def post_shutdown(app: Application):
+        """Dipanggil sebelum bot shutdown - stop warm-up, tulis snapshot disk (setelah session flush)"""
+        from config import WARM_SNAPSHOT_PATH
+        from utils.metrics import worker_index
+
+        task = WarmupLifecycle._task
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            WarmupLifecycle._task = None
+
+        if WARM_SNAPSHOT_PATH:
+            path = f"{WARM_SNAPSHOT_PATH}.{worker_index}" if worker_index else WARM_SNAPSHOT_PATH
+            try:
+                save_snapshot(path)
+            except Exception as e:
+                logger.error(f"❌ Warm snapshot gagal ditulis: {e}")
@@ -0,0 +1,140 @@
+# utils/webhook_cluster.py
+"""
+Webhook multi-proses:
+- front: server aiohttp terima update dari Telegram, cek secret token,
+  lalu kirim ke worker berdasarkan user id (user yang sama selalu ke worker yang sama -> urutan terjaga)
+- worker: proses terpisah, masing-masing punya Application sendiri (tanpa Updater)
+
+State bersama (cache, session, lock single-flight) ada di Redis.
+"""
+import asyncio
+import logging
+import multiprocessing
+import queue as queue_module
+from typing import Callable, Optional
+
+from aiohttp import web
+from telegram import Bot, Update
+from telegram.ext import Application
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def route_key(data: dict) -> Optional[int]:
+    """User id pengirim update (message, callback_query, dll punya field 'from')"""
+    for value in data.values():
+        if isinstance(value, dict):
+            sender = value.get('from') or value.get('user')
+            if isinstance(sender, dict) and 'id' in sender:
+                return sender['id']
+            chat = value.get('chat')
+            if isinstance(chat, dict) and 'id' in chat:
+                return chat['id']
+    return None
+
+
+# === WORKER ===
+
+async def _worker_loop(index: int, updates: multiprocessing.Queue, build_application: Callable[[], Application]):
+    # Port metrics per worker (METRICS_PORT + index)
+    metrics.worker_index = index
+    app = build_application()
+    loop = asyncio.get_running_loop()
+
+    async with app:
+        # post_init/post_shutdown hanya otomatis di run_polling/run_webhook
+        if app.post_init:
+            await app.post_init(app)
+        await app.start()
+        logger.info(f"👷 Worker {index} ready")
+
+        try:
+            while True:
+                data = await loop.run_in_executor(None, updates.get)
+                if data is None:
+                    break
+                await app.update_queue.put(Update.de_json(data, app.bot))
+        finally:
+            await app.stop()
+            if app.post_shutdown:
+                await app.post_shutdown(app)
+            logger.info(f"👷 Worker {index} stopped")
+
+
+def _worker_main(index: int, updates: multiprocessing.Queue, build_application: Callable[[], Application]):
+    try:
+        asyncio.run(_worker_loop(index, updates, build_application))
+    except KeyboardInterrupt:
+        pass
+
+
+# === FRONT ===
+
+def _update_handler(queues: list, secret: Optional[str]):
+    async def handle_update(request: web.Request):
+        if secret and request.headers.get('X-Telegram-Bot-Api-Secret-Token') != secret:
+            return web.Response(status=403)
+
+        try:
+            data = await request.json()
+        except Exception:
+            return web.Response(status=400)
+
+        key = route_key(data)
+        if key is None:
+            key = data.get('update_id', 0)
+
+        try:
+            queues[key % len(queues)].put_nowait(data)
+        except queue_module.Full:
+            # Telegram akan kirim ulang update ini
+            logger.warning(f"⚠️ Worker queue full, update {data.get('update_id')} ditolak")
+            return web.Response(status=503)
+
+        return web.Response()
+
+    return handle_update
+
+
+def run_cluster(build_application: Callable[[], Application]):
+    """Jalankan front webhook + WEBHOOK_WORKERS proses worker (blocking)"""
+    from config import (TELEGRAM_TOKEN, TELEGRAM_BASE_URL, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_LISTEN, WEBHOOK_PORT,
+                        WEBHOOK_SECRET, WEBHOOK_WORKERS, WEBHOOK_QUEUE_SIZE)
+
+    queues = [multiprocessing.Queue(maxsize=WEBHOOK_QUEUE_SIZE) for _ in range(WEBHOOK_WORKERS)]
+    workers = [
+        multiprocessing.Process(
+            target=_worker_main,
+            args=(index, queues[index], build_application),
+            name=f"dkkm-worker-{index}",
+            daemon=True
+        )
+        for index in range(WEBHOOK_WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
+
+    async def on_startup(app: web.Application):
+        bot_kwargs = {'base_url': f"{TELEGRAM_BASE_URL}/bot"} if TELEGRAM_BASE_URL else {}
+        async with Bot(TELEGRAM_TOKEN, **bot_kwargs) as bot:
+            await bot.set_webhook(
+                url=f"{WEBHOOK_URL}/{WEBHOOK_PATH}",
+                secret_token=WEBHOOK_SECRET,
+                allowed_updates=Update.ALL_TYPES
+            )
+        logger.info(f"🌐 Webhook set: {WEBHOOK_URL}/{WEBHOOK_PATH}")
+
+    async def on_cleanup(app: web.Application):
+        for q in queues:
+            q.put(None)
+        for worker in workers:
+            await asyncio.get_running_loop().run_in_executor(None, worker.join, 30)
+
+    front = web.Application()
+    front.router.add_post(f"/{WEBHOOK_PATH}", _update_handler(queues, WEBHOOK_SECRET))
+    front.on_startup.append(on_startup)
+    front.on_cleanup.append(on_cleanup)
+
+    web.run_app(front, host=WEBHOOK_LISTEN, port=WEBHOOK_PORT, print=None)